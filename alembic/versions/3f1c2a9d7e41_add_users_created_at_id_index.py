@@ -0,0 +1,28 @@
+"""Add composite index on users (created_at, id) for keyset pagination
+
+Revision ID: 3f1c2a9d7e41
+Revises: bc6c7579c8a2
+Create Date: 2026-10-16 09:12:31.402118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9d7e41'
+down_revision: Union[str, Sequence[str], None] = 'bc6c7579c8a2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_users_created_at_id', 'users', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_users_created_at_id', table_name='users')
@@ -0,0 +1,101 @@
+"""Add users.search_text with trigram (PostgreSQL) / FTS5 (SQLite) search index
+
+Revision ID: 7a4e5b2c9d10
+Revises: 3f1c2a9d7e41
+Create Date: 2026-10-16 10:02:47.118392
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.utils import normalize_search_text
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7a4e5b2c9d10'
+down_revision: Union[str, Sequence[str], None] = '3f1c2a9d7e41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SQLITE_FTS_TRIGGERS = [
+    """
+    CREATE TRIGGER users_fts_ai AFTER INSERT ON users BEGIN
+        INSERT INTO users_fts(rowid, search_text) VALUES (new.id, new.search_text);
+    END
+    """,
+    """
+    CREATE TRIGGER users_fts_ad AFTER DELETE ON users BEGIN
+        INSERT INTO users_fts(users_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+    END
+    """,
+    """
+    CREATE TRIGGER users_fts_au AFTER UPDATE OF search_text ON users BEGIN
+        INSERT INTO users_fts(users_fts, rowid, search_text) VALUES ('delete', old.id, old.search_text);
+        INSERT INTO users_fts(rowid, search_text) VALUES (new.id, new.search_text);
+    END
+    """,
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('users', sa.Column('search_text', sa.Text(), nullable=True))
+
+    bind = op.get_bind()
+
+    # Backfill search_text cho các user đã có (bỏ qua ở offline/--sql mode)
+    users = sa.table(
+        'users',
+        sa.column('id', sa.Integer),
+        sa.column('full_name', sa.String),
+        sa.column('email', sa.String),
+        sa.column('search_text', sa.Text),
+    )
+    rows = []
+    if not op.get_context().as_sql:
+        rows = bind.execute(sa.select(users.c.id, users.c.full_name, users.c.email)).all()
+    if rows:
+        bind.execute(
+            users.update().where(users.c.id == sa.bindparam('user_id')),
+            [
+                {'user_id': row.id, 'search_text': normalize_search_text(row.full_name, row.email)}
+                for row in rows
+            ],
+        )
+
+    if bind.dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index(
+            'ix_users_search_text_trgm',
+            'users',
+            ['search_text'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_ops={'search_text': 'gin_trgm_ops'},
+        )
+    elif bind.dialect.name == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE users_fts USING fts5("
+            "search_text, content='users', content_rowid='id', "
+            "tokenize='unicode61 remove_diacritics 2')"
+        )
+        for trigger in SQLITE_FTS_TRIGGERS:
+            op.execute(trigger)
+        op.execute("INSERT INTO users_fts(users_fts) VALUES ('rebuild')")
+    else:
+        op.create_index('ix_users_search_text_trgm', 'users', ['search_text'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    if bind.dialect.name == 'sqlite':
+        for name in ('users_fts_au', 'users_fts_ad', 'users_fts_ai'):
+            op.execute(f'DROP TRIGGER IF EXISTS {name}')
+        op.execute('DROP TABLE IF EXISTS users_fts')
+    else:
+        op.drop_index('ix_users_search_text_trgm', table_name='users')
+    op.drop_column('users', 'search_text')
@@ -0,0 +1,43 @@
+"""Create stored_files table for content-addressed uploads
+
+Revision ID: c52d8e1f0a37
+Revises: 7a4e5b2c9d10
+Create Date: 2026-10-16 11:20:05.731904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c52d8e1f0a37'
+down_revision: Union[str, Sequence[str], None] = '7a4e5b2c9d10'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('stored_files',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('folder', sa.String(length=50), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('size', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('folder', 'filename', name='uq_stored_files_folder_filename')
+    )
+    op.create_index(op.f('ix_stored_files_content_hash'), 'stored_files', ['content_hash'], unique=False)
+    op.create_index(op.f('ix_stored_files_id'), 'stored_files', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_stored_files_id'), table_name='stored_files')
+    op.drop_index(op.f('ix_stored_files_content_hash'), table_name='stored_files')
+    op.drop_table('stored_files')
@@ -0,0 +1,43 @@
+"""Create file_uploads table (per-user upload references)
+
+Revision ID: d4e9a7b3c061
+Revises: a91d3c6e5f72
+Create Date: 2026-10-17 16:40:12.508317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e9a7b3c061'
+down_revision: Union[str, Sequence[str], None] = 'a91d3c6e5f72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('file_uploads',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('stored_file_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['stored_file_id'], ['stored_files.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('stored_file_id', 'user_id', name='uq_file_uploads_file_user')
+    )
+    op.create_index(op.f('ix_file_uploads_id'), 'file_uploads', ['id'], unique=False)
+    op.create_index(op.f('ix_file_uploads_user_id'), 'file_uploads', ['user_id'], unique=False)
+    op.create_index(op.f('ix_file_uploads_created_at'), 'file_uploads', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_file_uploads_created_at'), table_name='file_uploads')
+    op.drop_index(op.f('ix_file_uploads_user_id'), table_name='file_uploads')
+    op.drop_index(op.f('ix_file_uploads_id'), table_name='file_uploads')
+    op.drop_table('file_uploads')
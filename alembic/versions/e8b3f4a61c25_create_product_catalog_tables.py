@@ -0,0 +1,108 @@
+"""Create product catalog tables (categories, products, variants, images)
+
+Revision ID: e8b3f4a61c25
+Revises: c52d8e1f0a37
+Create Date: 2026-10-16 23:40:12.418305
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b3f4a61c25'
+down_revision: Union[str, Sequence[str], None] = 'c52d8e1f0a37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('categories',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('shop_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('slug', sa.String(length=255), nullable=False),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['shop_id'], ['shops.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('shop_id', 'slug', name='uq_categories_shop_slug')
+    )
+    op.create_index(op.f('ix_categories_id'), 'categories', ['id'], unique=False)
+
+    op.create_table('products',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('productid', sa.String(length=50), nullable=True),
+    sa.Column('shop_id', sa.Integer(), nullable=False),
+    sa.Column('category_id', sa.Integer(), nullable=True),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('slug', sa.String(length=255), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('price', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('compare_at_price', sa.Numeric(precision=15, scale=2), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['category_id'], ['categories.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['shop_id'], ['shops.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('shop_id', 'slug', name='uq_products_shop_slug')
+    )
+    op.create_index(op.f('ix_products_id'), 'products', ['id'], unique=False)
+    op.create_index(op.f('ix_products_productid'), 'products', ['productid'], unique=True)
+    op.create_index('ix_products_shop_active_created', 'products', ['shop_id', 'is_active', 'created_at', 'id'], unique=False)
+    op.create_index('ix_products_shop_active_price', 'products', ['shop_id', 'is_active', 'price', 'id'], unique=False)
+    op.create_index('ix_products_shop_category_created', 'products', ['shop_id', 'category_id', 'is_active', 'created_at', 'id'], unique=False)
+
+    op.create_table('product_variants',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('sku', sa.String(length=100), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=True),
+    sa.Column('options', sa.JSON(), nullable=True),
+    sa.Column('price', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('stock', sa.Integer(), nullable=False),
+    sa.Column('is_active', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('product_id', 'sku', name='uq_product_variants_product_sku')
+    )
+    op.create_index(op.f('ix_product_variants_id'), 'product_variants', ['id'], unique=False)
+    op.create_index(op.f('ix_product_variants_product_id'), 'product_variants', ['product_id'], unique=False)
+
+    op.create_table('product_images',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('url', sa.String(), nullable=False),
+    sa.Column('alt', sa.String(length=255), nullable=True),
+    sa.Column('position', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_product_images_id'), 'product_images', ['id'], unique=False)
+    op.create_index('ix_product_images_product_position', 'product_images', ['product_id', 'position'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_product_images_product_position', table_name='product_images')
+    op.drop_index(op.f('ix_product_images_id'), table_name='product_images')
+    op.drop_table('product_images')
+    op.drop_index(op.f('ix_product_variants_product_id'), table_name='product_variants')
+    op.drop_index(op.f('ix_product_variants_id'), table_name='product_variants')
+    op.drop_table('product_variants')
+    op.drop_index('ix_products_shop_category_created', table_name='products')
+    op.drop_index('ix_products_shop_active_price', table_name='products')
+    op.drop_index('ix_products_shop_active_created', table_name='products')
+    op.drop_index(op.f('ix_products_productid'), table_name='products')
+    op.drop_index(op.f('ix_products_id'), table_name='products')
+    op.drop_table('products')
+    op.drop_index(op.f('ix_categories_id'), table_name='categories')
+    op.drop_table('categories')
@@ -0,0 +1,93 @@
+"""Create orders, order_items and idempotency_keys tables
+
+Revision ID: f2a7c9d34b18
+Revises: e8b3f4a61c25
+Create Date: 2026-10-17 09:12:48.205117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a7c9d34b18'
+down_revision: Union[str, Sequence[str], None] = 'e8b3f4a61c25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('orders',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('orderid', sa.String(length=50), nullable=True),
+    sa.Column('shop_id', sa.Integer(), nullable=False),
+    sa.Column('customer_id', sa.Integer(), nullable=True),
+    sa.Column('customer_name', sa.String(length=255), nullable=False),
+    sa.Column('phone_number', sa.String(length=20), nullable=False),
+    sa.Column('shipping_address', sa.String(length=500), nullable=False),
+    sa.Column('note', sa.Text(), nullable=True),
+    sa.Column('subtotal', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('shipping_fee', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('total', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('status', sa.Enum('pending', 'confirmed', 'shipping', 'completed', 'cancelled', name='orderstatus'), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['customer_id'], ['users.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['shop_id'], ['shops.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_orders_id'), 'orders', ['id'], unique=False)
+    op.create_index(op.f('ix_orders_orderid'), 'orders', ['orderid'], unique=True)
+    op.create_index('ix_orders_shop_created_id', 'orders', ['shop_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_orders_customer_created_id', 'orders', ['customer_id', 'created_at', 'id'], unique=False)
+    op.create_table('order_items',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=False),
+    sa.Column('product_id', sa.Integer(), nullable=True),
+    sa.Column('variant_id', sa.Integer(), nullable=True),
+    sa.Column('product_name', sa.String(length=255), nullable=False),
+    sa.Column('sku', sa.String(length=100), nullable=False),
+    sa.Column('options', sa.JSON(), nullable=True),
+    sa.Column('unit_price', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.Column('quantity', sa.Integer(), nullable=False),
+    sa.Column('line_total', sa.Numeric(precision=15, scale=2), nullable=False),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['product_id'], ['products.id'], ondelete='SET NULL'),
+    sa.ForeignKeyConstraint(['variant_id'], ['product_variants.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_order_items_id'), 'order_items', ['id'], unique=False)
+    op.create_index(op.f('ix_order_items_order_id'), 'order_items', ['order_id'], unique=False)
+    op.create_table('idempotency_keys',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('key', sa.String(length=255), nullable=False),
+    sa.Column('request_hash', sa.String(length=64), nullable=False),
+    sa.Column('order_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['order_id'], ['orders.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'key', name='uq_idempotency_keys_user_key')
+    )
+    op.create_index(op.f('ix_idempotency_keys_id'), 'idempotency_keys', ['id'], unique=False)
+    op.create_index(op.f('ix_idempotency_keys_created_at'), 'idempotency_keys', ['created_at'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_idempotency_keys_created_at'), table_name='idempotency_keys')
+    op.drop_index(op.f('ix_idempotency_keys_id'), table_name='idempotency_keys')
+    op.drop_table('idempotency_keys')
+    op.drop_index(op.f('ix_order_items_order_id'), table_name='order_items')
+    op.drop_index(op.f('ix_order_items_id'), table_name='order_items')
+    op.drop_table('order_items')
+    op.drop_index('ix_orders_customer_created_id', table_name='orders')
+    op.drop_index('ix_orders_shop_created_id', table_name='orders')
+    op.drop_index(op.f('ix_orders_orderid'), table_name='orders')
+    op.drop_index(op.f('ix_orders_id'), table_name='orders')
+    op.drop_table('orders')
+    sa.Enum(name='orderstatus').drop(op.get_bind(), checkfirst=True)
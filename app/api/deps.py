@@ -1,19 +1,23 @@
 # app/api/deps.py
 
-from typing import Generator
-from fastapi import Depends, HTTPException, status
-from fastapi.security import HTTPBearer
+from typing import AsyncGenerator, Generator, Optional
+from fastapi import Depends, HTTPException, Query, Request, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.orm import Session
-from jose import jwt, JWTError
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core import config
 from app.core.security import decode_access_token
-from app.crud import crud_user
-from app.db.session import SessionLocal
-from app.models.user import User
+from app.core.principal import Principal, principal_cache, revoked_sessions
+from app.crud import crud_session, crud_shop, crud_user
+from app.db.replicas import replica_router
+from app.db.session import AsyncSessionLocal, SessionLocal
+from app.models.user import User, UserRole
 
 # Security scheme
 security = HTTPBearer()
+# Không bắt buộc token: dùng để chọn replica, việc xác thực do các dependency khác làm
+optional_security = HTTPBearer(auto_error=False)
 
 
 def get_db() -> Generator:
@@ -25,40 +29,215 @@ def get_db() -> Generator:
         db.close()
 
 
-def get_current_user(
-    db: Session = Depends(get_db),
-    token: str = Depends(security)
-) -> User:
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """Dependency để lấy AsyncSession (cho endpoint async dùng crud_*_async)."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def _peek_token_subject(credentials: Optional[HTTPAuthorizationCredentials]) -> Optional[str]:
+    """uid trong token nếu token hợp lệ, không raise (chỉ dùng để định tuyến)."""
+    if credentials is None:
+        return None
+    payload = decode_access_token(credentials.credentials)
+    return payload.get("sub") if payload else None
+
+
+def get_read_db(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+) -> Generator:
     """
-    Dependency để lấy user hiện tại từ JWT token.
+    Dependency session chỉ đọc: SELECT đi tới một read replica (round-robin,
+    bỏ qua replica lỗi). User vừa ghi dữ liệu được đọc từ primary trong
+    DB_READ_YOUR_WRITES_SECONDS giây. Không cấu hình replica thì như get_db.
     """
-    credentials_exception = HTTPException(
+    replica = replica_router.choose(_peek_token_subject(credentials))
+    db = SessionLocal(replica=replica.engine if replica else None)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+async def get_async_read_db(
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+) -> AsyncGenerator[AsyncSession, None]:
+    """Bản async của get_read_db."""
+    replica = replica_router.choose(_peek_token_subject(credentials))
+    async with AsyncSessionLocal(replica=replica.async_engine.sync_engine if replica else None) as db:
+        yield db
+
+
+def get_storefront_shop_id(
+    request: Request,
+    shopid: Optional[str] = Query(None, description="Mã shop (khi không truy cập qua subdomain)"),
+    db: Session = Depends(get_read_db),
+) -> int:
+    """
+    Dependency: id của shop đang xem/mua. Lấy từ tenant resolve theo Host
+    (TenantMiddleware), hoặc từ `shopid` khi gọi API không qua subdomain.
+    """
+    tenant = getattr(request.state, "tenant", None)
+    if tenant is not None and tenant.is_active:
+        return tenant.id
+    if shopid:
+        shop = crud_shop.get_shop_by_shopid(db, shopid=shopid)
+        if shop and shop.is_active:
+            return shop.id
+    raise HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="Không tìm thấy shop"
+    )
+
+
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _get_token_claims(db: Session, token) -> dict:
+    """Decode JWT; token sai, hết hạn hoặc thuộc phiên đã logout/bị thu hồi thì 401."""
+    payload = decode_access_token(token.credentials)
+    if payload is None or payload.get("sub") is None:
+        raise _credentials_exception()
+    if revoked_sessions.is_revoked(payload, lambda user_id: crud_session.get_revoked_session_ids(db, user_id)):
+        raise _credentials_exception()
+    return payload
+
+
+def _get_token_subject(db: Session, token) -> str:
+    """Decode JWT và trả về uid (claim `sub`)."""
+    return _get_token_claims(db, token)["sub"]
+
+
+def get_current_user(
+    db: Session = Depends(get_db),
+    token: str = Depends(security)
+) -> User:
+    """
+    Dependency để lấy user hiện tại từ JWT token.
     
-    try:
-        # Decode JWT token
-        payload = decode_access_token(token.credentials)
-        if payload is None:
-            raise credentials_exception
-            
-        user_uid: str = payload.get("sub")
-        if user_uid is None:
-            raise credentials_exception
-            
-    except JWTError:
-        raise credentials_exception
+    Trả về ORM object đầy đủ; chỉ dùng khi endpoint cần đọc/ghi các trường
+    của user. Để kiểm tra quyền hãy dùng `get_current_principal`.
+    """
+    user_uid = _get_token_subject(db, token)
+    # Để session biết ai đang ghi (read-your-writes, xem app/db/replicas.py)
+    db.info["principal_uid"] = user_uid
     
     # Lấy user từ database
     user = crud_user.get_user_by_uid(db=db, uid=user_uid)
     if user is None:
-        raise credentials_exception
-        
+        raise _credentials_exception()
+    
+    principal_cache.set(Principal.from_user(user))
+    return user
+
+
+def get_current_read_user(
+    db: Session = Depends(get_read_db),
+    token: str = Depends(security)
+) -> User:
+    """
+    Như get_current_user nhưng đọc từ read replica, cho endpoint chỉ đọc.
+    
+    Không ghi vào principal_cache: dữ liệu replica có thể trễ so với primary.
+    """
+    user = crud_user.get_user_by_uid(db=db, uid=_get_token_subject(db, token))
+    if user is None:
+        raise _credentials_exception()
     return user
 
 
+def _load_principal(db: Session, user_uid: str) -> Principal:
+    """Principal từ principal_cache, cache miss thì đọc DB."""
+    principal = principal_cache.get(user_uid)
+    if principal is None:
+        user = crud_user.get_user_by_uid(db=db, uid=user_uid)
+        if user is None:
+            raise _credentials_exception()
+        principal = Principal.from_user(user)
+        principal_cache.set(principal)
+    return principal
+
+
+def get_current_principal(
+    db: Session = Depends(get_db),
+    token: str = Depends(security)
+) -> Principal:
+    """
+    Dependency để lấy principal (uid, id, role, is_active) của user hiện tại.
+    
+    Đọc từ principal_cache trước; chỉ query DB khi cache miss.
+    """
+    user_uid = _get_token_subject(db, token)
+    db.info["principal_uid"] = user_uid
+    return _load_principal(db, user_uid)
+
+
+def get_token_principal(
+    db: Session = Depends(get_db),
+    token: str = Depends(security)
+) -> Principal:
+    """
+    Dependency lấy principal thẳng từ claims của access token (id, role,
+    active): không đọc principal_cache, không query DB (trừ khi danh sách
+    phiên đã thu hồi không còn trong cache, xem RevokedSessions).
+    
+    Role/trạng thái có thể cũ tối đa ACCESS_TOKEN_EXPIRE_MINUTES (user bị
+    khóa hoặc đổi role vẫn dùng được token cũ tới khi hết hạn), nên chỉ dùng
+    cho endpoint ít rủi ro, chỉ đọc dữ liệu của chính user. Token cũ không có
+    các claim này thì dùng như get_current_principal.
+    """
+    payload = _get_token_claims(db, token)
+    principal = Principal.from_claims(payload)
+    if principal is None:
+        principal = _load_principal(db, payload["sub"])
+    return principal
+
+
+def get_current_active_principal(
+    principal: Principal = Depends(get_current_principal)
+) -> Principal:
+    """
+    Dependency để lấy principal hiện tại và đảm bảo user đang active.
+    """
+    if not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, 
+            detail="Tài khoản đã bị vô hiệu hóa"
+        )
+    return principal
+
+
+def get_current_active_token_principal(
+    principal: Principal = Depends(get_token_principal)
+) -> Principal:
+    """Như get_current_active_principal nhưng lấy principal từ token (xem get_token_principal)."""
+    if not principal.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, 
+            detail="Tài khoản đã bị vô hiệu hóa"
+        )
+    return principal
+
+
+def get_current_admin_principal(
+    principal: Principal = Depends(get_current_active_principal)
+) -> Principal:
+    """
+    Dependency để đảm bảo user hiện tại là sysadmin (không query DB khi cache hit).
+    """
+    if principal.role != UserRole.sysadmin:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Không đủ quyền để truy cập tính năng này"
+        )
+    return principal
+
+
 def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -73,6 +252,20 @@ def get_current_active_user(
     return current_user
 
 
+def get_current_active_read_user(
+    current_user: User = Depends(get_current_read_user)
+) -> User:
+    """
+    Dependency để lấy user hiện tại (đọc từ replica) và đảm bảo user đang active.
+    """
+    if not current_user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, 
+            detail="Tài khoản đã bị vô hiệu hóa"
+        )
+    return current_user
+
+
 def get_current_admin_user(
     current_user: User = Depends(get_current_active_user)
 ) -> User:
@@ -2,10 +2,14 @@
 
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import auth, shops, users
+from app.api.v1 import upload
+from app.api.v1.endpoints import auth, internal, orders, products, shops, users
 
 api_router = APIRouter()
 api_router.include_router(auth.router, prefix="/auth", tags=["Auth"])
 api_router.include_router(shops.router, prefix="/shops", tags=["Shops"])
 api_router.include_router(users.router, prefix="/users", tags=["users"])
-# ... sau này sẽ include_router cho products, orders, etc.
\ No newline at end of file
+api_router.include_router(products.router, prefix="/products", tags=["Products"])
+api_router.include_router(orders.router, prefix="/orders", tags=["Orders"])
+api_router.include_router(upload.router, prefix="/upload", tags=["Upload"])
+api_router.include_router(internal.router, prefix="/internal", tags=["Internal"])
\ No newline at end of file
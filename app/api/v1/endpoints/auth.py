@@ -1,43 +1,115 @@
 # app/api/v1/endpoints/auth.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordRequestForm
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app import crud, schemas, models
 from app.api import deps
 from app.core import security
+from app.core.config import settings
+from app.core.instrumentation import TimedRoute
+from app.core.password_service import password_service
+from app.core.principal import Principal
+from app.core.rate_limit import login_rate_limiter
+from app.crud import crud_session
+from app.crud.user_uniqueness import UniqueFieldError
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 # Schema cho login request với JSON
 class LoginRequest(BaseModel):
     username: str  # hoặc email
     password: str
 
-@router.post("/login", response_model=schemas.Token)
-def login_for_access_token(
-    login_data: LoginRequest,
-    db: Session = Depends(deps.get_db)
-):
+
+def _token_response(principal: Principal, session_id: int, refresh_token: str) -> dict:
+    return {
+        "access_token": security.create_user_access_token(principal, session_id=session_id),
+        "token_type": "bearer",
+        "refresh_token": refresh_token,
+        "expires_in": settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    }
+
+
+def _client_info(request: Request) -> dict:
+    return {
+        "device": request.headers.get("user-agent"),
+        "ip_address": request.client.host if request.client else None,
+    }
+
+
+def _find_login_user(db: Session, username: str, ip_address: Optional[str]) -> Optional[models.User]:
+    """Kiểm tra rate limit (429 trước khi tốn bcrypt) rồi tìm user theo email."""
+    retry_after = login_rate_limiter.check(ip_address, username)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Bạn đã đăng nhập sai quá nhiều lần, vui lòng thử lại sau.",
+            headers={"Retry-After": str(retry_after)},
+        )
+    return crud.crud_user.get_user_by_email(db, email=username)
+
+
+async def _authenticate(db: Session, request: Request, username: str, password: str) -> models.User:
     """
-    Đăng nhập để lấy access token.
-    Nhận JSON với username (email) và password.
+    Xác thực email + mật khẩu cho các endpoint login.
+
+    Email không tồn tại vẫn verify với một hash giả để thời gian phản hồi
+    giống mật khẩu sai. Lần sai được đếm vào login_rate_limiter. Hash không
+    theo chính sách hiện tại được hash lại và lưu ngay khi đăng nhập đúng.
     """
-    user = crud.crud_user.get_user_by_email(db, email=login_data.username)
-    if not user or not security.verify_password(login_data.password, user.hashed_password):
+    ip_address = _client_info(request)["ip_address"]
+    user = await run_in_threadpool(_find_login_user, db, username, ip_address)
+    if user:
+        hashed_password = user.hashed_password
+    else:
+        # Lần gọi đầu tạo hash giả (tốn một lần bcrypt) nên không chạy trên event loop
+        hashed_password = await run_in_threadpool(security.dummy_password_hash)
+    valid, new_hash = await password_service.verify_and_update(password, hashed_password)
+    if not valid or not user:
+        await run_in_threadpool(login_rate_limiter.register_failure, ip_address, username)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Email hoặc mật khẩu không đúng.",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = security.create_access_token(subject=user.uid)
-    return {"access_token": access_token, "token_type": "bearer"}
+    if new_hash:
+        # Chính sách hash (PASSWORD_HASH_SCHEME/cost) đã đổi: lưu hash mới, không cần migration
+        await run_in_threadpool(
+            crud.crud_user.rehash_user_password, db, user.id, hashed_password, new_hash
+        )
+    return user
+
+
+def _issue_tokens(db: Session, user: models.User, request: Request) -> dict:
+    """Tạo phiên đăng nhập mới (refresh token) và access token gắn với phiên."""
+    login_rate_limiter.register_success(user.email)
+    principal = Principal.from_user(user)
+    session_id, refresh_token = crud_session.create_session(db, user, **_client_info(request))
+    return _token_response(principal, session_id, refresh_token)
+
+@router.post("/login", response_model=schemas.Token)
+async def login_for_access_token(
+    login_data: LoginRequest,
+    request: Request,
+    db: Session = Depends(deps.get_db)
+):
+    """
+    Đăng nhập để lấy access token và refresh token.
+    Nhận JSON với username (email) và password.
+    """
+    user = await _authenticate(db, request, login_data.username, login_data.password)
+    return await run_in_threadpool(_issue_tokens, db, user, request)
 
 # Endpoint cũ cho compatibility (nếu cần)
 @router.post("/login/form", response_model=schemas.Token)
-def login_form_for_access_token(
+async def login_form_for_access_token(
+    request: Request,
     db: Session = Depends(deps.get_db), 
     form_data: OAuth2PasswordRequestForm = Depends()
 ):
@@ -45,34 +117,78 @@ def login_form_for_access_token(
     Đăng nhập với form data (OAuth2 standard).
     Username chính là email.
     """
-    user = crud.crud_user.get_user_by_email(db, email=form_data.username)
-    if not user or not security.verify_password(form_data.password, user.hashed_password):
+    user = await _authenticate(db, request, form_data.username, form_data.password)
+    return await run_in_threadpool(_issue_tokens, db, user, request)
+
+@router.post("/refresh", response_model=schemas.Token)
+def refresh_access_token(
+    refresh_in: schemas.RefreshTokenRequest,
+    request: Request,
+    db: Session = Depends(deps.get_db),
+):
+    """
+    Đổi refresh token lấy access token + refresh token mới, không cần mật khẩu.
+    
+    Refresh token chỉ dùng được một lần. Gửi lại refresh token đã dùng (bị
+    lộ, hoặc hai tab refresh cùng lúc) sẽ thu hồi cả phiên đăng nhập đó.
+    """
+    try:
+        principal, session_id, refresh_token = crud_session.rotate_session(
+            db, refresh_in.refresh_token, **_client_info(request)
+        )
+    except crud_session.InvalidRefreshTokenError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Email hoặc mật khẩu không đúng.",
+            detail="Phiên đăng nhập không hợp lệ hoặc đã hết hạn, vui lòng đăng nhập lại.",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token = security.create_access_token(subject=user.email)
-    return {"access_token": access_token, "token_type": "bearer"}
+    return _token_response(principal, session_id, refresh_token)
+
+@router.post("/logout", status_code=status.HTTP_204_NO_CONTENT)
+def logout(
+    refresh_in: schemas.RefreshTokenRequest,
+    db: Session = Depends(deps.get_db),
+):
+    """Đăng xuất thiết bị hiện tại: thu hồi refresh token và các access token của phiên."""
+    crud_session.revoke_by_token(db, refresh_in.refresh_token)
+    return None
+
+@router.post("/logout-all", status_code=status.HTTP_204_NO_CONTENT)
+def logout_all(
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_user),
+):
+    """Đăng xuất khỏi mọi thiết bị."""
+    crud_session.revoke_user_sessions(db, current_user)
+    return None
 
 @router.post("/register", response_model=schemas.User, status_code=status.HTTP_201_CREATED)
-def register_user(
+async def register_user(
     *,
     db: Session = Depends(deps.get_db),
     user_in: schemas.UserCreate,
 ):
-    user = crud.crud_user.get_user_by_email(db, email=user_in.email)
+    user = await run_in_threadpool(crud.crud_user.get_user_by_email, db, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=400,
             detail="Email này đã được sử dụng.",
         )
-    user = crud.crud_user.create_user(db, user_in=user_in)
+    hashed_password = await password_service.hash(user_in.password)
+    try:
+        user = await run_in_threadpool(
+            crud.crud_user.create_user, db, user_in=user_in, hashed_password=hashed_password
+        )
+    except UniqueFieldError as e:
+        raise HTTPException(
+            status_code=400,
+            detail=e.detail,
+        )
     return user
 
 @router.get("/me", response_model=schemas.User)
-def read_user_me(
-    current_user: models.User = Depends(deps.get_current_active_user),
+async def read_user_me(
+    current_user: models.User = Depends(deps.get_current_active_read_user),
 ):
     """Lấy thông tin của user đang đăng nhập."""
     return current_user
\ No newline at end of file
@@ -0,0 +1,44 @@
+# app/api/v1/endpoints/internal.py
+
+from fastapi import APIRouter, Depends
+
+from app.api import deps
+from app.core.cache import cache_stats
+from app.core.instrumentation import TimedRoute
+from app.core.password_service import password_service
+from app.core.principal import Principal
+from app.db.pool import pool_metrics
+from app.db.replicas import replica_router
+
+router = APIRouter(route_class=TimedRoute)
+
+@router.get("/db-pool")
+async def get_db_pool_metrics(
+    current_user: Principal = Depends(deps.get_current_admin_principal),
+):
+    """
+    Trạng thái connection pool của các engine (số connection đang dùng,
+    overflow, thời gian chờ checkout, số lần timeout) và health của replica.
+    
+    Không dùng DB session nên vẫn trả lời được khi pool đã cạn.
+    """
+    return {"pools": pool_metrics(), "replicas": replica_router.status()}
+
+
+@router.get("/caches")
+async def get_cache_metrics(
+    current_user: Principal = Depends(deps.get_current_admin_principal),
+):
+    """Thống kê các cache của app (hit local/shared, miss, số lần load, invalidation)."""
+    return {"caches": cache_stats()}
+
+
+@router.get("/password-hash")
+async def get_password_hash_metrics(
+    current_user: Principal = Depends(deps.get_current_admin_principal),
+):
+    """
+    Worker pool hash mật khẩu: số job đang chạy/chờ, đã xong, lỗi, bị từ
+    chối (503 khi pool đầy) và thời gian hash trung bình/tối đa.
+    """
+    return {"password_hash": password_service.stats()}
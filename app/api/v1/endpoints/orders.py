@@ -0,0 +1,136 @@
+# app/api/v1/endpoints/orders.py
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response, status
+from sqlalchemy.orm import Session
+
+from app.api import deps
+from app.core.instrumentation import TimedRoute
+from app.core.principal import Principal
+from app.crud import crud_order, crud_shop
+from app.crud.pagination import InvalidCursorError
+from app.schemas.order import Order, OrderCreate, OrderListResponse
+
+router = APIRouter(route_class=TimedRoute)
+
+
+@router.post("/", response_model=Order, status_code=status.HTTP_201_CREATED)
+def create_order(
+    order_in: OrderCreate,
+    response: Response,
+    shop_id: int = Depends(deps.get_storefront_shop_id),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", max_length=255),
+    db: Session = Depends(deps.get_db),
+    current_user: Principal = Depends(deps.get_current_active_principal),
+):
+    """
+    Đặt hàng tại shop đang xem.
+
+    Gửi header `Idempotency-Key` (vd: UUID sinh một lần cho mỗi lần bấm "Đặt
+    hàng") để retry an toàn: gửi lại cùng key và cùng nội dung sẽ nhận lại
+    đơn đã tạo (header `Idempotent-Replayed: true`), không trừ kho lần nữa.
+    """
+    try:
+        order, created = crud_order.place_order(
+            db,
+            shop_id=shop_id,
+            customer_id=current_user.id,
+            order_in=order_in,
+            idempotency_key=idempotency_key,
+        )
+    except crud_order.OutOfStockError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except crud_order.IdempotencyKeyInProgressError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    except crud_order.IdempotencyKeyReusedError as e:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e))
+    except crud_order.OrderError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    if not created:
+        response.headers["Idempotent-Replayed"] = "true"
+    return order
+
+
+@router.get("/my-orders", response_model=OrderListResponse)
+def get_my_orders(
+    limit: int = Query(20, ge=1, le=100, description="Số đơn mỗi trang"),
+    cursor: Optional[str] = Query(None, description="Cursor của trang tiếp theo (next_cursor)"),
+    db: Session = Depends(deps.get_read_db),
+    current_user: Principal = Depends(deps.get_current_active_token_principal),
+):
+    """Đơn hàng của user đang đăng nhập (mới nhất trước)."""
+    try:
+        orders, pagination_info = crud_order.get_orders_paginated(
+            db, customer_id=current_user.id, limit=limit, cursor=cursor
+        )
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor không hợp lệ"
+        )
+    return OrderListResponse(data=orders, pagination=pagination_info)
+
+
+@router.get("/shop-orders", response_model=OrderListResponse)
+def get_shop_orders(
+    limit: int = Query(20, ge=1, le=100, description="Số đơn mỗi trang"),
+    cursor: Optional[str] = Query(None, description="Cursor của trang tiếp theo (next_cursor)"),
+    db: Session = Depends(deps.get_read_db),
+    current_user: Principal = Depends(deps.get_current_active_principal),
+):
+    """Đơn hàng của shop do user đang đăng nhập sở hữu."""
+    shop = crud_shop.get_shop_by_owner(db, owner_id=current_user.id)
+    if not shop:
+        raise HTTPException(status_code=404, detail="Shop not found.")
+
+    try:
+        orders, pagination_info = crud_order.get_orders_paginated(
+            db, shop_id=shop.id, limit=limit, cursor=cursor
+        )
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor không hợp lệ"
+        )
+    return OrderListResponse(data=orders, pagination=pagination_info)
+
+
+def _get_visible_order(db: Session, orderid: str, current_user: Principal):
+    """Đơn hàng mà user hiện tại được xem: khách đặt đơn hoặc chủ shop."""
+    order = crud_order.get_order_by_orderid(db, orderid=orderid)
+    if order is not None and order.customer_id != current_user.id:
+        shop = crud_shop.get_shop_by_owner(db, owner_id=current_user.id)
+        if shop is None or shop.id != order.shop_id:
+            order = None
+    if order is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Không tìm thấy đơn hàng"
+        )
+    return order
+
+
+@router.get("/{orderid}", response_model=Order)
+def get_order(
+    orderid: str,
+    db: Session = Depends(deps.get_read_db),
+    current_user: Principal = Depends(deps.get_current_active_token_principal),
+):
+    """Chi tiết đơn hàng."""
+    return _get_visible_order(db, orderid, current_user)
+
+
+@router.post("/{orderid}/cancel", response_model=Order)
+def cancel_order(
+    orderid: str,
+    db: Session = Depends(deps.get_db),
+    current_user: Principal = Depends(deps.get_current_active_principal),
+):
+    """Hủy đơn (khi chưa giao vận chuyển) và hoàn lại tồn kho."""
+    order = _get_visible_order(db, orderid, current_user)
+    try:
+        return crud_order.cancel_order(db, order=order)
+    except crud_order.OrderNotCancellableError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
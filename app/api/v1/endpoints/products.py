@@ -0,0 +1,250 @@
+# app/api/v1/endpoints/products.py
+
+from decimal import Decimal
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.api import deps
+from app.core.file_handler import file_handler
+from app.core.instrumentation import TimedRoute
+from app.core.principal import Principal
+from app.crud import crud_file, crud_product, crud_shop
+from app.crud.pagination import InvalidCursorError
+from app.models.shop import Shop
+from app.schemas.product import (
+    Category, CategoryCreate, Product, ProductCreate, ProductListResponse, ProductUpdate,
+    ProductVariant, ProductVariantCreate, ProductVariantUpdate,
+)
+
+router = APIRouter(route_class=TimedRoute)
+
+
+def _get_owner_shop(db: Session, current_user: Principal) -> Shop:
+    shop = crud_shop.get_shop_by_owner(db, owner_id=current_user.id)
+    if not shop:
+        raise HTTPException(status_code=404, detail="Shop not found.")
+    return shop
+
+
+def _get_owner_product(db: Session, shop: Shop, productid: str):
+    product = crud_product.get_product_by_productid(db, productid=productid, shop_id=shop.id)
+    if not product:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Không tìm thấy sản phẩm"
+        )
+    return product
+
+
+def _check_category(db: Session, shop: Shop, category_id: Optional[int]) -> None:
+    if category_id is not None and not crud_product.get_category(db, shop_id=shop.id, category_id=category_id):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Danh mục không tồn tại"
+        )
+
+
+def _product_images(filenames: List[str]) -> List[dict]:
+    """Ảnh đã upload qua /upload/product-images -> dữ liệu ProductImage."""
+    return [
+        {"filename": filename, "url": file_handler.get_file_url(filename, "products")}
+        for filename in filenames
+    ]
+
+
+def _delete_owner_product(db: Session, current_user: Principal, productid: str) -> List[str]:
+    shop = _get_owner_shop(db, current_user)
+    product = _get_owner_product(db, shop, productid)
+    return crud_product.delete_product(db, product=product)
+
+
+# --- Storefront (chỉ đọc, đi read replica) ---
+
+@router.get("/", response_model=ProductListResponse)
+def get_products(
+    shop_id: int = Depends(deps.get_storefront_shop_id),
+    limit: int = Query(20, ge=1, le=100, description="Số sản phẩm mỗi trang"),
+    cursor: Optional[str] = Query(None, description="Cursor của trang tiếp theo (next_cursor)"),
+    sort: str = Query("newest", description="newest | price_asc | price_desc"),
+    min_price: Optional[Decimal] = Query(None, ge=0, description="Giá tối thiểu"),
+    max_price: Optional[Decimal] = Query(None, ge=0, description="Giá tối đa"),
+    category_id: Optional[int] = Query(None, description="Lọc theo danh mục"),
+    db: Session = Depends(deps.get_read_db),
+):
+    """
+    Danh sách sản phẩm đang bán của shop.
+
+    - **sort**: `newest` (mặc định), `price_asc`, `price_desc`
+    - **cursor**: lấy từ `pagination.next_cursor` của response trước; cursor
+      gắn với `sort`, đổi sort thì bắt đầu lại từ trang đầu
+    - Không có tổng số trang/sản phẩm (tránh COUNT(*) trên catalog lớn)
+    """
+    if sort not in crud_product.SORT_OPTIONS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Kiểu sắp xếp không hợp lệ"
+        )
+
+    try:
+        products, pagination_info = crud_product.get_products_paginated(
+            db=db,
+            shop_id=shop_id,
+            limit=limit,
+            cursor=cursor,
+            sort=sort,
+            min_price=min_price,
+            max_price=max_price,
+            category_id=category_id,
+        )
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor không hợp lệ"
+        )
+
+    return ProductListResponse(data=products, pagination=pagination_info)
+
+
+@router.get("/categories", response_model=List[Category])
+def get_categories(
+    shop_id: int = Depends(deps.get_storefront_shop_id),
+    db: Session = Depends(deps.get_read_db),
+):
+    """Danh mục sản phẩm của shop."""
+    return crud_product.get_categories(db, shop_id=shop_id)
+
+
+@router.get("/{productid}", response_model=Product)
+def get_product(
+    productid: str,
+    shop_id: int = Depends(deps.get_storefront_shop_id),
+    db: Session = Depends(deps.get_read_db),
+):
+    """Chi tiết sản phẩm (kèm biến thể và ảnh)."""
+    product = crud_product.get_product_by_productid(db, productid=productid, shop_id=shop_id)
+    if not product or not product.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Không tìm thấy sản phẩm"
+        )
+    return product
+
+
+# --- Quản lý (chủ shop) ---
+
+@router.post("/categories", response_model=Category, status_code=status.HTTP_201_CREATED)
+def create_category(
+    category_in: CategoryCreate,
+    db: Session = Depends(deps.get_db),
+    current_user: Principal = Depends(deps.get_current_active_principal),
+):
+    """Chủ shop tạo danh mục."""
+    shop = _get_owner_shop(db, current_user)
+    return crud_product.create_category(db, shop_id=shop.id, category_in=category_in)
+
+
+@router.post("/", response_model=Product, status_code=status.HTTP_201_CREATED)
+def create_product(
+    product_in: ProductCreate,
+    db: Session = Depends(deps.get_db),
+    current_user: Principal = Depends(deps.get_current_active_principal),
+):
+    """
+    Chủ shop tạo sản phẩm.
+
+    Không truyền `variants` thì tạo một biến thể mặc định (sku "DEFAULT") với
+    giá `price` và tồn kho `stock`. `images` là các filename trả về từ
+    /upload/product-images của chính user (lượt upload còn hạn).
+    """
+    shop = _get_owner_shop(db, current_user)
+    _check_category(db, shop, product_in.category_id)
+
+    skus = [variant.sku for variant in product_in.variants]
+    if len(skus) != len(set(skus)):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="SKU bị trùng"
+        )
+
+    try:
+        return crud_product.create_product(
+            db,
+            shop_id=shop.id,
+            product_in=product_in,
+            images=_product_images(product_in.images),
+            owner_id=current_user.id,
+        )
+    except crud_file.FileNotOwnedError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Ảnh không tồn tại hoặc không phải ảnh bạn đã upload: {exc.filename}"
+        )
+
+
+@router.put("/{productid}", response_model=Product)
+def update_product(
+    productid: str,
+    product_in: ProductUpdate,
+    db: Session = Depends(deps.get_db),
+    current_user: Principal = Depends(deps.get_current_active_principal),
+):
+    """Chủ shop cập nhật sản phẩm."""
+    shop = _get_owner_shop(db, current_user)
+    product = _get_owner_product(db, shop, productid)
+    _check_category(db, shop, product_in.category_id)
+    return crud_product.update_product(db, product=product, product_in=product_in)
+
+
+@router.delete("/{productid}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_product(
+    productid: str,
+    db: Session = Depends(deps.get_db),
+    current_user: Principal = Depends(deps.get_current_active_principal),
+):
+    """Chủ shop xóa sản phẩm (kèm biến thể, ảnh)."""
+    # Phần DB (kèm nhả tham chiếu tới các file ảnh) chạy trong threadpool
+    unreferenced = await run_in_threadpool(_delete_owner_product, db, current_user, productid)
+
+    # File ảnh chỉ bị xóa khi không còn ai dùng
+    await file_handler.unlink_files([("products", filename) for filename in unreferenced], db)
+
+
+@router.post("/{productid}/variants", response_model=ProductVariant, status_code=status.HTTP_201_CREATED)
+def create_variant(
+    productid: str,
+    variant_in: ProductVariantCreate,
+    db: Session = Depends(deps.get_db),
+    current_user: Principal = Depends(deps.get_current_active_principal),
+):
+    """Chủ shop thêm biến thể cho sản phẩm."""
+    shop = _get_owner_shop(db, current_user)
+    product = _get_owner_product(db, shop, productid)
+    if any(variant.sku == variant_in.sku for variant in product.variants):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="SKU bị trùng"
+        )
+    return crud_product.add_variant(db, product=product, variant_in=variant_in)
+
+
+@router.put("/{productid}/variants/{variant_id}", response_model=ProductVariant)
+def update_variant(
+    productid: str,
+    variant_id: int,
+    variant_in: ProductVariantUpdate,
+    db: Session = Depends(deps.get_db),
+    current_user: Principal = Depends(deps.get_current_active_principal),
+):
+    """Chủ shop cập nhật giá/tồn kho/trạng thái của biến thể."""
+    shop = _get_owner_shop(db, current_user)
+    product = _get_owner_product(db, shop, productid)
+    variant = next((variant for variant in product.variants if variant.id == variant_id), None)
+    if variant is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Không tìm thấy biến thể"
+        )
+    return crud_product.update_variant(db, product=product, variant=variant, variant_in=variant_in)
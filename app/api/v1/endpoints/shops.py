@@ -2,11 +2,14 @@
 
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app import crud, models, schemas
 from app.api import deps
+from app.core.instrumentation import TimedRoute
+from app.core.principal import Principal, principal_cache
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 @router.post("/", response_model=schemas.Shop, status_code=201)
 def create_shop(
@@ -34,19 +37,20 @@ def create_shop(
     current_user.role = models.user.UserRole.shop_owner
     db.add(current_user)
     db.commit()
+    principal_cache.invalidate(current_user.uid)
     
     return shop
 
 @router.get("/my-shop", response_model=schemas.Shop)
-def get_my_shop(
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_active_user),
+async def get_my_shop(
+    db: AsyncSession = Depends(deps.get_async_read_db),
+    current_user: Principal = Depends(deps.get_current_active_principal),
 ):
     """Lấy thông tin shop của chủ shop đang đăng nhập."""
     if current_user.role != models.user.UserRole.shop_owner:
         raise HTTPException(status_code=403, detail="User is not a shop owner.")
         
-    shop = crud.crud_shop.get_shop_by_owner(db, owner_id=current_user.id)
+    shop = await crud.crud_shop_async.get_shop_by_owner(db, owner_id=current_user.id)
     if not shop:
         raise HTTPException(status_code=404, detail="Shop not found.")
         
@@ -1,17 +1,28 @@
 # app/api/v1/endpoints/users.py
 
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, File, HTTPException, status, Query, UploadFile
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
 from app.api import deps
-from app.crud import crud_user
+from app.core.config import settings
+from app.core.instrumentation import TimedRoute
+from app.core.password_service import password_service
+from app.core.principal import Principal
+from app.crud import crud_user, user_bulk, user_uniqueness
+from app.crud.user_uniqueness import UNIQUE_FIELDS, UniqueFieldError
+from app.crud.pagination import InvalidCursorError
+from app.db.replicas import replica_router
+from app.db.session import SessionLocal
 from app.schemas.user import (
     User, UserCreate, UserUpdate, UserListResponse, 
-    UserStatusUpdate, UserPasswordUpdate
+    UserStatusUpdate, UserPasswordUpdate, UserImportResult
 )
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 @router.get("/", response_model=UserListResponse)
@@ -20,8 +31,10 @@ def get_users(
     limit: int = Query(10, ge=1, le=100, description="Số items per page"),
     search: Optional[str] = Query(None, description="Tìm kiếm theo tên hoặc email"),
     role: Optional[str] = Query(None, description="Lọc theo vai trò"),
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_user)
+    cursor: Optional[str] = Query(None, description="Cursor của trang tiếp theo (next_cursor)"),
+    include_total: bool = Query(True, description="Đếm tổng số users (tắt để nhanh hơn)"),
+    db: Session = Depends(deps.get_read_db),
+    current_user: Principal = Depends(deps.get_current_active_principal)
 ):
     """
     Lấy danh sách users với phân trang.
@@ -30,6 +43,10 @@ def get_users(
     - **limit**: Số lượng users trên mỗi trang (tối đa 100)
     - **search**: Tìm kiếm theo tên hoặc email
     - **role**: Lọc theo vai trò (customer, affiliator, shop_owner, sysadmin)
+    - **cursor**: Lấy từ `pagination.next_cursor` của response trước (cùng `search`).
+      Khi có cursor thì `page` bị bỏ qua. Có `search` thì kết quả xếp theo độ
+      liên quan và cursor chỉ là vị trí trong danh sách đó.
+    - **include_total**: `false` để bỏ qua COUNT(*) (total_items/total_pages = null)
     """
     # Kiểm tra quyền (chỉ sysadmin và shop_owner có thể xem danh sách users)
     if current_user.role not in ["sysadmin", "shop_owner"]:
@@ -38,13 +55,21 @@ def get_users(
             detail="Không đủ quyền để truy cập tính năng này"
         )
     
-    users, pagination_info = crud_user.get_users_paginated(
-        db=db, 
-        page=page, 
-        limit=limit, 
-        search=search, 
-        role=role
-    )
+    try:
+        users, pagination_info = crud_user.get_users_paginated(
+            db=db, 
+            page=page, 
+            limit=limit, 
+            search=search, 
+            role=role,
+            cursor=cursor,
+            include_total=include_total,
+        )
+    except InvalidCursorError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor không hợp lệ"
+        )
     
     return UserListResponse(
         data=users,
@@ -52,11 +77,82 @@ def get_users(
     )
 
 
+@router.post("/import", response_model=UserImportResult)
+async def import_users(
+    file: UploadFile = File(..., description="File CSV (có header) hoặc NDJSON"),
+    format: Optional[str] = Query(None, description="csv | ndjson (mặc định đoán theo tên file)"),
+    db: AsyncSession = Depends(deps.get_async_db),
+    current_user: Principal = Depends(deps.get_current_admin_principal)
+):
+    """
+    Import user hàng loạt (chỉ sysadmin).
+    
+    Cột/trường giống `POST /users`: full_name, email, password, phone_number,
+    cccd, role, is_active. Dòng lỗi (sai định dạng, trùng email/số điện
+    thoại/CCCD với DB hoặc dòng trước) được bỏ qua và trả về trong `errors`,
+    các dòng hợp lệ vẫn được tạo.
+    """
+    fmt = format or ("ndjson" if (file.filename or "").lower().endswith((".ndjson", ".jsonl")) else "csv")
+    if fmt not in user_bulk.IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Định dạng file không hợp lệ"
+        )
+    
+    try:
+        return await user_bulk.import_users(
+            db, file.file, fmt, chunk_size=settings.USER_IMPORT_CHUNK_SIZE
+        )
+    except user_bulk.ImportFileError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
+
+@router.get("/export")
+def export_users(
+    format: str = Query("csv", description="csv | ndjson"),
+    role: Optional[str] = Query(None, description="Lọc theo vai trò"),
+    current_user: Principal = Depends(deps.get_current_admin_principal)
+):
+    """Export toàn bộ user (chỉ sysadmin), stream từng batch, không có mật khẩu."""
+    if format not in user_bulk.IMPORT_FORMATS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Định dạng file không hợp lệ"
+        )
+    try:
+        user_bulk.parse_export_role(role)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Vai trò không hợp lệ"
+        )
+    
+    def content():
+        # Session riêng cho generator: session của dependency đã đóng khi
+        # response bắt đầu stream. Export chỉ đọc nên đi read replica.
+        replica = replica_router.choose()
+        db = SessionLocal(replica=replica.engine if replica else None)
+        try:
+            yield from user_bulk.iter_export_rows(db, format, role=role)
+        finally:
+            db.close()
+    
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        content(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
+
+
 @router.get("/{uid}", response_model=User)
 def get_user(
     uid: str,
-    db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_user)
+    db: Session = Depends(deps.get_read_db),
+    current_user: Principal = Depends(deps.get_current_active_principal)
 ):
     """Lấy thông tin chi tiết một user theo UID."""
     # Kiểm tra quyền
@@ -77,10 +173,10 @@ def get_user(
 
 
 @router.post("/", response_model=User, status_code=status.HTTP_201_CREATED)
-def create_user(
+async def create_user(
     user_in: UserCreate,
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_user)
+    current_user: Principal = Depends(deps.get_current_active_principal)
 ):
     """Tạo user mới."""
     # Kiểm tra quyền (chỉ sysadmin có thể tạo user)
@@ -90,41 +186,36 @@ def create_user(
             detail="Chỉ sysadmin mới có quyền tạo user"
         )
     
-    # Kiểm tra email đã tồn tại
-    if crud_user.check_email_exists(db=db, email=user_in.email):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email đã được sử dụng"
-        )
-    
-    # Kiểm tra số điện thoại (nếu có)
-    if user_in.phone_number and crud_user.check_phone_exists(db=db, phone=user_in.phone_number):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Số điện thoại đã được sử dụng"
+    # Kiểm tra email/số điện thoại/CCCD trùng lặp (một query) trước khi tốn
+    # bcrypt; unique constraint vẫn là chốt chặn cuối khi commit (request đồng thời)
+    try:
+        await run_in_threadpool(user_uniqueness.ensure_unique, db, {
+            "email": user_in.email,
+            "phone_number": user_in.phone_number,
+            "cccd": user_in.cccd,
+        })
+        hashed_password = await password_service.hash(user_in.password)
+        user = await run_in_threadpool(
+            crud_user.create_user, db, user_in=user_in, hashed_password=hashed_password
         )
-    
-    # Kiểm tra CCCD (nếu có)
-    if user_in.cccd and crud_user.check_cccd_exists(db=db, cccd=user_in.cccd):
+    except UniqueFieldError as e:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Số CCCD đã được sử dụng"
+            detail=e.detail
         )
-    
-    user = crud_user.create_user(db=db, user_in=user_in)
     return user
 
 
 @router.put("/{uid}", response_model=User)
-def update_user(
+async def update_user(
     uid: str,
     user_in: UserUpdate,
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_user)
+    current_user: Principal = Depends(deps.get_current_active_principal)
 ):
     """Cập nhật thông tin user."""
     # Tìm user cần cập nhật
-    user = crud_user.get_user_by_uid(db=db, uid=uid)
+    user = await run_in_threadpool(crud_user.get_user_by_uid, db=db, uid=uid)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -138,30 +229,6 @@ def update_user(
             detail="Không đủ quyền để cập nhật thông tin này"
         )
     
-    # Kiểm tra email trùng lặp (nếu có thay đổi)
-    if user_in.email and user_in.email != user.email:
-        if crud_user.check_email_exists(db=db, email=user_in.email, exclude_uid=uid):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Email đã được sử dụng"
-            )
-    
-    # Kiểm tra phone trùng lặp (nếu có thay đổi)
-    if user_in.phone_number and user_in.phone_number != user.phone_number:
-        if crud_user.check_phone_exists(db=db, phone=user_in.phone_number, exclude_uid=uid):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Số điện thoại đã được sử dụng"
-            )
-    
-    # Kiểm tra CCCD trùng lặp (nếu có thay đổi)
-    if user_in.cccd and user_in.cccd != user.cccd:
-        if crud_user.check_cccd_exists(db=db, cccd=user_in.cccd, exclude_uid=uid):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Số CCCD đã được sử dụng"
-            )
-    
     # Không cho phép user thường thay đổi role của mình
     if current_user.uid == uid and current_user.role != "sysadmin" and user_in.role:
         raise HTTPException(
@@ -169,7 +236,23 @@ def update_user(
             detail="Không thể thay đổi vai trò của chính mình"
         )
     
-    user = crud_user.update_user(db=db, user=user, user_in=user_in)
+    # Kiểm tra trùng lặp các trường unique có thay đổi (một query)
+    changed = {
+        field: value
+        for field, value in user_in.model_dump(include=set(UNIQUE_FIELDS), exclude_unset=True).items()
+        if value and value != getattr(user, field)
+    }
+    try:
+        await run_in_threadpool(user_uniqueness.ensure_unique, db, changed, exclude_uid=uid)
+        hashed_password = await password_service.hash(user_in.password) if user_in.password else None
+        user = await run_in_threadpool(
+            crud_user.update_user, db=db, user=user, user_in=user_in, hashed_password=hashed_password
+        )
+    except UniqueFieldError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.detail
+        )
     return user
 
 
@@ -177,7 +260,7 @@ def update_user(
 def delete_user(
     uid: str,
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_user)
+    current_user: Principal = Depends(deps.get_current_active_principal)
 ):
     """Xóa user."""
     # Tìm user cần xóa
@@ -211,7 +294,7 @@ def update_user_status(
     uid: str,
     status_in: UserStatusUpdate,
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_user)
+    current_user: Principal = Depends(deps.get_current_active_principal)
 ):
     """Kích hoạt/vô hiệu hóa user."""
     # Tìm user
@@ -241,15 +324,15 @@ def update_user_status(
 
 
 @router.patch("/{uid}/password", status_code=status.HTTP_204_NO_CONTENT)
-def change_user_password(
+async def change_user_password(
     uid: str,
     password_in: UserPasswordUpdate,
     db: Session = Depends(deps.get_db),
-    current_user: User = Depends(deps.get_current_active_user)
+    current_user: Principal = Depends(deps.get_current_active_principal)
 ):
     """Đổi mật khẩu user."""
     # Tìm user
-    user = crud_user.get_user_by_uid(db=db, uid=uid)
+    user = await run_in_threadpool(crud_user.get_user_by_uid, db=db, uid=uid)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -263,5 +346,9 @@ def change_user_password(
             detail="Không đủ quyền để thay đổi mật khẩu này"
         )
     
-    crud_user.change_user_password(db=db, user=user, new_password=password_in.password)
+    hashed_password = await password_service.hash(password_in.password)
+    await run_in_threadpool(
+        crud_user.change_user_password, db=db, user=user, new_password=password_in.password,
+        hashed_password=hashed_password,
+    )
     return None
\ No newline at end of file
@@ -1,14 +1,48 @@
 # app/api/v1/endpoints/upload.py
+import os
+import asyncio
 from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Form
 from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from typing import List, Optional
 
 from app.api import deps
+from app.core.config import settings
 from app.core.file_handler import file_handler
+from app.core.instrumentation import TimedRoute
 from app.models.user import User
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
+
+
+def _set_avatar(db: Session, user: User, avatar_url: Optional[str]) -> Optional[str]:
+    """Đổi avatar_url của user, trả về URL cũ."""
+    old_avatar_url = user.avatar_url
+    user.avatar_url = avatar_url
+    db.commit()
+    return old_avatar_url
+
+
+async def _replace_avatar(db: Session, user: User, filename: str) -> None:
+    """Đặt avatar mới (đã giữ một tham chiếu) và nhả tham chiếu của avatar cũ."""
+    old_avatar_url = await run_in_threadpool(
+        _set_avatar, db, user, file_handler.get_file_url(filename, "avatars")
+    )
+    
+    # Bỏ tham chiếu của avatar cũ, kể cả khi trùng file mới (upload lại
+    # cùng ảnh đã thêm một tham chiếu); file chỉ bị xóa khi không còn ai dùng
+    if old_avatar_url:
+        await file_handler.delete_file(os.path.basename(old_avatar_url), "avatars", db)
+
+
+async def _uploaded_file_data(filename: str, folder: str) -> dict:
+    return {
+        "filename": filename,
+        "url": file_handler.get_file_url(filename, folder),
+        "variants": await file_handler.get_image_variants(filename, folder),
+    }
+
 
 @router.post("/avatar")
 async def upload_avatar(
@@ -18,24 +52,14 @@ async def upload_avatar(
 ):
     """Upload avatar cho user"""
     try:
-        # Xóa avatar cũ nếu có
-        if current_user.avatar:
-            file_handler.delete_file(current_user.avatar, "avatars")
-        
-        # Lưu avatar mới
-        filename = await file_handler.save_image(file, "avatars", resize=True)
-        
-        # Cập nhật user record
-        current_user.avatar = filename
-        db.commit()
+        # Lưu avatar mới (avatar_url của user giữ tham chiếu tới file)
+        filename = await file_handler.save_image(file, "avatars", db, resize=True)
+        await _replace_avatar(db, current_user, filename)
         
         return {
             "success": True,
             "message": "Avatar uploaded successfully",
-            "data": {
-                "filename": filename,
-                "url": file_handler.get_file_url(filename, "avatars")
-            }
+            "data": await _uploaded_file_data(filename, "avatars")
         }
     except HTTPException:
         raise
@@ -46,50 +70,125 @@ async def upload_avatar(
 async def upload_product_images(
     files: List[UploadFile] = File(...),
     product_id: Optional[int] = Form(None),
-    current_user: User = Depends(deps.get_current_user)
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(deps.get_db)
 ):
-    """Upload nhiều ảnh sản phẩm"""
+    """
+    Upload nhiều ảnh sản phẩm.
+
+    Mỗi ảnh là một lượt upload của user (giữ FILE_UPLOAD_TTL_HOURS giờ):
+    trong thời gian đó user gắn được ảnh vào sản phẩm của mình bằng filename.
+    """
     if len(files) > 10:  # Giới hạn 10 ảnh
         raise HTTPException(400, "Too many files. Maximum 10 images allowed.")
     
-    uploaded_files = []
-    try:
-        for file in files:
-            filename = await file_handler.save_image(file, "products", resize=True)
-            uploaded_files.append({
-                "filename": filename,
-                "url": file_handler.get_file_url(filename, "products"),
-                "original_name": file.filename
-            })
-        
-        return {
-            "success": True,
-            "message": f"Uploaded {len(uploaded_files)} images successfully",
-            "data": uploaded_files
+    # Xử lý song song: resize chạy trong process pool của file_handler
+    results = await asyncio.gather(
+        *(
+            file_handler.save_image(file, "products", db, resize=True, owner_id=current_user.id)
+            for file in files
+        ),
+        return_exceptions=True,
+    )
+    
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        # Ảnh đã lưu thành công vẫn là lượt upload của user (hết hạn thì maintenance dọn)
+        error = errors[0]
+        if isinstance(error, HTTPException):
+            raise error
+        raise HTTPException(500, f"Upload failed: {str(error)}")
+    
+    uploaded_files = [
+        {
+            "filename": filename,
+            "url": file_handler.get_file_url(filename, "products"),
+            "variants": await file_handler.get_image_variants(filename, "products"),
+            "original_name": file.filename
         }
-    except HTTPException:
-        # Cleanup đã upload nếu có lỗi
-        for uploaded in uploaded_files:
-            file_handler.delete_file(uploaded["filename"], "products")
-        raise
-    except Exception as e:
-        # Cleanup
-        for uploaded in uploaded_files:
-            file_handler.delete_file(uploaded["filename"], "products")
-        raise HTTPException(500, f"Upload failed: {str(e)}")
+        for file, filename in zip(files, results)
+    ]
+    
+    return {
+        "success": True,
+        "message": f"Uploaded {len(uploaded_files)} images successfully",
+        "data": uploaded_files
+    }
+
+@router.post("/presign")
+async def presign_upload(
+    folder: str = Form(...),
+    content_type: str = Form(...),
+    size: int = Form(..., description="Kích thước file (bytes), phải khớp khi upload"),
+    current_user: User = Depends(deps.get_current_user)
+):
+    """
+    Tạo presigned URL để client upload ảnh trực tiếp lên storage (chỉ khi
+    STORAGE_BACKEND=s3). Client gửi PUT tới `url` kèm các `headers` trả về,
+    rồi gọi /presign/complete với `key` để ảnh được kiểm tra và xử lý.
+    """
+    if folder not in ["avatars", "products"]:
+        raise HTTPException(400, "Invalid folder")
+    
+    data = await file_handler.presign_image_upload(
+        folder, content_type, size, current_user.id, settings.S3_PRESIGN_EXPIRE_SECONDS
+    )
+    return {"success": True, "data": data}
+
+@router.post("/presign/complete")
+async def complete_presigned_upload(
+    key: str = Form(...),
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(deps.get_db)
+):
+    """
+    Hoàn tất upload presigned: ảnh được kiểm tra, xử lý và lưu như upload qua
+    /avatar hoặc /product-images (theo folder của `key`).
+    """
+    folder = key.split("/", 1)[0]
+    if folder not in ["avatars", "products"]:
+        raise HTTPException(400, "Invalid folder")
+    
+    if folder == "avatars":
+        filename = await file_handler.save_presigned_upload(key, folder, db, user_id=current_user.id)
+        await _replace_avatar(db, current_user, filename)
+    else:
+        filename = await file_handler.save_presigned_upload(
+            key, folder, db, user_id=current_user.id, owner_id=current_user.id
+        )
+    
+    return {
+        "success": True,
+        "message": "Upload completed successfully",
+        "data": await _uploaded_file_data(filename, folder)
+    }
 
 @router.delete("/file/{folder}/{filename}")
 async def delete_file(
     folder: str,
     filename: str,
-    current_user: User = Depends(deps.get_current_user)
+    current_user: User = Depends(deps.get_current_user),
+    db: Session = Depends(deps.get_db)
 ):
-    """Xóa file"""
+    """
+    Bỏ file của chính mình.
+
+    - products: bỏ lượt upload của user; ảnh đã gắn vào sản phẩm vẫn còn tới
+      khi sản phẩm bị xóa
+    - avatars: chỉ xóa được avatar hiện tại của user
+    """
     if folder not in ["avatars", "products"]:
         raise HTTPException(400, "Invalid folder")
     
-    success = file_handler.delete_file(filename, folder)
+    if folder == "products":
+        success = await file_handler.release_upload(filename, folder, db, owner_id=current_user.id)
+    else:
+        success = bool(current_user.avatar_url) and os.path.basename(current_user.avatar_url) == filename
+        if success:
+            await run_in_threadpool(_set_avatar, db, current_user, None)
+            await file_handler.delete_file(filename, folder, db)
+    
     if success:
         return {"success": True, "message": "File deleted successfully"}
     else:
-        raise HTTPException(404, "File not found")
\ No newline at end of file
+        raise HTTPException(404, "File not found")
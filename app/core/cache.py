@@ -0,0 +1,655 @@
+# app/core/cache.py
+
+import asyncio
+import functools
+import math
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Iterable, List, Optional, Protocol, Set, Tuple
+
+import anyio
+
+from app.core.config import settings
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Cache in-process kết hợp LRU + TTL, an toàn khi dùng từ nhiều thread.
+
+    Dependency sync của FastAPI chạy trong threadpool nên mọi thao tác đều
+    đi qua một lock. Mỗi entry lưu kèm thời điểm hết hạn; entry hết hạn bị
+    bỏ qua khi đọc và bị loại dần khi cache đầy.
+
+    `on_remove(key)` (nếu có) được gọi ngoài lock mỗi khi một key bị loại:
+    hết hạn, bị LRU đẩy ra hoặc bị `delete`.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 1024,
+        ttl: float = 60.0,
+        timer: Callable[[], float] = time.monotonic,
+        on_remove: Optional[Callable[[Hashable], None]] = None,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._on_remove = on_remove
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _removed(self, keys: Iterable[Hashable]) -> None:
+        if self._on_remove is not None:
+            for key in keys:
+                self._on_remove(key)
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = self._timer()
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += 1
+                return default
+            expires_at, value = item
+            if expires_at > now:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+            self.misses += 1
+        self._removed((key,))
+        return default
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        expires_at = self._timer() + (self.ttl if ttl is None else ttl)
+        evicted = []
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                evicted.append(self._data.popitem(last=False)[0])
+        self._removed(evicted)
+
+    def delete(self, key: Hashable) -> bool:
+        with self._lock:
+            removed = self._data.pop(key, _MISSING) is not _MISSING
+        if removed:
+            self._removed((key,))
+        return removed
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+# ---------------------------------------------------------------------------
+# Shared tier
+# ---------------------------------------------------------------------------
+
+class SharedCacheBackend(Protocol):
+    """
+    Tầng cache dùng chung giữa các worker/process.
+
+    Là tập con API của redis-py (`redis.Redis`) nên client Redis thật dùng
+    được qua `RedisSharedBackend`; `FakeRedis` thỏa mãn protocol này trong
+    process (dev, test). Value là bytes, TTL tính bằng giây.
+    """
+
+    def get(self, name: str) -> Optional[bytes]: ...
+
+    def set(self, name: str, value: bytes, ex: Optional[int] = None) -> Any: ...
+
+    def delete(self, *names: str) -> int: ...
+
+    def incr(self, name: str, amount: int = 1) -> int: ...
+
+    def sadd(self, name: str, *values: str) -> int: ...
+
+    def smembers(self, name: str) -> Set[bytes]: ...
+
+    def expire(self, name: str, time: int) -> Any: ...
+
+    def publish(self, channel: str, message: str) -> int: ...
+
+    def subscribe(self, channel: str, callback: Callable[[str], None]) -> None: ...
+
+
+class FakeRedis:
+    """
+    Cài đặt in-process của SharedCacheBackend theo ngữ nghĩa Redis
+    (bytes, TTL theo giây, set, pub/sub đồng bộ). Dùng cho dev và test.
+    """
+
+    def __init__(self, timer: Callable[[], float] = time.monotonic):
+        self._timer = timer
+        self._lock = threading.Lock()
+        self._data: Dict[str, Any] = {}
+        self._expires: Dict[str, float] = {}
+        self._subscribers: Dict[str, List[Callable[[str], None]]] = {}
+
+    def _alive(self, name: str) -> bool:
+        expires_at = self._expires.get(name)
+        if expires_at is not None and expires_at <= self._timer():
+            self._data.pop(name, None)
+            self._expires.pop(name, None)
+            return False
+        return name in self._data
+
+    @staticmethod
+    def _encode(value: Any) -> bytes:
+        return value if isinstance(value, bytes) else str(value).encode()
+
+    def get(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            if not self._alive(name):
+                return None
+            value = self._data[name]
+            if isinstance(value, set):
+                raise TypeError("WRONGTYPE Operation against a key holding the wrong kind of value")
+            return value
+
+    def set(self, name: str, value: bytes, ex: Optional[int] = None, nx: bool = False) -> Optional[bool]:
+        with self._lock:
+            if nx and self._alive(name):
+                return None
+            self._data[name] = self._encode(value)
+            if ex is not None:
+                self._expires[name] = self._timer() + ex
+            else:
+                self._expires.pop(name, None)
+            return True
+
+    def delete(self, *names: str) -> int:
+        removed = 0
+        with self._lock:
+            for name in names:
+                if self._alive(name):
+                    removed += 1
+                self._data.pop(name, None)
+                self._expires.pop(name, None)
+        return removed
+
+    def incr(self, name: str, amount: int = 1) -> int:
+        with self._lock:
+            value = int(self._data[name]) + amount if self._alive(name) else amount
+            self._data[name] = str(value).encode()
+            return value
+
+    def sadd(self, name: str, *values: str) -> int:
+        with self._lock:
+            members = self._data.get(name) if self._alive(name) else None
+            if members is None:
+                members = self._data[name] = set()
+            before = len(members)
+            members.update(self._encode(value) for value in values)
+            return len(members) - before
+
+    def smembers(self, name: str) -> Set[bytes]:
+        with self._lock:
+            if not self._alive(name):
+                return set()
+            return set(self._data[name])
+
+    def expire(self, name: str, time: int) -> bool:
+        with self._lock:
+            if not self._alive(name):
+                return False
+            self._expires[name] = self._timer() + time
+            return True
+
+    def publish(self, channel: str, message: str) -> int:
+        callbacks = list(self._subscribers.get(channel, ()))
+        for callback in callbacks:
+            callback(message)
+        return len(callbacks)
+
+    def subscribe(self, channel: str, callback: Callable[[str], None]) -> None:
+        self._subscribers.setdefault(channel, []).append(callback)
+
+    def flushall(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+
+
+class RedisSharedBackend:
+    """
+    Bọc client redis-py để thỏa mãn SharedCacheBackend: các lệnh đọc/ghi
+    chuyển thẳng cho client, `subscribe` chạy pub/sub trong thread nền.
+
+    redis-py chỉ giữ một handler cho mỗi channel, nên mỗi channel đăng ký
+    một handler duy nhất và handler đó gọi lần lượt mọi callback (nhiều
+    Cache cùng nghe kênh invalidation).
+    """
+
+    def __init__(self, client: Any):
+        self.client = client
+        self._pubsub = None
+        self._callbacks: Dict[str, List[Callable[[str], None]]] = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.client, name)
+
+    def _dispatch(self, channel: str, message: Dict[str, Any]) -> None:
+        data = message.get("data")
+        text = data.decode() if isinstance(data, bytes) else str(data)
+        with self._lock:
+            callbacks = list(self._callbacks.get(channel, ()))
+        for callback in callbacks:
+            callback(text)
+
+    def subscribe(self, channel: str, callback: Callable[[str], None]) -> None:
+        with self._lock:
+            callbacks = self._callbacks.get(channel)
+            if callbacks is not None:
+                callbacks.append(callback)
+                return
+            self._callbacks[channel] = [callback]
+            handler = functools.partial(self._dispatch, channel)
+            if self._pubsub is None:
+                self._pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                self._pubsub.subscribe(**{channel: handler})
+                self._pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+            else:
+                self._pubsub.subscribe(**{channel: handler})
+
+
+def create_shared_backend(url: str) -> Optional[SharedCacheBackend]:
+    """
+    Tạo shared tier từ CACHE_SHARED_URL: "" = không dùng, "memory://" =
+    FakeRedis trong process, "redis://..." = Redis (cần cài package redis).
+    """
+    if not url:
+        return None
+    if url == "memory://":
+        return FakeRedis()
+    try:
+        import redis
+    except ImportError as exc:
+        raise RuntimeError("CACHE_SHARED_URL dùng Redis nhưng chưa cài package `redis`") from exc
+    return RedisSharedBackend(redis.Redis.from_url(url))
+
+
+# ---------------------------------------------------------------------------
+# Cache (local LRU + shared tier)
+# ---------------------------------------------------------------------------
+
+_INVALIDATION_CHANNEL = "cache:invalidate"
+
+
+class Cache:
+    """
+    Cache hai tầng theo namespace.
+
+    - Tầng local: TTLCache (LRU + TTL) trong process, đọc không tốn I/O
+    - Tầng shared (tùy chọn): SharedCacheBackend, giá trị được pickle
+    - Tags: gắn key vào tag để xóa theo nhóm (`invalidate_tags`)
+    - Single-flight: `get_or_set`/`aget_or_set` chỉ cho một caller chạy loader
+      cho mỗi key trong process, các caller khác chờ và dùng chung kết quả
+    - Invalidation (delete/tag) xóa cả hai tầng và broadcast qua shared tier
+      để worker khác xóa tầng local của mình
+
+    Giá trị None được cache như mọi giá trị khác (negative caching), có thể
+    dùng TTL riêng qua `negative_ttl`.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        maxsize: int = 1024,
+        ttl: float = 60.0,
+        local_ttl: Optional[float] = None,
+        shared: Optional[SharedCacheBackend] = None,
+        serializer: Tuple[Callable[[Any], bytes], Callable[[bytes], Any]] = (pickle.dumps, pickle.loads),
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        self.namespace = namespace
+        self.ttl = ttl
+        # Tầng local có thể giữ ngắn hơn để giới hạn độ trễ khi mất broadcast
+        self.local_ttl = local_ttl
+        self._local = TTLCache(
+            maxsize=maxsize,
+            ttl=ttl if local_ttl is None else min(ttl, local_ttl),
+            timer=timer,
+            on_remove=self._forget_key,
+        )
+        self._shared = shared
+        self._dumps, self._loads = serializer
+        # tag -> key và key -> tag của tầng local; key bị loại khỏi tầng local
+        # (hết hạn, LRU, delete) được gỡ khỏi cả hai để không phình mãi
+        self._tags: Dict[str, Set[Hashable]] = {}
+        self._key_tags: Dict[Hashable, Set[str]] = {}
+        self._tags_lock = threading.Lock()
+        self._sync_flights: Dict[Hashable, threading.Lock] = {}
+        self._flights_lock = threading.Lock()
+        self._async_flights: Dict[Hashable, "asyncio.Future[Any]"] = {}
+        self.stats = {"local_hits": 0, "shared_hits": 0, "misses": 0, "loads": 0, "invalidations": 0}
+        if shared is not None:
+            shared.subscribe(_INVALIDATION_CHANNEL, self._on_invalidation)
+
+    # --- Keys ---
+
+    def _shared_key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key}"
+
+    def _tag_key(self, tag: str) -> str:
+        return f"tag:{self.namespace}:{tag}"
+
+    def _local_ttl(self, ttl: float) -> float:
+        return ttl if self.local_ttl is None else min(ttl, self.local_ttl)
+
+    # --- Basic API ---
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        value = self._local.get(key, _MISSING)
+        if value is not _MISSING:
+            self.stats["local_hits"] += 1
+            return value
+        if self._shared is not None:
+            raw = self._shared.get(self._shared_key(key))
+            if raw is not None:
+                value = self._loads(raw)
+                self.stats["shared_hits"] += 1
+                self._local.set(key, value)
+                return value
+        self.stats["misses"] += 1
+        return default
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: Optional[float] = None,
+        tags: Iterable[str] = (),
+    ) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        tags = list(tags)
+        if self._local.maxsize > 0:
+            with self._tags_lock:
+                self._untag(key)
+                if tags:
+                    self._key_tags[key] = set(tags)
+                    for tag in tags:
+                        self._tags.setdefault(tag, set()).add(key)
+        self._local.set(key, value, ttl=self._local_ttl(ttl))
+        if self._shared is not None:
+            shared_key = self._shared_key(key)
+            self._shared.set(shared_key, self._dumps(value), ex=max(1, math.ceil(ttl)))
+            for tag in tags:
+                tag_key = self._tag_key(tag)
+                self._shared.sadd(tag_key, shared_key)
+                self._shared.expire(tag_key, max(1, math.ceil(self.ttl)))
+
+    def delete(self, key: Hashable) -> None:
+        """Xóa key ở cả hai tầng và báo các worker khác."""
+        self.stats["invalidations"] += 1
+        self._local.delete(key)
+        if self._shared is not None:
+            self._shared.delete(self._shared_key(key))
+            self._shared.publish(_INVALIDATION_CHANNEL, f"{self.namespace}\x00k\x00{key}")
+
+    def invalidate_tags(self, *tags: str) -> None:
+        """Xóa mọi key gắn với các tag."""
+        self.stats["invalidations"] += 1
+        for tag in tags:
+            self._drop_local_tag(tag)
+            if self._shared is not None:
+                tag_key = self._tag_key(tag)
+                members = [m.decode() if isinstance(m, bytes) else m for m in self._shared.smembers(tag_key)]
+                self._shared.delete(tag_key, *members)
+                self._shared.publish(_INVALIDATION_CHANNEL, f"{self.namespace}\x00t\x00{tag}")
+
+    def clear(self) -> None:
+        """Xóa tầng local (tầng shared hết hạn theo TTL)."""
+        self._local.clear()
+        with self._tags_lock:
+            self._tags.clear()
+            self._key_tags.clear()
+
+    def _untag(self, key: Hashable) -> None:
+        # Gọi khi đang giữ _tags_lock
+        for tag in self._key_tags.pop(key, ()):
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def _forget_key(self, key: Hashable) -> None:
+        with self._tags_lock:
+            self._untag(key)
+
+    def _drop_local_tag(self, tag: str) -> None:
+        with self._tags_lock:
+            keys = self._tags.pop(tag, set())
+        for key in keys:
+            self._local.delete(key)
+
+    def _on_invalidation(self, message: str) -> None:
+        namespace, kind, value = message.split("\x00", 2)
+        if namespace != self.namespace:
+            return
+        if kind == "t":
+            self._drop_local_tag(value)
+        else:
+            # Broadcast gửi key dạng chuỗi: cache dùng shared tier nên dùng key str
+            self._local.delete(value)
+
+    # --- Single-flight ---
+
+    def _store_loaded(self, key: Hashable, value: Any, ttl: Optional[float], negative_ttl: Optional[float], tags: Iterable[str]) -> None:
+        if value is None and negative_ttl is not None:
+            ttl = negative_ttl
+        self.set(key, value, ttl=ttl, tags=tags)
+
+    def get_or_set(
+        self,
+        key: Hashable,
+        loader: Callable[[], Any],
+        ttl: Optional[float] = None,
+        negative_ttl: Optional[float] = None,
+        tags: Iterable[str] = (),
+    ) -> Any:
+        """Lấy từ cache, miss thì gọi `loader()` (một lần cho mỗi key) rồi cache."""
+        value = self.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+        with self._flights_lock:
+            lock = self._sync_flights.setdefault(key, threading.Lock())
+        with lock:
+            try:
+                # Caller khác có thể vừa load xong trong lúc chờ lock
+                value = self._local.get(key, _MISSING)
+                if value is not _MISSING:
+                    return value
+                self.stats["loads"] += 1
+                value = loader()
+                self._store_loaded(key, value, ttl, negative_ttl, tags)
+                return value
+            finally:
+                with self._flights_lock:
+                    if self._sync_flights.get(key) is lock:
+                        del self._sync_flights[key]
+
+    async def aget_or_set(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[float] = None,
+        negative_ttl: Optional[float] = None,
+        tags: Iterable[str] = (),
+    ) -> Any:
+        """Bản async của get_or_set; tầng shared (I/O blocking) chạy trong threadpool."""
+        value = self._local.get(key, _MISSING)
+        if value is not _MISSING:
+            self.stats["local_hits"] += 1
+            return value
+        flight = self._async_flights.get(key)
+        if flight is not None:
+            return await asyncio.shield(flight)
+
+        flight = asyncio.get_running_loop().create_future()
+        self._async_flights[key] = flight
+        try:
+            if self._shared is not None:
+                value = await anyio.to_thread.run_sync(self.get, key, _MISSING)
+            else:
+                self.stats["misses"] += 1
+                value = _MISSING
+            if value is _MISSING:
+                self.stats["loads"] += 1
+                value = await loader()
+                if self._shared is not None:
+                    await anyio.to_thread.run_sync(
+                        lambda: self._store_loaded(key, value, ttl, negative_ttl, tags)
+                    )
+                else:
+                    self._store_loaded(key, value, ttl, negative_ttl, tags)
+            flight.set_result(value)
+            return value
+        except BaseException as exc:
+            flight.set_exception(exc)
+            # Tránh cảnh báo "exception was never retrieved" khi không ai chờ
+            flight.exception()
+            raise
+        finally:
+            self._async_flights.pop(key, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "namespace": self.namespace,
+            "size": len(self._local),
+            "shared": self._shared is not None,
+            **self.stats,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Registry, decorator, dependency
+# ---------------------------------------------------------------------------
+
+_shared_backend: Optional[SharedCacheBackend] = None
+_shared_backend_ready = False
+_caches: Dict[str, Cache] = {}
+
+
+def get_shared_backend() -> Optional[SharedCacheBackend]:
+    global _shared_backend, _shared_backend_ready
+    if not _shared_backend_ready:
+        _shared_backend = create_shared_backend(settings.CACHE_SHARED_URL)
+        _shared_backend_ready = True
+    return _shared_backend
+
+
+def create_cache(
+    namespace: str,
+    maxsize: int = 1024,
+    ttl: float = 60.0,
+    local_ttl: Optional[float] = None,
+    shared: bool = True,
+) -> Cache:
+    """
+    Tạo (hoặc lấy lại) cache theo namespace, gắn với shared tier cấu hình
+    trong CACHE_SHARED_URL nếu `shared`. Mọi cache của app nên tạo qua đây
+    để được liệt kê trong `cache_stats()`.
+    """
+    cache = _caches.get(namespace)
+    if cache is None:
+        cache = Cache(
+            namespace,
+            maxsize=maxsize,
+            ttl=ttl,
+            local_ttl=local_ttl if local_ttl is not None else settings.CACHE_LOCAL_TTL_SECONDS or None,
+            shared=get_shared_backend() if shared else None,
+        )
+        _caches[namespace] = cache
+    return cache
+
+
+def cache_stats() -> List[Dict[str, Any]]:
+    return [cache.snapshot() for cache in _caches.values()]
+
+
+def cached(
+    cache: Cache,
+    key: Optional[Callable[..., Hashable]] = None,
+    ttl: Optional[float] = None,
+    negative_ttl: Optional[float] = None,
+    tags: Optional[Callable[..., Iterable[str]]] = None,
+):
+    """
+    Decorator cache kết quả hàm (sync hoặc async) qua get_or_set/aget_or_set.
+
+        @cached(listing_cache, key=lambda shop_id, page: f"{shop_id}:{page}",
+                tags=lambda shop_id, page: [f"shop:{shop_id}"])
+        async def list_products(shop_id: int, page: int): ...
+
+    Không truyền `key` thì key là tên hàm + repr tham số.
+    """
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        def build_key(*args: Any, **kwargs: Any) -> Hashable:
+            if key is not None:
+                return key(*args, **kwargs)
+            return f"{func.__module__}.{func.__qualname__}:{args!r}:{sorted(kwargs.items())!r}"
+
+        def build_tags(*args: Any, **kwargs: Any) -> Iterable[str]:
+            return tags(*args, **kwargs) if tags is not None else ()
+
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                return await cache.aget_or_set(
+                    build_key(*args, **kwargs),
+                    lambda: func(*args, **kwargs),
+                    ttl=ttl,
+                    negative_ttl=negative_ttl,
+                    tags=build_tags(*args, **kwargs),
+                )
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            return cache.get_or_set(
+                build_key(*args, **kwargs),
+                lambda: func(*args, **kwargs),
+                ttl=ttl,
+                negative_ttl=negative_ttl,
+                tags=build_tags(*args, **kwargs),
+            )
+        return wrapper
+
+    return decorator
+
+
+def cache_dependency(namespace: str, **options: Any) -> Callable[[], Cache]:
+    """
+    Dependency trả về Cache theo namespace, cho endpoint tự quyết định key:
+
+        listing_cache = cache_dependency("listings", ttl=30)
+
+        @router.get("/")
+        async def list_items(cache: Cache = Depends(listing_cache)): ...
+    """
+    cache = create_cache(namespace, **options)
+
+    def dependency() -> Cache:
+        return cache
+
+    return dependency
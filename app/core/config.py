@@ -1,6 +1,6 @@
 # app/core/config.py - Version đơn giản để tránh lỗi
 import os
-from typing import List
+from typing import Dict, List, Optional
 
 # Tải biến môi trường từ file .env (cần cài python-dotenv)
 from dotenv import load_dotenv
@@ -26,8 +26,149 @@ class Settings:
     REFRESH_TOKEN_EXPIRE_DAYS: int = int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7"))
     ALGORITHM: str = "HS256"
     
+    # Key ký access token theo kid: "kid1:secret1,kid2:secret2". Để trống thì
+    # ký bằng SECRET_KEY (không có kid). Token không có kid luôn được kiểm tra
+    # bằng SECRET_KEY để token cũ vẫn dùng được khi chuyển sang JWT_KEYS.
+    @property
+    def JWT_KEYS(self) -> Dict[str, str]:
+        keys = {}
+        for item in os.getenv("JWT_KEYS", "").split(","):
+            kid, _, secret = item.strip().partition(":")
+            if kid and secret:
+                keys[kid.strip()] = secret.strip()
+        return keys
+    
+    # Key dùng để ký token mới (mặc định là key đầu tiên trong JWT_KEYS)
+    @property
+    def JWT_ACTIVE_KID(self) -> Optional[str]:
+        return os.getenv("JWT_ACTIVE_KID") or next(iter(self.JWT_KEYS), None)
+    
+    # "jose" (python-jose), "pyjwt" (cần cài pyjwt) hoặc "auto"
+    JWT_BACKEND: str = os.getenv("JWT_BACKEND", "jose")
+    # Số token đã xác thực được cache (theo hash của token, tới lúc hết hạn)
+    TOKEN_CACHE_MAX_SIZE: int = int(os.getenv("TOKEN_CACHE_MAX_SIZE", "10000"))
+    
+    # Password hashing (bcrypt chạy trong worker pool riêng)
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+    PASSWORD_HASH_MAX_PENDING: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
+    # Chính sách hash: "bcrypt" hoặc "argon2" (cần cài argon2-cffi). Đổi scheme/cost thì hash
+    # cũ vẫn đăng nhập được và được hash lại theo chính sách mới ở lần đăng nhập đúng kế tiếp.
+    # Chọn cost bằng: python -m benchmarks.password_hash --target-ms 250
+    PASSWORD_HASH_SCHEME: str = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")
+    PASSWORD_BCRYPT_ROUNDS: int = int(os.getenv("PASSWORD_BCRYPT_ROUNDS", "12"))
+    PASSWORD_ARGON2_TIME_COST: int = int(os.getenv("PASSWORD_ARGON2_TIME_COST", "3"))
+    PASSWORD_ARGON2_MEMORY_COST: int = int(os.getenv("PASSWORD_ARGON2_MEMORY_COST", "65536"))  # KiB
+    PASSWORD_ARGON2_PARALLELISM: int = int(os.getenv("PASSWORD_ARGON2_PARALLELISM", "4"))
+
+    # Giới hạn đăng nhập sai (app/core/rate_limit.py): đếm theo IP và theo tài khoản
+    # trong cửa sổ trượt; dùng shared tier của cache (CACHE_SHARED_URL) nếu có
+    LOGIN_RATE_LIMIT_ENABLED: bool = os.getenv("LOGIN_RATE_LIMIT_ENABLED", "true").lower() == "true"
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: int = int(os.getenv("LOGIN_RATE_LIMIT_WINDOW_SECONDS", "300"))
+    LOGIN_RATE_LIMIT_PER_IP: int = int(os.getenv("LOGIN_RATE_LIMIT_PER_IP", "30"))
+    LOGIN_RATE_LIMIT_PER_ACCOUNT: int = int(os.getenv("LOGIN_RATE_LIMIT_PER_ACCOUNT", "5"))
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+
+    # Cache (app/core/cache.py): tầng shared dùng chung giữa các worker.
+    # "" = chỉ cache local trong process, "memory://" = FakeRedis (dev/test), "redis://..." = Redis
+    CACHE_SHARED_URL: str = os.getenv("CACHE_SHARED_URL", "")
+    # Giới hạn TTL tầng local khi có shared tier (0 = theo TTL của cache)
+    CACHE_LOCAL_TTL_SECONDS: float = float(os.getenv("CACHE_LOCAL_TTL_SECONDS", "0"))
+    
+    # Cache principal (uid, id, role, is_active) cho get_current_user
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    PRINCIPAL_CACHE_MAX_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_MAX_SIZE", "10000"))
+    # Không có shared tier: worker khác thấy phiên vừa bị thu hồi trễ tối đa chừng này giây
+    REVOKED_SESSIONS_LOCAL_TTL_SECONDS: float = float(os.getenv("REVOKED_SESSIONS_LOCAL_TTL_SECONDS", "5"))
+    
+    # Xử lý ảnh upload (process pool)
+    IMAGE_PROCESS_WORKERS: int = int(os.getenv("IMAGE_PROCESS_WORKERS", str(min(2, os.cpu_count() or 1))))
+    IMAGE_PROCESS_MAX_CONCURRENCY: int = int(os.getenv("IMAGE_PROCESS_MAX_CONCURRENCY", "8"))
+    IMAGE_PROCESS_TIMEOUT_SECONDS: float = float(os.getenv("IMAGE_PROCESS_TIMEOUT_SECONDS", "30"))
+    UPLOAD_CHUNK_SIZE: int = int(os.getenv("UPLOAD_CHUNK_SIZE", str(64 * 1024)))
+    # Kích thước tối đa của một ảnh upload (cả upload qua API lẫn presigned)
+    UPLOAD_MAX_FILE_SIZE: int = int(os.getenv("UPLOAD_MAX_FILE_SIZE", str(5 * 1024 * 1024)))
+    # Thư mục lưu file upload (STORAGE_BACKEND=local) và file tạm khi xử lý ảnh
+    UPLOAD_DIR: str = os.getenv("UPLOAD_DIR", "app/static/uploads")
+    # Lượt upload được giữ N giờ: trong thời gian này user gắn được ảnh vào sản phẩm,
+    # sau đó maintenance nhả tham chiếu (ảnh không ai dùng thì bị xóa)
+    FILE_UPLOAD_TTL_HOURS: float = float(os.getenv("FILE_UPLOAD_TTL_HOURS", "24"))
+    
+    # Phục vụ file upload (/static/uploads)
+    # Cache cho file không content-addressed (file content-addressed luôn immutable 1 năm)
+    UPLOADS_CACHE_MAX_AGE: int = int(os.getenv("UPLOADS_CACHE_MAX_AGE", "3600"))
+    # Ví dụ "/_uploads": trả X-Accel-Redirect để nginx gửi file (để trống = app tự gửi)
+    UPLOADS_ACCEL_REDIRECT_PREFIX: str = os.getenv("UPLOADS_ACCEL_REDIRECT_PREFIX", "")
+
+    # Storage cho file upload: "local" (disk) hoặc "s3" (S3-compatible: AWS, MinIO, R2...)
+    STORAGE_BACKEND: str = os.getenv("STORAGE_BACKEND", "local")
+    S3_ENDPOINT_URL: str = os.getenv("S3_ENDPOINT_URL", "")
+    S3_BUCKET: str = os.getenv("S3_BUCKET", "")
+    S3_ACCESS_KEY: str = os.getenv("S3_ACCESS_KEY", "")
+    S3_SECRET_KEY: str = os.getenv("S3_SECRET_KEY", "")
+    S3_REGION: str = os.getenv("S3_REGION", "us-east-1")
+    # URL public (CDN) để trả cho client; để trống thì dùng <endpoint>/<bucket>
+    S3_PUBLIC_URL: str = os.getenv("S3_PUBLIC_URL", "")
+    # File lớn hơn ngưỡng này upload multipart (part tối thiểu 5MB theo S3); mặc
+    # định bằng UPLOAD_MAX_FILE_SIZE nên ảnh và biến thể đi một PUT duy nhất
+    S3_MULTIPART_THRESHOLD: int = int(os.getenv("S3_MULTIPART_THRESHOLD", str(UPLOAD_MAX_FILE_SIZE)))
+    S3_MAX_CONNECTIONS: int = int(os.getenv("S3_MAX_CONNECTIONS", "20"))
+    S3_PRESIGN_EXPIRE_SECONDS: int = int(os.getenv("S3_PRESIGN_EXPIRE_SECONDS", "900"))
+    
+    # Multi-tenant: shop được xác định từ subdomain của Host (<subdomain>.<base domain>)
+    @property
+    def TENANT_BASE_DOMAINS(self) -> List[str]:
+        domains = os.getenv("TENANT_BASE_DOMAINS", "dropshop.vn,localhost")
+        return [domain.strip() for domain in domains.split(",") if domain.strip()]
+    
+    TENANT_CACHE_TTL_SECONDS: float = float(os.getenv("TENANT_CACHE_TTL_SECONDS", "300"))
+    # Subdomain không tồn tại cũng được cache, TTL ngắn hơn
+    TENANT_NEGATIVE_CACHE_TTL_SECONDS: float = float(os.getenv("TENANT_NEGATIVE_CACHE_TTL_SECONDS", "30"))
+    TENANT_CACHE_MAX_SIZE: int = int(os.getenv("TENANT_CACHE_MAX_SIZE", "10000"))
+    
+    # Import user hàng loạt: số dòng mỗi lần validate/kiểm tra trùng/insert/commit
+    USER_IMPORT_CHUNK_SIZE: int = int(os.getenv("USER_IMPORT_CHUNK_SIZE", "500"))
+    
+    # Đặt hàng: Idempotency-Key được giữ N giờ (client retry trong thời gian này nhận lại đơn cũ)
+    IDEMPOTENCY_KEY_TTL_HOURS: float = float(os.getenv("IDEMPOTENCY_KEY_TTL_HOURS", "24"))
+    # Chu kỳ chạy các job dọn dẹp DB (app/core/maintenance.py), 0 = tắt
+    MAINTENANCE_INTERVAL_SECONDS: float = float(os.getenv("MAINTENANCE_INTERVAL_SECONDS", "3600"))
+    
+    # Instrumentation (app/core/instrumentation.py)
+    # Request chậm hơn N ms / nhiều hơn N query bị log WARNING (0 = tắt)
+    REQUEST_SLOW_MS: float = float(os.getenv("REQUEST_SLOW_MS", "500"))
+    REQUEST_MAX_QUERIES: int = int(os.getenv("REQUEST_MAX_QUERIES", "20"))
+    REQUEST_LOG_LEVEL: str = os.getenv("REQUEST_LOG_LEVEL", "INFO")
+    # Header Server-Timing lộ thời gian xử lý cho client; tắt nếu không muốn
+    SERVER_TIMING_ENABLED: bool = os.getenv("SERVER_TIMING_ENABLED", "true").lower() == "true"
+    
     # Database
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./dropshop.db")
+    # Để trống thì suy ra từ DATABASE_URL (postgresql -> asyncpg, sqlite -> aiosqlite)
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")
+    
+    # Connection pool (áp dụng cho cả engine sync và async)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+    # Đóng connection cũ hơn N giây (tránh bị DB/firewall cắt ngầm)
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    # Ping trước mỗi lần checkout (thêm 1 round-trip); tắt thì dựa vào DB_POOL_RECYCLE
+    DB_POOL_PRE_PING: bool = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+    # Chạy sau PgBouncer (transaction pooling): NullPool + tắt statement cache
+    DB_PGBOUNCER: bool = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+    # Checkout chờ lâu hơn ngưỡng này được đếm vào slow_checkouts
+    DB_POOL_SLOW_CHECKOUT_MS: float = float(os.getenv("DB_POOL_SLOW_CHECKOUT_MS", "100"))
+    
+    # Read replica (để trống = mọi query đi về DATABASE_URL)
+    @property
+    def DATABASE_REPLICA_URLS(self) -> List[str]:
+        urls = os.getenv("DATABASE_REPLICA_URLS", "")
+        return [url.strip() for url in urls.split(",") if url.strip()]
+    
+    # Replica lỗi kết nối bị bỏ qua trong N giây rồi mới thử lại
+    DB_REPLICA_COOLDOWN_SECONDS: float = float(os.getenv("DB_REPLICA_COOLDOWN_SECONDS", "10"))
+    # Sau khi ghi, principal đọc từ primary trong N giây (read-your-writes)
+    DB_READ_YOUR_WRITES_SECONDS: float = float(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
     
     # CORS
     @property
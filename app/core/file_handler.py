@@ -1,85 +1,668 @@
 # app/core/file_handler.py
 import os
 import uuid
+import json
+import hashlib
+import shutil
+import asyncio
+import contextlib
+import multiprocessing
+import weakref
 import aiofiles
-from typing import Optional, Tuple
-from fastapi import UploadFile, HTTPException
-from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+from fastapi import UploadFile, HTTPException, status
+from PIL import Image, UnidentifiedImageError
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 import io
 
+from app.core.config import settings
+from app.core.storage import StorageBackend, StorageError, create_storage_backend
+from app.crud import crud_file
+
+
+# Magic bytes -> (content type, extension)
+_IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", "image/jpeg", "jpg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png", "png"),
+    (b"GIF87a", "image/gif", "gif"),
+    (b"GIF89a", "image/gif", "gif"),
+)
+
+
+def sniff_image_type(header: bytes) -> Optional[Tuple[str, str]]:
+    """Nhận diện loại ảnh từ các byte đầu file, trả về (content_type, ext)."""
+    for signature, content_type, ext in _IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return content_type, ext
+    if header[:4] == b"RIFF" and header[8:12] == b"WEBP":
+        return "image/webp", "webp"
+    return None
+
+
+def _resize_image(image: Image.Image, max_width: int, max_height: int, output: Any) -> None:
+    # Giữ aspect ratio
+    image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+    
+    # Convert về RGB nếu cần
+    if image.mode in ("RGBA", "P"):
+        image = image.convert("RGB")
+    
+    image.save(output, format="JPEG", quality=85, optimize=True)
+
+
+def _resize_image_bytes(image_data: bytes, max_width: int, max_height: int) -> bytes:
+    """
+    Decode + resize + encode JPEG. Chạy trong worker process nên phải là
+    hàm top-level (pickle được) và không phụ thuộc state của FileHandler.
+    """
+    output = io.BytesIO()
+    _resize_image(Image.open(io.BytesIO(image_data)), max_width, max_height, output)
+    return output.getvalue()
+
+
+# Kích thước ảnh chính (JPEG) theo folder, giữ như trước để tương thích
+PRIMARY_IMAGE_SIZES: Dict[str, Tuple[int, int]] = {
+    "avatars": (200, 200),
+    "products": (800, 600),
+}
+
+# Các biến thể responsive theo folder: tên -> (max_width, max_height)
+DEFAULT_IMAGE_VARIANTS: Dict[str, Dict[str, Tuple[int, int]]] = {
+    "avatars": {
+        "thumb": (64, 64),
+        "card": (200, 200),
+    },
+    "products": {
+        "thumb": (160, 160),
+        "card": (400, 400),
+        "detail": (800, 800),
+        "zoom": (1600, 1600),
+    },
+}
+
+_VARIANT_FORMAT_OPTIONS: Dict[str, Dict[str, Any]] = {
+    "webp": {"format": "WEBP", "quality": 80, "method": 4},
+    "avif": {"format": "AVIF", "quality": 60},
+}
+
+VARIANT_CONTENT_TYPES = {"webp": "image/webp", "avif": "image/avif"}
+
+
+def detect_variant_formats() -> List[str]:
+    """WebP luôn có; AVIF chỉ khi Pillow build/plugin hỗ trợ encode AVIF."""
+    Image.init()
+    formats = ["webp"]
+    if "AVIF" in Image.SAVE:
+        formats.append("avif")
+    return formats
+
+
+def _build_image_variants(
+    source_path: str,
+    output_dir: str,
+    primary_size: Tuple[int, int],
+    variants: Dict[str, Tuple[int, int]],
+    formats: List[str],
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    Decode ảnh gốc MỘT lần rồi sinh ảnh chính JPEG + tất cả biến thể.
+
+    Tên file (stem) là sha256 của ảnh chính đã chuẩn hóa: các upload khác
+    bytes (metadata, nén lại...) nhưng cho ra cùng ảnh dùng chung file.
+    Biến thể được resize lần lượt từ lớn đến nhỏ, mỗi bước resize tiếp từ
+    kết quả bước trước nên chi phí giảm dần. Chạy trong worker process.
+    
+    Returns:
+        (stem, manifest mô tả các file đã sinh — tên file tương đối trong output_dir)
+    """
+    with Image.open(source_path) as source:
+        source.load()
+        image = source.convert("RGBA" if source.mode in ("RGBA", "LA", "P") else "RGB")
+    
+    manifest: Dict[str, Any] = {
+        "original": {"width": image.width, "height": image.height},
+        "variants": {},
+    }
+    
+    primary = io.BytesIO()
+    _resize_image(image.copy(), *primary_size, primary)
+    data = primary.getvalue()
+    stem = hashlib.sha256(data).hexdigest()
+    with open(os.path.join(output_dir, f"{stem}.jpg"), "wb") as out:
+        out.write(data)
+    
+    current = image
+    ordered = sorted(variants.items(), key=lambda item: item[1][0] * item[1][1], reverse=True)
+    for name, size in ordered:
+        current = current.copy()
+        current.thumbnail(size, Image.Resampling.LANCZOS)
+        files = {}
+        for fmt in formats:
+            filename = f"{stem}_{name}.{fmt}"
+            options = dict(_VARIANT_FORMAT_OPTIONS[fmt])
+            current.save(os.path.join(output_dir, filename), **options)
+            files[fmt] = filename
+        manifest["variants"][name] = {
+            "width": current.width,
+            "height": current.height,
+            "files": files,
+        }
+    return stem, manifest
+
+
 class FileHandler:
-    def __init__(self, base_path: str = "app/static/uploads"):
+    def __init__(
+        self,
+        base_path: str = "app/static/uploads",
+        max_workers: int = settings.IMAGE_PROCESS_WORKERS,
+        max_concurrency: int = settings.IMAGE_PROCESS_MAX_CONCURRENCY,
+        job_timeout: float = settings.IMAGE_PROCESS_TIMEOUT_SECONDS,
+        image_variants: Optional[Dict[str, Dict[str, Tuple[int, int]]]] = None,
+        variant_formats: Optional[List[str]] = None,
+        storage: Optional[StorageBackend] = None,
+    ):
         self.base_path = base_path
-        self.max_file_size = 5 * 1024 * 1024  # 5MB
+        # Nơi lưu file đã xử lý (disk local hoặc S3); temp/ luôn nằm trên disk local
+        self.storage = storage if storage is not None else create_storage_backend(base_path)
+        self.max_file_size = settings.UPLOAD_MAX_FILE_SIZE
+        self.chunk_size = settings.UPLOAD_CHUNK_SIZE
         self.allowed_image_types = {"image/jpeg", "image/png", "image/webp", "image/gif"}
         
+        # Xử lý ảnh (decode/resize/encode) tốn CPU nên chạy trong process pool,
+        # giới hạn số job đồng thời và timeout cho mỗi job
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self.job_timeout = job_timeout
+        
+        # Pipeline biến thể responsive (thumb/card/detail/zoom) ở định dạng hiện đại
+        self.image_variants = image_variants if image_variants is not None else DEFAULT_IMAGE_VARIANTS
+        self.variant_formats = variant_formats if variant_formats is not None else detect_variant_formats()
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        # Upload trùng bytes đang xử lý dở: (folder, sha256 bytes gốc) -> filename (None nếu lỗi)
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        # (folder, filename) -> [lock, số người đang giữ/chờ] (xem `_file_lock`)
+        self._file_locks: Dict[Tuple[str, str], List[Any]] = {}
+        # Lời gọi crud trên cùng một Session phải lần lượt (xem `_db_call`)
+        self._db_locks: "weakref.WeakKeyDictionary[Session, asyncio.Lock]" = weakref.WeakKeyDictionary()
+        
         # Tạo thư mục nếu chưa có
         os.makedirs(f"{base_path}/avatars", exist_ok=True)
         os.makedirs(f"{base_path}/products", exist_ok=True)
         os.makedirs(f"{base_path}/temp", exist_ok=True)
     
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # "spawn" để worker không kế thừa lock/thread của process chính
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+    
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+    
+    async def _run_in_pool(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Chạy job xử lý ảnh trong process pool, có giới hạn đồng thời + timeout.
+
+        Timeout chỉ bỏ chờ phía request: job trong worker process vẫn chạy
+        tiếp, nên slot của semaphore chỉ được trả khi job thật sự kết thúc
+        (không thì timeout liên tục sẽ đẩy vượt max_concurrency job vào pool).
+        """
+        semaphore = self._get_semaphore()
+        await semaphore.acquire()
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self.executor, func, *args)
+        except BaseException:
+            semaphore.release()
+            raise
+
+        def _on_done(done: asyncio.Future) -> None:
+            semaphore.release()
+            # Job đã bị bỏ chờ (timeout) mà lỗi: lấy exception để không bị log "never retrieved"
+            if not done.cancelled():
+                done.exception()
+
+        future.add_done_callback(_on_done)
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), timeout=self.job_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPException(
+                status.HTTP_503_SERVICE_UNAVAILABLE,
+                "Image processing timed out"
+            )
+        except (UnidentifiedImageError, Image.DecompressionBombError):
+            raise HTTPException(400, "Invalid image file")
+    
+    async def _db_call(self, db: Session, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Chạy hàm crud (sync, có commit) trong threadpool để không chặn event
+        loop. Các lời gọi trên cùng một Session được xếp hàng: nhiều upload
+        song song trong một request (asyncio.gather) dùng chung Session, mà
+        Session không dùng được từ nhiều thread cùng lúc.
+        """
+        lock = self._db_locks.get(db)
+        if lock is None:
+            lock = self._db_locks[db] = asyncio.Lock()
+        async with lock:
+            return await run_in_threadpool(func, db, *args)
+    
+    @contextlib.asynccontextmanager
+    async def _file_lock(self, folder: str, filename: str) -> AsyncIterator[None]:
+        """
+        Tuần tự hóa "kiểm tra file còn trên storage + thêm tham chiếu" (upload)
+        với "kiểm tra lại stored_files + xóa file vật lý" (`_unlink_image`)
+        cho cùng một file trong process, để upload trùng ảnh không ghi nhận
+        tham chiếu tới file đang bị xóa.
+        """
+        key = (folder, filename)
+        entry = self._file_locks.get(key)
+        if entry is None:
+            entry = self._file_locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                self._file_locks.pop(key, None)
+    
+    async def shutdown(self) -> None:
+        """Dừng process pool và đóng kết nối storage (gọi khi app tắt)."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        await self.storage.aclose()
+    
     def validate_image(self, file: UploadFile) -> None:
-        """Validate file type và size"""
+        """
+        Kiểm tra nhanh dựa trên thông tin client gửi (content_type, size).
+        Chỉ để từ chối sớm; kiểm tra thật nằm ở `_spool_upload`.
+        """
         if file.content_type not in self.allowed_image_types:
             raise HTTPException(400, "File type not supported")
         
         if file.size and file.size > self.max_file_size:
             raise HTTPException(400, f"File too large. Max size: {self.max_file_size // (1024*1024)}MB")
     
+    async def _spool_upload(self, read: Callable[[int], Awaitable[bytes]]) -> Tuple[str, str, str, int]:
+        """
+        Đọc upload theo từng chunk (`read(size)`, vd: UploadFile.read) và ghi ra thư mục temp/.
+        
+        - Nhận diện loại ảnh bằng magic bytes của chunk đầu tiên
+        - Dừng ngay khi vượt quá max_file_size
+        - Tính sha256 của nội dung trong lúc đọc
+        
+        Returns:
+            (đường dẫn file tạm, extension thật của ảnh, sha256 hex, số bytes)
+        """
+        temp_path = f"{self.base_path}/temp/{uuid.uuid4().hex}.upload"
+        detected = None
+        total = 0
+        digest = hashlib.sha256()
+        try:
+            async with aiofiles.open(temp_path, "wb") as out:
+                while True:
+                    chunk = await read(self.chunk_size)
+                    if not chunk:
+                        break
+                    if detected is None:
+                        detected = sniff_image_type(chunk)
+                        if detected is None or detected[0] not in self.allowed_image_types:
+                            raise HTTPException(400, "File type not supported")
+                    total += len(chunk)
+                    if total > self.max_file_size:
+                        raise HTTPException(400, f"File too large. Max size: {self.max_file_size // (1024*1024)}MB")
+                    digest.update(chunk)
+                    await out.write(chunk)
+            if detected is None:
+                raise HTTPException(400, "Empty file")
+        except BaseException:
+            self._remove_quietly(temp_path)
+            raise
+        return temp_path, detected[1], digest.hexdigest(), total
+    
+    @staticmethod
+    def _remove_quietly(path: str) -> None:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+    
     async def resize_image(self, image_data: bytes, max_width: int = 1366, max_height: int = 1080) -> bytes:
-        """Resize ảnh để tối ưu storage"""
-        image = Image.open(io.BytesIO(image_data))
+        """Resize ảnh để tối ưu storage (chạy trong process pool, không block event loop)"""
+        return await self._run_in_pool(_resize_image_bytes, image_data, max_width, max_height)
+    
+    async def save_image(
+        self,
+        file: UploadFile,
+        folder: str,
+        db: Session,
+        resize: bool = True,
+        owner_id: Optional[int] = None,
+    ) -> str:
+        """
+        Lưu ảnh, thêm một tham chiếu tới file và return filename.
         
-        # Giữ aspect ratio
-        image.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+        File được đặt tên theo sha256 của ảnh đã chuẩn hóa (content-addressed):
+        upload cho ra cùng ảnh dùng chung một file và một URL (cache tốt cho
+        CDN/browser). Upload trùng bytes gốc với file đã có thì khỏi xử lý lại.
         
-        # Convert về RGB nếu cần
-        if image.mode in ("RGBA", "P"):
-            image = image.convert("RGB")
+        Tham chiếu thêm vào thuộc về `owner_id` (lượt upload của user, xem
+        crud_file.add_reference) nếu có, không thì caller tự giữ và nhả bằng
+        `delete_file` (vd: avatar).
         
-        # Save về bytes
-        output = io.BytesIO()
-        image.save(output, format="JPEG", quality=85, optimize=True)
-        return output.getvalue()
-    
-    async def save_image(self, file: UploadFile, folder: str, resize: bool = True) -> str:
-        """Lưu ảnh và return filename"""
+        Khi resize=True: sinh ảnh chính JPEG (tương thích cũ) cùng các biến thể
+        WebP/AVIF theo `image_variants[folder]`, ghi manifest `<stem>.json`.
+        """
         self.validate_image(file)
         
-        # Tạo unique filename
-        file_ext = file.filename.split(".")[-1] if "." in file.filename else "jpg"
-        filename = f"{uuid.uuid4()}.{file_ext}"
-        file_path = f"{self.base_path}/{folder}/{filename}"
-        
-        # Đọc file content
-        content = await file.read()
+        # Stream upload ra temp/ (không buffer toàn bộ file trong RAM)
+        temp_path, file_ext, content_hash, size = await self._spool_upload(file.read)
+        return await self._save_spooled(temp_path, file_ext, content_hash, size, folder, db, resize, owner_id)
+    
+    async def _save_spooled(
+        self,
+        temp_path: str,
+        file_ext: str,
+        content_hash: str,
+        size: int,
+        folder: str,
+        db: Session,
+        resize: bool,
+        owner_id: Optional[int],
+    ) -> str:
+        async def add_reference(filename: str) -> None:
+            await self._db_call(db, crud_file.add_reference, folder, filename, content_hash, size, owner_id)
         
-        # Resize nếu cần
-        if resize and file.content_type.startswith("image/"):
-            if folder == "avatars":
-                content = await self.resize_image(content, 200, 200)  # Avatar nhỏ
-            else:
-                content = await self.resize_image(content, 800, 600)  # Product image
+        try:
+            if resize:
+                return await self._store_processed(temp_path, folder, content_hash, db, add_reference)
+            
+            filename = f"{content_hash}.{file_ext}"
+            async with self._file_lock(folder, filename):
+                # Luôn kiểm tra/ghi lại file dưới lock: file có thể vừa bị xóa
+                # (không còn tham chiếu) dù bản ghi từng tồn tại
+                if not await self.storage.exists(f"{folder}/{filename}"):
+                    await self.storage.put_file(
+                        f"{folder}/{filename}", temp_path, f"image/{file_ext.replace('jpg', 'jpeg')}"
+                    )
+                await add_reference(filename)
+            return filename
+        finally:
+            self._remove_quietly(temp_path)
+    
+    async def _reference_stored(
+        self, filename: str, folder: str, add_reference: Callable[[str], Awaitable[None]]
+    ) -> bool:
+        """Thêm tham chiếu tới file đã có nếu nó còn trên storage (False nếu vừa bị xóa)."""
+        async with self._file_lock(folder, filename):
+            if not await self.storage.exists(f"{folder}/{filename}"):
+                return False
+            await add_reference(filename)
+            return True
+    
+    async def _store_processed(
+        self,
+        temp_path: str,
+        folder: str,
+        content_hash: str,
+        db: Session,
+        add_reference: Callable[[str], Awaitable[None]],
+    ) -> str:
+        """
+        Xử lý ảnh và đưa lên storage nếu chưa có file cho cùng bytes gốc, thêm
+        tham chiếu (`add_reference`), trả về filename.
+        """
+        # Đã có file từ cùng bytes gốc: dùng lại
+        filename = await self._db_call(db, crud_file.get_filename_by_hash, folder, content_hash)
+        if filename is not None and await self._reference_stored(filename, folder, add_reference):
+            return filename
         
-        # Lưu file
-        async with aiofiles.open(file_path, "wb") as f:
-            await f.write(content)
+        # Cùng bytes đang được request khác xử lý: chờ kết quả rồi dùng chung
+        key = (folder, content_hash)
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            filename = await asyncio.shield(inflight)
+            if filename is not None and await self._reference_stored(filename, folder, add_reference):
+                return filename
         
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        filename = None
+        try:
+            filename = await self._process_image(temp_path, folder, add_reference)
+        finally:
+            self._inflight.pop(key, None)
+            future.set_result(filename)
         return filename
     
-    def delete_file(self, filename: str, folder: str) -> bool:
-        """Xóa file"""
+    async def _process_image(
+        self, source_path: str, folder: str, add_reference: Callable[[str], Awaitable[None]]
+    ) -> str:
+        """
+        Sinh ảnh chính + biến thể trong process pool, đưa lên storage nếu chưa
+        có và thêm tham chiếu, trả về filename.
+        """
+        # Worker ghi vào thư mục tạm riêng, chỉ đưa lên storage khi thành công
+        work_dir = f"{self.base_path}/temp/{uuid.uuid4().hex}"
+        os.makedirs(work_dir)
         try:
-            file_path = f"{self.base_path}/{folder}/{filename}"
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                return True
-        except Exception:
-            pass
-        return False
+            stem, manifest = await self._run_in_pool(
+                _build_image_variants,
+                source_path,
+                work_dir,
+                PRIMARY_IMAGE_SIZES.get(folder, (800, 600)),
+                self.image_variants.get(folder, {}),
+                self.variant_formats,
+            )
+            primary = f"{stem}.jpg"
+            async with self._file_lock(folder, primary):
+                # Upload khác bytes nhưng cùng ảnh chuẩn hóa đã có trên storage
+                # thì dùng lại; kiểm tra dưới lock nên file không bị xóa giữa chừng
+                if not await self.storage.exists(f"{folder}/{primary}"):
+                    # Biến thể + manifest lên trước, ảnh chính sau cùng: ảnh
+                    # chính tồn tại nghĩa là toàn bộ biến thể đã sẵn sàng
+                    variant_files = [name for name in os.listdir(work_dir) if name != primary]
+                    await asyncio.gather(*(
+                        self.storage.put_file(
+                            f"{folder}/{name}",
+                            os.path.join(work_dir, name),
+                            VARIANT_CONTENT_TYPES.get(os.path.splitext(name)[1][1:]),
+                        )
+                        for name in variant_files
+                    ))
+                    await self.storage.put_bytes(
+                        self._manifest_key(primary, folder), json.dumps(manifest).encode(), "application/json"
+                    )
+                    await self.storage.put_file(f"{folder}/{primary}", os.path.join(work_dir, primary), "image/jpeg")
+                await add_reference(primary)
+            return primary
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+    
+    def _manifest_key(self, filename: str, folder: str) -> str:
+        stem = os.path.splitext(filename)[0]
+        return f"{folder}/{stem}.json"
+    
+    async def _read_manifest(self, filename: str, folder: str) -> Optional[Dict[str, Any]]:
+        try:
+            data = await self.storage.get_bytes(self._manifest_key(filename, folder))
+            return json.loads(data) if data is not None else None
+        except (StorageError, ValueError):
+            return None
+    
+    async def delete_file(self, filename: str, folder: str, db: Session) -> bool:
+        """
+        Bỏ một tham chiếu mà caller đang giữ (vd: avatar cũ); chỉ xóa file vật
+        lý (kèm biến thể và manifest) khi ref_count về 0. File cũ không có
+        trong stored_files được xóa luôn như trước.
+        """
+        remaining = await self._db_call(db, crud_file.release_file, folder, filename)
+        if remaining:
+            return True
+        return await self._unlink_image(filename, folder, db)
+    
+    async def release_upload(self, filename: str, folder: str, db: Session, owner_id: int) -> bool:
+        """
+        Bỏ lượt upload của user `owner_id`; file chỉ bị xóa khi không còn ai
+        dùng. False nếu user không có lượt upload nào cho file này.
+        """
+        remaining = await self._db_call(db, crud_file.release_upload, folder, filename, owner_id)
+        if remaining is None:
+            return False
+        if remaining == 0:
+            await self._unlink_image(filename, folder, db)
+        return True
+    
+    async def unlink_files(self, files: List[Tuple[str, str]], db: Session) -> None:
+        """Xóa file vật lý của các (folder, filename) đã về 0 tham chiếu (sau khi caller commit)."""
+        await asyncio.gather(*(self._unlink_image(filename, folder, db) for folder, filename in files))
+    
+    async def _unlink_image(self, filename: str, folder: str, db: Session) -> bool:
+        async with self._file_lock(folder, filename):
+            # Upload trùng ảnh có thể đã tạo lại bản ghi sau khi tham chiếu cuối
+            # bị nhả: file lại đang được dùng, giữ nguyên
+            if await self._db_call(db, crud_file.has_stored_file, folder, filename):
+                return False
+            return await self._delete_image(filename, folder)
+    
+    async def _delete_image(self, filename: str, folder: str) -> bool:
+        try:
+            if not await self.storage.exists(f"{folder}/{filename}"):
+                return False
+            # Xóa ảnh chính trước để không còn ai thấy ảnh thiếu biến thể
+            await self.storage.delete(f"{folder}/{filename}")
+            manifest = await self._read_manifest(filename, folder)
+            if manifest is not None:
+                names = [
+                    name
+                    for variant in manifest.get("variants", {}).values()
+                    for name in variant.get("files", {}).values()
+                ]
+                await asyncio.gather(*(self.storage.delete(f"{folder}/{name}") for name in names))
+                await self.storage.delete(self._manifest_key(filename, folder))
+            return True
+        except StorageError:
+            return False
     
     def get_file_url(self, filename: str, folder: str) -> str:
         """Tạo URL để access file"""
-        return f"/static/uploads/{folder}/{filename}"
+        return self.storage.url(f"{folder}/{filename}")
+    
+    @staticmethod
+    def _incoming_prefix(folder: str, user_id: int) -> str:
+        return f"{folder}/incoming/{user_id}/"
+    
+    async def presign_image_upload(
+        self, folder: str, content_type: str, size: int, user_id: int, expires_in: int
+    ) -> Dict[str, Any]:
+        """
+        Tạo presigned URL để client upload ảnh thẳng lên storage, bytes không
+        đi qua API worker. File được đặt vào `<folder>/incoming/<user_id>/` và
+        chỉ được dùng sau khi client gọi hoàn tất (`save_presigned_upload`);
+        kích thước khai báo nằm trong chữ ký nên không upload được file lớn hơn.
+        Object incoming không được hoàn tất nên dọn bằng lifecycle rule của bucket.
+        """
+        if not self.storage.supports_presign:
+            raise HTTPException(
+                status.HTTP_501_NOT_IMPLEMENTED,
+                "Storage backend không hỗ trợ upload trực tiếp"
+            )
+        if content_type not in self.allowed_image_types:
+            raise HTTPException(400, "File type not supported")
+        if size <= 0 or size > self.max_file_size:
+            raise HTTPException(400, f"File too large. Max size: {self.max_file_size // (1024*1024)}MB")
+        ext = content_type.split("/", 1)[1].replace("jpeg", "jpg")
+        key = f"{self._incoming_prefix(folder, user_id)}{uuid.uuid4().hex}.{ext}"
+        return await self.storage.presign_upload(key, content_type, size, expires_in)
+    
+    async def save_presigned_upload(
+        self,
+        key: str,
+        folder: str,
+        db: Session,
+        user_id: int,
+        resize: bool = True,
+        owner_id: Optional[int] = None,
+    ) -> str:
+        """
+        Hoàn tất upload presigned của user `user_id`: tải object incoming về,
+        chạy cùng pipeline kiểm tra/xử lý/lưu như `save_image` rồi xóa object
+        incoming (kể cả khi ảnh không hợp lệ).
+        """
+        prefix = self._incoming_prefix(folder, user_id)
+        name = key[len(prefix):] if key.startswith(prefix) else ""
+        if not name or "/" in name:
+            raise HTTPException(400, "Invalid key")
+        
+        try:
+            data = await self.storage.get_bytes(key)
+            if data is None:
+                raise HTTPException(404, "File not found")
+            buffer = io.BytesIO(data)
+            
+            async def read(size: int) -> bytes:
+                return buffer.read(size)
+            
+            temp_path, file_ext, content_hash, size = await self._spool_upload(read)
+            return await self._save_spooled(temp_path, file_ext, content_hash, size, folder, db, resize, owner_id)
+        finally:
+            try:
+                await self.storage.delete(key)
+            except StorageError:
+                pass
+    
+    async def get_image_variants(self, filename: str, folder: str) -> Optional[Dict[str, Any]]:
+        """
+        Trả về cấu trúc dùng trực tiếp cho <picture>/srcset:
+        
+            {
+                "src": "<url ảnh JPEG chính>",
+                "sources": [{"type": "image/avif", "srcset": "<url> 160w, <url> 400w"}, ...],
+                "variants": {"thumb": {"width": 160, "height": 120, "urls": {"webp": "..."}}}
+            }
+        
+        None nếu ảnh không có manifest (ảnh cũ hoặc upload với resize=False).
+        """
+        manifest = await self._read_manifest(filename, folder)
+        if manifest is None:
+            return None
+        
+        variants = {}
+        srcsets: Dict[str, List[Tuple[int, str]]] = {}
+        for name, variant in manifest.get("variants", {}).items():
+            urls = {fmt: self.get_file_url(name_, folder) for fmt, name_ in variant["files"].items()}
+            variants[name] = {"width": variant["width"], "height": variant["height"], "urls": urls}
+            for fmt, url in urls.items():
+                srcsets.setdefault(fmt, []).append((variant["width"], url))
+        
+        sources = []
+        # AVIF trước WebP: trình duyệt chọn source đầu tiên nó hỗ trợ
+        for fmt in sorted(srcsets, key=lambda f: 0 if f == "avif" else 1):
+            # Ảnh gốc nhỏ thì nhiều biến thể trùng width; srcset chỉ giữ một URL mỗi width
+            by_width = dict(sorted(srcsets[fmt], reverse=True))
+            sources.append({
+                "type": VARIANT_CONTENT_TYPES.get(fmt, f"image/{fmt}"),
+                "srcset": ", ".join(f"{url} {width}w" for width, url in sorted(by_width.items())),
+            })
+        
+        return {
+            "src": self.get_file_url(filename, folder),
+            "sources": sources,
+            "variants": variants,
+        }
 
-file_handler = FileHandler()
\ No newline at end of file
+file_handler = FileHandler(base_path=settings.UPLOAD_DIR)
\ No newline at end of file
@@ -0,0 +1,266 @@
+# app/core/instrumentation.py
+
+import asyncio
+import functools
+import json
+import logging
+import re
+import time
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger("app.request")
+
+REQUEST_ID_HEADER = "X-Request-ID"
+# Request ID từ client/proxy chỉ được nhận khi ngắn và không có ký tự lạ (tránh log injection)
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+
+
+@dataclass
+class RequestMetrics:
+    """Số liệu đo của một request, gom qua contextvar `current_metrics`."""
+    request_id: str
+    started: float = field(default_factory=time.perf_counter)
+    db_queries: int = 0
+    db_seconds: float = 0.0
+    handler_seconds: Optional[float] = None
+    handler_finished: Optional[float] = None
+    render_seconds: Optional[float] = None
+    response_started: Optional[float] = None
+
+    def add_query(self, seconds: float) -> None:
+        self.db_queries += 1
+        self.db_seconds += seconds
+
+    def server_timing(self) -> str:
+        """
+        Giá trị header Server-Timing (ms). `handler` là thời gian chạy hàm
+        endpoint (đã gồm DB của nó), `render` là validate/serialize response,
+        `total` tính tới lúc gửi header.
+        """
+        parts = [f'db;dur={self.db_seconds * 1000:.2f};desc="{self.db_queries} queries"']
+        if self.handler_seconds is not None:
+            parts.append(f"handler;dur={self.handler_seconds * 1000:.2f}")
+        if self.render_seconds is not None:
+            parts.append(f"render;dur={self.render_seconds * 1000:.2f}")
+        until = self.response_started or time.perf_counter()
+        parts.append(f"total;dur={(until - self.started) * 1000:.2f}")
+        return ", ".join(parts)
+
+
+current_metrics: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+def get_request_id() -> Optional[str]:
+    """Request ID của request đang xử lý (None nếu ngoài request), dùng khi log."""
+    metrics = current_metrics.get()
+    return metrics.request_id if metrics else None
+
+
+def instrumentation_headers() -> Dict[str, str]:
+    """
+    X-Request-ID (+ Server-Timing) của request hiện tại, cho response được
+    render ngoài InstrumentationMiddleware: 500 của exception chưa bắt do
+    ServerErrorMiddleware (ngoài cùng) render.
+    """
+    metrics = current_metrics.get()
+    if metrics is None:
+        return {}
+    headers = {REQUEST_ID_HEADER: metrics.request_id}
+    if settings.SERVER_TIMING_ENABLED:
+        headers["Server-Timing"] = metrics.server_timing()
+    return headers
+
+
+# --- Đếm query ---
+#
+# Listener gắn trên class Engine nên áp dụng cho mọi engine (primary, replica,
+# sync_engine của AsyncEngine). Contextvar được Starlette copy sang threadpool
+# và SQLAlchemy copy sang greenlet của AsyncSession, nên query nào cũng được
+# tính vào đúng request.
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    if current_metrics.get() is not None:
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    metrics = current_metrics.get()
+    started = conn.info.get("query_started")
+    if metrics is not None and started:
+        metrics.add_query(time.perf_counter() - started.pop())
+
+
+def _on_error(context) -> None:
+    # Query lỗi không chạy after_cursor_execute: bỏ mốc thời gian của nó
+    started = context.connection.info.get("query_started") if context.connection is not None else None
+    if started:
+        started.pop()
+
+
+event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+event.listen(Engine, "handle_error", _on_error)
+
+
+# --- Đo thời gian hàm endpoint ---
+
+def _timed(call: Callable[..., Any]) -> Callable[..., Any]:
+    def record(started: float) -> None:
+        metrics = current_metrics.get()
+        if metrics is not None:
+            metrics.handler_finished = time.perf_counter()
+            metrics.handler_seconds = metrics.handler_finished - started
+
+    if asyncio.iscoroutinefunction(call):
+        @functools.wraps(call)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            started = time.perf_counter()
+            try:
+                return await call(*args, **kwargs)
+            finally:
+                record(started)
+        return async_wrapper
+
+    @functools.wraps(call)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        started = time.perf_counter()
+        try:
+            return call(*args, **kwargs)
+        finally:
+            record(started)
+    return wrapper
+
+
+class TimedRoute(APIRoute):
+    """
+    APIRoute đo riêng thời gian chạy hàm endpoint, để tách `handler` với
+    `render` (validate response_model + JSON encode) trong Server-Timing.
+
+    Dùng qua `APIRouter(route_class=TimedRoute)`.
+    """
+
+    def get_route_handler(self):
+        self.dependant.call = _timed(self.dependant.call)
+        return super().get_route_handler()
+
+
+# --- Middleware ---
+
+class InstrumentationMiddleware:
+    """
+    Gắn request ID và đo thời gian/DB cho từng request.
+
+    - Nhận X-Request-ID từ client/proxy (nếu hợp lệ) hoặc tự sinh, trả lại
+      trong response và `request.state.request_id`
+    - Header Server-Timing: db (thời gian + số query), handler, render, total
+    - Mỗi request một dòng log JSON (logger "app.request"); request vượt
+      REQUEST_SLOW_MS hoặc REQUEST_MAX_QUERIES được log ở mức WARNING kèm cờ
+      `slow` / `too_many_queries` (dấu hiệu N+1)
+
+    ASGI thuần như TenantMiddleware; nên là middleware ngoài cùng để đo cả
+    các middleware khác.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        slow_ms: Optional[float] = None,
+        max_queries: Optional[int] = None,
+        server_timing: Optional[bool] = None,
+    ):
+        self.app = app
+        self.slow_ms = settings.REQUEST_SLOW_MS if slow_ms is None else slow_ms
+        self.max_queries = settings.REQUEST_MAX_QUERIES if max_queries is None else max_queries
+        self.server_timing = settings.SERVER_TIMING_ENABLED if server_timing is None else server_timing
+
+    @staticmethod
+    def _request_id(scope: Scope) -> str:
+        for key, value in scope["headers"]:
+            if key == b"x-request-id":
+                candidate = value.decode("latin-1")
+                if _VALID_REQUEST_ID.match(candidate):
+                    return candidate
+                break
+        return uuid.uuid4().hex
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics(request_id=self._request_id(scope))
+        scope.setdefault("state", {})["request_id"] = metrics.request_id
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                metrics.response_started = time.perf_counter()
+                if metrics.handler_finished is not None:
+                    metrics.render_seconds = metrics.response_started - metrics.handler_finished
+                headers = MutableHeaders(scope=message)
+                headers[REQUEST_ID_HEADER] = metrics.request_id
+                if self.server_timing:
+                    headers.append("Server-Timing", metrics.server_timing())
+            await send(message)
+
+        token = current_metrics.set(metrics)
+        failed = False
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            # Exception chưa bắt được render thành 500 ở ServerErrorMiddleware,
+            # ngoài middleware này: giữ current_metrics (context của task
+            # request) để handler log và gắn header theo request ID
+            failed = True
+            raise
+        finally:
+            if not failed:
+                current_metrics.reset(token)
+            self._log(scope, metrics, status_code)
+
+    def _log(self, scope: Scope, metrics: RequestMetrics, status_code: int) -> None:
+        duration_ms = (time.perf_counter() - metrics.started) * 1000
+        slow = self.slow_ms > 0 and duration_ms > self.slow_ms
+        too_many_queries = self.max_queries > 0 and metrics.db_queries > self.max_queries
+        route = scope.get("route")
+        record: Dict[str, Any] = {
+            "request_id": metrics.request_id,
+            "method": scope["method"],
+            "path": scope["path"],
+            "route": getattr(route, "path", None),
+            "status": status_code,
+            "duration_ms": round(duration_ms, 2),
+            "db_queries": metrics.db_queries,
+            "db_ms": round(metrics.db_seconds * 1000, 2),
+            "handler_ms": round(metrics.handler_seconds * 1000, 2) if metrics.handler_seconds is not None else None,
+            "render_ms": round(metrics.render_seconds * 1000, 2) if metrics.render_seconds is not None else None,
+        }
+        if slow:
+            record["slow"] = True
+        if too_many_queries:
+            record["too_many_queries"] = True
+        level = logging.WARNING if slow or too_many_queries or status_code >= 500 else logging.INFO
+        logger.log(level, json.dumps(record, ensure_ascii=False))
+
+
+def configure_request_logger() -> None:
+    """Cho logger "app.request" ghi ra stderr (uvicorn chỉ cấu hình logger của nó)."""
+    if not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+        logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(settings.REQUEST_LOG_LEVEL.upper())
@@ -0,0 +1,109 @@
+# app/core/maintenance.py
+
+import asyncio
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+Job = Callable[[Session], int]
+
+
+class PeriodicTasks:
+    """
+    Chạy các job dọn dẹp DB (xóa dữ liệu hết hạn...) định kỳ trong process.
+
+    Mỗi job nhận một Session riêng, chạy trong threadpool để không chặn
+    event loop. Nhiều worker cùng chạy cũng không sao vì job chỉ xóa dữ
+    liệu đã hết hạn (idempotent). Lỗi của job được log, không dừng vòng lặp.
+    """
+
+    def __init__(self):
+        self._jobs: List[Tuple[str, float, Job]] = []
+        self._tasks: List[asyncio.Task] = []
+        self.last_results: Dict[str, Optional[int]] = {}
+
+    def register(self, name: str, interval: float, job: Job) -> None:
+        self._jobs.append((name, interval, job))
+
+    def _run_job(self, job: Job) -> int:
+        # Import muộn: app.db.session import app.core.* khi khởi tạo engine
+        from app.db.session import SessionLocal
+
+        db = SessionLocal()
+        try:
+            return job(db)
+        finally:
+            db.close()
+
+    async def run_once(self, name: str) -> Optional[int]:
+        for job_name, _, job in self._jobs:
+            if job_name == name:
+                try:
+                    result = await run_in_threadpool(self._run_job, job)
+                except Exception:
+                    logger.exception("Maintenance job %s failed", name)
+                    result = None
+                self.last_results[name] = result
+                return result
+        raise KeyError(name)
+
+    async def _loop(self, name: str, interval: float) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            await self.run_once(name)
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [
+            asyncio.create_task(self._loop(name, interval), name=f"maintenance:{name}")
+            for name, interval, _ in self._jobs
+            if interval > 0
+        ]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+
+def purge_idempotency_keys(db: Session) -> int:
+    from app.crud import crud_order
+
+    older_than = datetime.now(timezone.utc) - timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS)
+    return crud_order.purge_idempotency_keys(db, older_than=older_than)
+
+
+def purge_user_sessions(db: Session) -> int:
+    from app.crud import crud_session
+
+    return crud_session.purge_sessions(db)
+
+
+def purge_file_uploads(db: Session) -> int:
+    """Lượt upload hết hạn: nhả tham chiếu, xóa file vật lý không còn ai dùng."""
+    import anyio
+
+    from app.core.file_handler import file_handler
+    from app.crud import crud_file
+
+    older_than = datetime.now(timezone.utc) - timedelta(hours=settings.FILE_UPLOAD_TTL_HOURS)
+    expired, unreferenced = crud_file.expire_uploads(db, older_than=older_than)
+    if unreferenced:
+        # Job chạy trong worker thread của anyio: gọi storage (async) trên event loop
+        anyio.from_thread.run(file_handler.unlink_files, unreferenced, db)
+    return expired
+
+
+maintenance = PeriodicTasks()
+maintenance.register("idempotency_keys", settings.MAINTENANCE_INTERVAL_SECONDS, purge_idempotency_keys)
+maintenance.register("user_sessions", settings.MAINTENANCE_INTERVAL_SECONDS, purge_user_sessions)
+maintenance.register("file_uploads", settings.MAINTENANCE_INTERVAL_SECONDS, purge_file_uploads)
@@ -0,0 +1,184 @@
+# app/core/password_service.py
+
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+
+from app.core.config import settings
+from app.core import security
+
+
+class PasswordService:
+    """
+    Chạy bcrypt hash/verify trong một worker pool riêng, có giới hạn.
+
+    bcrypt tốn 200-300ms CPU mỗi lần gọi. Nếu chạy trực tiếp trong endpoint
+    nó sẽ chiếm luôn threadpool của Starlette (hoặc event loop với `async def`).
+    Service này:
+    - dùng ThreadPoolExecutor riêng (bcrypt nhả GIL nên thread là đủ),
+    - giới hạn số job đang chờ + đang chạy (backpressure),
+    - trả 503 ngay khi pool đã đầy thay vì xếp hàng vô hạn,
+    - ghi lại metrics cơ bản.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int, retry_after: int = 1):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.retry_after = retry_after
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._metrics: Dict[str, float] = {
+            "submitted": 0,
+            "completed": 0,
+            "rejected": 0,
+            "failed": 0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0,
+        }
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="password-hash",
+                    )
+        return self._executor
+
+    def _acquire_slot(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.max_pending:
+                self._metrics["rejected"] += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Hệ thống đang bận, vui lòng thử lại sau",
+                    headers={"Retry-After": str(self.retry_after)},
+                )
+            self._in_flight += 1
+            self._metrics["submitted"] += 1
+
+    def _release_slot(self, elapsed: float, failed: bool) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            if failed:
+                self._metrics["failed"] += 1
+            else:
+                self._metrics["completed"] += 1
+            self._metrics["total_seconds"] += elapsed
+            self._metrics["max_seconds"] = max(self._metrics["max_seconds"], elapsed)
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Chạy một job trong pool. Request bị hủy (client ngắt kết nối,
+        timeout) chỉ bỏ chờ: job đang chạy vẫn chạy tiếp, nên slot chỉ được
+        trả khi job thật sự kết thúc (như FileHandler._run_in_pool).
+        """
+        self._acquire_slot()
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            future = loop.run_in_executor(self.executor, func, *args)
+        except BaseException:
+            self._release_slot(time.perf_counter() - started, failed=True)
+            raise
+
+        def _on_done(done: asyncio.Future) -> None:
+            failed = done.cancelled() or done.exception() is not None
+            self._release_slot(time.perf_counter() - started, failed)
+
+        future.add_done_callback(_on_done)
+        return await asyncio.shield(future)
+
+    async def hash(self, password: str) -> str:
+        """Hash password trong worker pool."""
+        return await self._run(security.create_password_hash, password)
+
+    async def hash_many(self, passwords: List[str]) -> List[str]:
+        """
+        Hash nhiều password song song trên toàn bộ worker pool (bulk import).
+
+        Cả lô chỉ chiếm một slot backpressure. Mỗi lúc chỉ đẩy tối đa một nửa
+        số worker vào pool (không xếp cả lô vào hàng đợi của executor) để
+        request đăng nhập/đăng ký không phải chờ hết lô.
+        """
+        return await self._run_many(security.create_password_hash, passwords)
+
+    async def _run_many(self, func: Callable[..., Any], items: List[Any]) -> List[Any]:
+        self._acquire_slot()
+        loop = asyncio.get_running_loop()
+        limit = asyncio.Semaphore(max(1, self.max_workers // 2))
+        started = time.perf_counter()
+        # Slot của cả lô được trả khi lô kết thúc và mọi job đã đẩy vào pool
+        # đều xong (lô bị hủy giữa chừng thì các job đang chạy vẫn giữ slot)
+        pending = {"jobs": 1, "failed": False}
+
+        def _finish(failed: bool) -> None:
+            pending["failed"] = pending["failed"] or failed
+            pending["jobs"] -= 1
+            if pending["jobs"] == 0:
+                self._release_slot(time.perf_counter() - started, pending["failed"])
+
+        def _on_done(done: asyncio.Future) -> None:
+            _finish(done.cancelled() or done.exception() is not None)
+
+        async def run_one(item: Any) -> Any:
+            async with limit:
+                future = loop.run_in_executor(self.executor, func, item)
+                pending["jobs"] += 1
+                future.add_done_callback(_on_done)
+                return await asyncio.shield(future)
+
+        failed = False
+        try:
+            return await asyncio.gather(*(run_one(item) for item in items))
+        except Exception:
+            failed = True
+            raise
+        finally:
+            _finish(failed)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify password trong worker pool."""
+        return await self._run(security.verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """Verify password trong worker pool, kèm hash mới nếu chính sách hash đã đổi."""
+        return await self._run(security.verify_and_update_password, plain_password, hashed_password)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot metrics hiện tại của pool."""
+        with self._lock:
+            metrics = dict(self._metrics)
+            in_flight = self._in_flight
+        finished = metrics["completed"] + metrics["failed"]
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "in_flight": in_flight,
+            "submitted": int(metrics["submitted"]),
+            "completed": int(metrics["completed"]),
+            "failed": int(metrics["failed"]),
+            "rejected": int(metrics["rejected"]),
+            "avg_ms": round(metrics["total_seconds"] * 1000 / finished, 2) if finished else 0.0,
+            "max_ms": round(metrics["max_seconds"] * 1000, 2),
+        }
+
+    def shutdown(self) -> None:
+        """Dừng worker pool (gọi khi app tắt)."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+password_service = PasswordService(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_pending=settings.PASSWORD_HASH_MAX_PENDING,
+)
@@ -0,0 +1,151 @@
+# app/core/principal.py
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Optional, Tuple
+
+from app.core.cache import create_cache, get_shared_backend
+from app.core.config import settings
+from app.models.user import User, UserRole
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Thông tin tối thiểu về user đang đăng nhập, dùng cho kiểm tra quyền.
+
+    Immutable và không gắn với Session nên có thể cache giữa các request.
+    """
+    uid: str
+    id: int
+    role: UserRole
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user: User) -> "Principal":
+        return cls(
+            uid=user.uid,
+            id=user.id,
+            role=user.role,
+            is_active=bool(user.is_active),
+        )
+
+    @classmethod
+    def from_claims(cls, claims: Dict[str, Any]) -> Optional["Principal"]:
+        """Principal từ claims của access token; None nếu token không mang đủ claims."""
+        try:
+            return cls(
+                uid=claims["sub"],
+                id=int(claims["id"]),
+                role=UserRole(claims["role"]),
+                is_active=bool(claims["active"]),
+            )
+        except (KeyError, TypeError, ValueError):
+            return None
+
+
+class PrincipalCache:
+    """
+    Cache Principal theo uid, xây trên app.core.cache (namespace "principal").
+
+    Có shared tier (CACHE_SHARED_URL) thì invalidate được broadcast tới các
+    worker khác.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = create_cache("principal", maxsize=maxsize, ttl=ttl)
+
+    def get(self, uid: str) -> Optional[Principal]:
+        return self._cache.get(uid)
+
+    def set(self, principal: Principal) -> None:
+        self._cache.set(principal.uid, principal)
+
+    def invalidate(self, uid: str) -> None:
+        """Xóa principal khỏi cache (cả local lẫn shared)."""
+        self._cache.delete(uid)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+
+class RevokedSessions:
+    """
+    Các phiên đăng nhập (claim `sid` của access token) đã bị thu hồi, theo uid.
+
+    Access token vẫn còn hạn tối đa ACCESS_TOKEN_EXPIRE_MINUTES sau khi
+    logout/khóa tài khoản/đổi mật khẩu; kiểm tra này từ chối chúng ngay.
+    Nguồn dữ liệu là bảng user_sessions:
+
+    - Phiên thu hồi trong process này được giữ trong dict riêng (không LRU
+      nên không bị đẩy ra), entry hết hạn cùng access token
+    - Còn lại đọc từ cache (namespace "revoked_sessions"), miss thì tra DB
+      qua `load(user_id)` (index user_id/revoked_at) rồi cache lại. Có shared
+      tier thì mỗi lần thu hồi xóa entry ở mọi worker qua broadcast; không
+      có thì entry chỉ sống `local_ttl` giây, nên worker khác thấy phiên bị
+      thu hồi trễ tối đa chừng đó
+    """
+
+    def __init__(self, maxsize: int, ttl: float, local_ttl: float):
+        self.ttl = ttl
+        shared = get_shared_backend() is not None
+        self._cache = create_cache(
+            "revoked_sessions", maxsize=maxsize, ttl=ttl if shared else local_ttl, shared=shared
+        )
+        self._local: Dict[str, Tuple[float, FrozenSet[int]]] = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, uid: str, session_ids: Iterable[int]) -> None:
+        """Ghi lại danh sách phiên đã thu hồi (trong thời hạn access token) của user."""
+        revoked = frozenset(session_ids)
+        now = time.monotonic()
+        with self._lock:
+            for key in [key for key, (expires, _) in self._local.items() if expires <= now]:
+                del self._local[key]
+            self._local[uid] = (now + self.ttl, revoked)
+        # Xóa trước để worker khác bỏ bản cũ trong tầng local (set không broadcast)
+        self._cache.delete(uid)
+        self._cache.set(uid, revoked)
+
+    def is_revoked(self, claims: Dict[str, Any], load: Callable[[int], Iterable[int]]) -> bool:
+        """
+        Token thuộc phiên đã bị thu hồi (token không có `sid`/`id` thì không
+        kiểm tra được).
+
+        Args:
+            load: đọc id các phiên đã thu hồi của user (claim `id`) từ DB,
+                chỉ gọi khi cache miss
+        """
+        sid, user_id = claims.get("sid"), claims.get("id")
+        if sid is None or user_id is None:
+            return False
+        uid = claims.get("sub")
+        with self._lock:
+            entry = self._local.get(uid)
+        if entry is not None and entry[0] > time.monotonic() and sid in entry[1]:
+            return True
+
+        revoked = self._cache.get(uid)
+        if revoked is None:
+            revoked = frozenset(load(int(user_id)))
+            self._cache.set(uid, revoked)
+        return sid in revoked
+
+    def clear(self) -> None:
+        with self._lock:
+            self._local.clear()
+        self._cache.clear()
+
+
+revoked_sessions = RevokedSessions(
+    maxsize=settings.PRINCIPAL_CACHE_MAX_SIZE,
+    ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    local_ttl=settings.REVOKED_SESSIONS_LOCAL_TTL_SECONDS,
+)
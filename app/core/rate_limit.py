@@ -0,0 +1,184 @@
+# app/core/rate_limit.py
+
+import math
+import threading
+import time
+from typing import Callable, Optional, Protocol
+
+from app.core.cache import SharedCacheBackend, TTLCache, get_shared_backend
+from app.core.config import settings
+
+
+# ---------------------------------------------------------------------------
+# Counter store
+# ---------------------------------------------------------------------------
+
+class RateLimitStore(Protocol):
+    """Nơi lưu bộ đếm của rate limiter (theo key, tự hết hạn sau `ttl` giây)."""
+
+    def incr(self, key: str, ttl: int) -> int: ...
+
+    def get(self, key: str) -> int: ...
+
+    def delete(self, *keys: str) -> None: ...
+
+
+class MemoryRateLimitStore:
+    """
+    Bộ đếm trong process (mỗi worker đếm riêng). Số key có giới hạn (LRU)
+    để request từ rất nhiều IP khác nhau không làm phình bộ nhớ.
+    """
+
+    def __init__(self, maxsize: int = 100000, timer: Callable[[], float] = time.monotonic):
+        self._counters = TTLCache(maxsize=maxsize, timer=timer)
+        self._lock = threading.Lock()
+
+    def incr(self, key: str, ttl: int) -> int:
+        with self._lock:
+            value = self._counters.get(key, 0) + 1
+            self._counters.set(key, value, ttl=ttl)
+            return value
+
+    def get(self, key: str) -> int:
+        return self._counters.get(key, 0)
+
+    def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._counters.delete(key)
+
+
+class SharedRateLimitStore:
+    """Bộ đếm trên shared tier của cache (Redis/FakeRedis): mọi worker dùng chung."""
+
+    def __init__(self, backend: SharedCacheBackend):
+        self.backend = backend
+
+    def incr(self, key: str, ttl: int) -> int:
+        value = self.backend.incr(key)
+        if value == 1:
+            self.backend.expire(key, ttl)
+        return value
+
+    def get(self, key: str) -> int:
+        raw = self.backend.get(key)
+        return int(raw) if raw is not None else 0
+
+    def delete(self, *keys: str) -> None:
+        self.backend.delete(*keys)
+
+
+# ---------------------------------------------------------------------------
+# Sliding window
+# ---------------------------------------------------------------------------
+
+class SlidingWindowLimiter:
+    """
+    Sliding window counter: mỗi key có một bộ đếm cho cửa sổ cố định hiện
+    tại và cửa sổ trước, số lần trong cửa sổ trượt được ước lượng bằng
+    `hiện tại + trước * phần cửa sổ trước còn nằm trong cửa sổ trượt`.
+    Chỉ 2 bộ đếm mỗi key (không lưu từng timestamp) nên dùng được với Redis
+    (INCR + EXPIRE) và đủ chính xác cho chống brute force.
+    """
+
+    def __init__(
+        self,
+        store: RateLimitStore,
+        prefix: str,
+        limit: int,
+        window: int,
+        timer: Callable[[], float] = time.time,
+    ):
+        self.store = store
+        self.prefix = prefix
+        self.limit = limit
+        self.window = window
+        self._timer = timer
+
+    def _key(self, key: str, slot: int) -> str:
+        return f"ratelimit:{self.prefix}:{key}:{slot}"
+
+    def retry_after(self, key: str) -> Optional[int]:
+        """Số giây phải chờ nếu key đã chạm giới hạn, None nếu còn được thử."""
+        now = self._timer()
+        slot, offset = divmod(now, self.window)
+        slot = int(slot)
+        current = self.store.get(self._key(key, slot))
+        previous = self.store.get(self._key(key, slot - 1))
+        weight = 1 - offset / self.window
+        if current + previous * weight < self.limit:
+            return None
+        if current >= self.limit or previous == 0:
+            # Chỉ hết khi sang cửa sổ sau (lúc đó bộ đếm hiện tại thành "trước")
+            return max(1, math.ceil(self.window - offset))
+        # Chờ tới khi phần cửa sổ trước còn tính đủ nhỏ
+        needed = 1 - (self.limit - current) / previous
+        return max(1, math.ceil(needed * self.window - offset))
+
+    def hit(self, key: str) -> int:
+        slot = int(self._timer() // self.window)
+        # Giữ bộ đếm qua hết cửa sổ sau, khi nó còn được tính là "cửa sổ trước"
+        return self.store.incr(self._key(key, slot), ttl=2 * self.window)
+
+    def reset(self, key: str) -> None:
+        slot = int(self._timer() // self.window)
+        self.store.delete(self._key(key, slot), self._key(key, slot - 1))
+
+
+class LoginRateLimiter:
+    """
+    Giới hạn đăng nhập sai theo IP và theo tài khoản.
+
+    - `check` chạy trước khi tra user và verify mật khẩu: đã chạm giới hạn
+      thì endpoint trả 429 mà không tốn bcrypt.
+    - Chỉ lần sai mới bị đếm. Đăng nhập đúng xóa bộ đếm của tài khoản
+      (không xóa của IP: một IP thử nhiều tài khoản vẫn bị chặn).
+    - Giới hạn theo tài khoản chặn dò mật khẩu một user từ nhiều IP; giới
+      hạn theo IP (cao hơn) chặn credential stuffing từ một nguồn.
+    """
+
+    def __init__(self, store: RateLimitStore, per_ip: int, per_account: int, window: int, enabled: bool = True):
+        self.enabled = enabled
+        self.by_ip = SlidingWindowLimiter(store, "login-ip", per_ip, window)
+        self.by_account = SlidingWindowLimiter(store, "login-account", per_account, window)
+
+    @staticmethod
+    def _account(username: str) -> str:
+        return username.strip().lower()
+
+    def check(self, ip: Optional[str], username: str) -> Optional[int]:
+        """Retry-After (giây) nếu IP hoặc tài khoản đang bị chặn, None nếu được thử."""
+        if not self.enabled:
+            return None
+        waits = [self.by_account.retry_after(self._account(username))]
+        if ip:
+            waits.append(self.by_ip.retry_after(ip))
+        waits = [wait for wait in waits if wait is not None]
+        return max(waits) if waits else None
+
+    def register_failure(self, ip: Optional[str], username: str) -> None:
+        if not self.enabled:
+            return
+        self.by_account.hit(self._account(username))
+        if ip:
+            self.by_ip.hit(ip)
+
+    def register_success(self, username: str) -> None:
+        if self.enabled:
+            self.by_account.reset(self._account(username))
+
+
+def create_rate_limit_store() -> RateLimitStore:
+    """Shared tier của cache (CACHE_SHARED_URL) nếu có, không thì đếm trong process."""
+    backend = get_shared_backend()
+    if backend is not None:
+        return SharedRateLimitStore(backend)
+    return MemoryRateLimitStore(maxsize=settings.RATE_LIMIT_MAX_KEYS)
+
+
+login_rate_limiter = LoginRateLimiter(
+    store=create_rate_limit_store(),
+    per_ip=settings.LOGIN_RATE_LIMIT_PER_IP,
+    per_account=settings.LOGIN_RATE_LIMIT_PER_ACCOUNT,
+    window=settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+    enabled=settings.LOGIN_RATE_LIMIT_ENABLED,
+)
@@ -1,17 +1,57 @@
 # app/core/security.py
 
+import functools
+import secrets
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from passlib.context import CryptContext
-from jose import jwt
 
 from app.core.config import settings
+from app.core.tokens import InvalidTokenError, token_verifier
+
+# Các scheme verify được (hash cũ vẫn đăng nhập được khi đổi PASSWORD_HASH_SCHEME)
+PASSWORD_SCHEMES = ("bcrypt", "argon2")
+
+
+def create_password_context(
+    scheme: str = "bcrypt",
+    bcrypt_rounds: int = 12,
+    argon2_time_cost: int = 3,
+    argon2_memory_cost: int = 65536,
+    argon2_parallelism: int = 4,
+) -> CryptContext:
+    """
+    CryptContext theo chính sách hash: hash mới dùng `scheme` với cost đã
+    cho; hash bằng scheme khác hoặc cost khác (cao hơn lẫn thấp hơn) bị coi
+    là cần cập nhật (`needs_update`/`verify_and_update`).
+    """
+    if scheme not in PASSWORD_SCHEMES:
+        raise RuntimeError(f"PASSWORD_HASH_SCHEME không hợp lệ: {scheme}")
+    return CryptContext(
+        schemes=[scheme, *(s for s in PASSWORD_SCHEMES if s != scheme)],
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        bcrypt__max_rounds=bcrypt_rounds,
+        argon2__rounds=argon2_time_cost,
+        argon2__min_rounds=argon2_time_cost,
+        argon2__max_rounds=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
+
 
 # Password context cho hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = create_password_context(
+    scheme=settings.PASSWORD_HASH_SCHEME,
+    bcrypt_rounds=settings.PASSWORD_BCRYPT_ROUNDS,
+    argon2_time_cost=settings.PASSWORD_ARGON2_TIME_COST,
+    argon2_memory_cost=settings.PASSWORD_ARGON2_MEMORY_COST,
+    argon2_parallelism=settings.PASSWORD_ARGON2_PARALLELISM,
+)
 
 # JWT settings
-ALGORITHM = "HS256"
+ALGORITHM = settings.ALGORITHM
 
 
 def create_password_hash(password: str) -> str:
@@ -24,8 +64,31 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify password; nếu đúng mà hash không theo chính sách hiện tại (scheme
+    hoặc cost đã đổi) thì trả kèm hash mới để caller lưu lại.
+
+    Returns:
+        (đúng mật khẩu hay không, hash mới hoặc None)
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+@functools.lru_cache(maxsize=1)
+def dummy_password_hash() -> str:
+    """
+    Hash của một mật khẩu ngẫu nhiên, dùng để verify khi email không tồn
+    tại: login với email sai tốn cùng thời gian như với mật khẩu sai (không
+    dò được email nào đã đăng ký qua thời gian phản hồi).
+    """
+    return pwd_context.hash(secrets.token_urlsafe(16))
+
+
 def create_access_token(
-    subject: str, expires_delta: Optional[timedelta] = None
+    subject: str,
+    expires_delta: Optional[timedelta] = None,
+    claims: Optional[Dict[str, Any]] = None,
 ) -> str:
     """
     Tạo JWT access token.
@@ -33,6 +96,7 @@ def create_access_token(
     Args:
         subject: Thường là user_uid
         expires_delta: Thời gian hết hạn (mặc định từ settings)
+        claims: Claims thêm vào token (vd: role, active)
     """
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
@@ -41,14 +105,33 @@ def create_access_token(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
     
-    to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    to_encode = {**(claims or {}), "exp": expire, "sub": str(subject)}
+    return token_verifier.sign(to_encode)
+
+
+def create_user_access_token(
+    user, session_id: Optional[int] = None, expires_delta: Optional[timedelta] = None
+) -> str:
+    """
+    Access token cho user (User hoặc Principal), mang kèm id, role và trạng
+    thái active để các endpoint ít rủi ro kiểm tra quyền không cần query DB
+    (`deps.get_token_principal`). Các claim này có thể cũ tối đa bằng thời
+    hạn của token. `session_id` (claim `sid`) là phiên refresh token sinh ra
+    token, để logout/khóa tài khoản vô hiệu hóa được token ngay.
+    """
+    claims = {
+        "id": user.id,
+        "role": getattr(user.role, "value", user.role),
+        "active": bool(user.is_active),
+    }
+    if session_id is not None:
+        claims["sid"] = session_id
+    return create_access_token(subject=user.uid, expires_delta=expires_delta, claims=claims)
 
 
 def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
     """
-    Decode JWT access token.
+    Decode JWT access token (qua token_verifier: có cache, hỗ trợ nhiều key theo kid).
     
     Args:
         token: JWT token string
@@ -57,11 +140,6 @@ def decode_access_token(token: str) -> Optional[Dict[str, Any]]:
         Dict chứa payload hoặc None nếu invalid
     """
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[ALGORITHM]
-        )
-        return payload
-    except jwt.ExpiredSignatureError:
+        return dict(token_verifier.verify(token))
+    except InvalidTokenError:
         return None
-    except jwt.JWTError:
-        return None
\ No newline at end of file
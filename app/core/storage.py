@@ -0,0 +1,407 @@
+# app/core/storage.py
+
+import os
+import hmac
+import hashlib
+import asyncio
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import quote
+from xml.etree import ElementTree
+
+import aiofiles
+import httpx
+
+from app.core.config import settings
+
+
+class StorageError(Exception):
+    """Lỗi khi thao tác với storage backend."""
+
+
+class StorageBackend(ABC):
+    """
+    Interface lưu trữ file upload.
+
+    Key là đường dẫn tương đối dạng "<folder>/<filename>", ví dụ
+    "products/<sha256>_thumb.webp".
+    """
+
+    # Backend tạo được URL để client upload thẳng lên storage (`presign_upload`)
+    supports_presign: bool = False
+
+    @abstractmethod
+    async def put_file(self, key: str, path: str, content_type: Optional[str] = None) -> None:
+        """Upload file local tại `path` lên `key`. File nguồn có thể bị move/xóa."""
+
+    @abstractmethod
+    async def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        """Ghi bytes lên `key`."""
+
+    @abstractmethod
+    async def get_bytes(self, key: str) -> Optional[bytes]:
+        """Đọc nội dung `key`, None nếu không tồn tại."""
+
+    @abstractmethod
+    async def exists(self, key: str) -> bool:
+        """Kiểm tra `key` có tồn tại không."""
+
+    @abstractmethod
+    async def delete(self, key: str) -> bool:
+        """Xóa `key`. Trả về False nếu key không tồn tại."""
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        """URL public để client truy cập file."""
+
+    async def presign_upload(
+        self, key: str, content_type: str, content_length: int, expires_in: int = 900
+    ) -> Dict[str, Any]:
+        """
+        Tạo URL để client upload thẳng lên storage (không đi qua API), chỉ
+        nhận đúng `content_type` và `content_length` đã ký. Chỉ gọi khi
+        `supports_presign`.
+        """
+        raise StorageError(f"{type(self).__name__} không hỗ trợ presigned upload")
+
+    async def aclose(self) -> None:
+        """Giải phóng tài nguyên (connection pool...)."""
+
+
+class LocalStorage(StorageBackend):
+    """Lưu file trên disk của node hiện tại, phục vụ qua /static/uploads."""
+
+    def __init__(self, base_path: str, base_url: str = "/static/uploads"):
+        self.base_path = base_path
+        self.base_url = base_url.rstrip("/")
+
+    def _path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.base_path, key))
+        if not path.startswith(os.path.normpath(self.base_path) + os.sep):
+            raise StorageError(f"Invalid key: {key}")
+        return path
+
+    async def put_file(self, key: str, path: str, content_type: Optional[str] = None) -> None:
+        target = self._path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        # Cùng filesystem (temp/ nằm trong base_path) nên move là atomic
+        os.replace(path, target)
+
+    async def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        target = self._path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        async with aiofiles.open(target, "wb") as f:
+            await f.write(data)
+
+    async def get_bytes(self, key: str) -> Optional[bytes]:
+        try:
+            async with aiofiles.open(self._path(key), "rb") as f:
+                return await f.read()
+        except OSError:
+            return None
+
+    async def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    async def delete(self, key: str) -> bool:
+        try:
+            os.remove(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    def url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+
+def _sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode(), hashlib.sha256).digest()
+
+
+class S3Storage(StorageBackend):
+    """
+    Backend S3-compatible (AWS S3, MinIO, R2...) dùng path-style URL.
+
+    - Một httpx.AsyncClient dùng chung (connection pool, keep-alive)
+    - File lớn hơn `multipart_threshold` được upload multipart, các part gửi
+      song song có giới hạn
+    - Presigned PUT URL (SigV4 query string) để client upload thẳng lên bucket
+    """
+
+    UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+    supports_presign = True
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        public_url: Optional[str] = None,
+        multipart_threshold: int = 5 * 1024 * 1024,
+        part_size: int = 5 * 1024 * 1024,
+        max_connections: int = 20,
+        timeout: float = 30.0,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.endpoint_url = endpoint_url.rstrip("/")
+        self.bucket = bucket
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+        self.public_url = (public_url or f"{self.endpoint_url}/{bucket}").rstrip("/")
+        # S3 yêu cầu mỗi part (trừ part cuối) tối thiểu 5MB
+        self.multipart_threshold = multipart_threshold
+        self.part_size = max(part_size, 5 * 1024 * 1024)
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host = httpx.URL(self.endpoint_url).netloc.decode()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                transport=self._transport,
+            )
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # --- SigV4 ---
+
+    def _canonical_uri(self, key: str) -> str:
+        return "/" + quote(f"{self.bucket}/{key}", safe="/-_.~")
+
+    @staticmethod
+    def _canonical_query(params: Dict[str, str]) -> str:
+        return "&".join(
+            f"{quote(k, safe='-_.~')}={quote(v, safe='-_.~')}"
+            for k, v in sorted(params.items())
+        )
+
+    def _signing_key(self, date_stamp: str) -> bytes:
+        key = _hmac(f"AWS4{self.secret_key}".encode(), date_stamp)
+        key = _hmac(key, self.region)
+        key = _hmac(key, "s3")
+        return _hmac(key, "aws4_request")
+
+    def _signature(
+        self,
+        method: str,
+        canonical_uri: str,
+        canonical_query: str,
+        headers: Dict[str, str],
+        payload_hash: str,
+        amz_date: str,
+    ) -> Tuple[str, str, str]:
+        """Trả về (signature, signed_headers, credential_scope)."""
+        date_stamp = amz_date[:8]
+        lower = {k.lower(): " ".join(v.strip().split()) for k, v in headers.items()}
+        signed_headers = ";".join(sorted(lower))
+        canonical_headers = "".join(f"{k}:{lower[k]}\n" for k in sorted(lower))
+        canonical_request = "\n".join([
+            method, canonical_uri, canonical_query,
+            canonical_headers, signed_headers, payload_hash,
+        ])
+        scope = f"{date_stamp}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join([
+            "AWS4-HMAC-SHA256", amz_date, scope, _sha256_hex(canonical_request.encode()),
+        ])
+        signature = hmac.new(
+            self._signing_key(date_stamp), string_to_sign.encode(), hashlib.sha256
+        ).hexdigest()
+        return signature, signed_headers, scope
+
+    async def _request(
+        self,
+        method: str,
+        key: str,
+        params: Optional[Dict[str, str]] = None,
+        content: bytes = b"",
+        headers: Optional[Dict[str, str]] = None,
+    ) -> httpx.Response:
+        params = params or {}
+        amz_date = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        payload_hash = _sha256_hex(content)
+        signed = {
+            "host": self._host,
+            "x-amz-date": amz_date,
+            "x-amz-content-sha256": payload_hash,
+            **(headers or {}),
+        }
+        canonical_uri = self._canonical_uri(key)
+        canonical_query = self._canonical_query(params)
+        signature, signed_headers, scope = self._signature(
+            method, canonical_uri, canonical_query, signed, payload_hash, amz_date
+        )
+        signed["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self.access_key}/{scope}, "
+            f"SignedHeaders={signed_headers}, Signature={signature}"
+        )
+        signed.pop("host")
+        url = f"{self.endpoint_url}{canonical_uri}"
+        if canonical_query:
+            url = f"{url}?{canonical_query}"
+        try:
+            return await self.client.request(method, url, content=content, headers=signed)
+        except httpx.HTTPError as exc:
+            raise StorageError(f"S3 {method} {key} failed: {exc}") from exc
+
+    @staticmethod
+    def _raise_for_status(response: httpx.Response, action: str) -> None:
+        if response.status_code >= 300:
+            raise StorageError(f"S3 {action} failed ({response.status_code}): {response.text[:200]}")
+
+    # --- Operations ---
+
+    async def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        headers = {"content-type": content_type} if content_type else {}
+        response = await self._request("PUT", key, content=data, headers=headers)
+        self._raise_for_status(response, f"PUT {key}")
+
+    async def put_file(self, key: str, path: str, content_type: Optional[str] = None) -> None:
+        size = os.path.getsize(path)
+        if size <= self.multipart_threshold:
+            async with aiofiles.open(path, "rb") as f:
+                data = await f.read()
+            await self.put_bytes(key, data, content_type)
+            return
+        await self._multipart_upload(key, path, size, content_type)
+
+    async def _multipart_upload(
+        self, key: str, path: str, size: int, content_type: Optional[str]
+    ) -> None:
+        headers = {"content-type": content_type} if content_type else {}
+        response = await self._request("POST", key, params={"uploads": ""}, headers=headers)
+        self._raise_for_status(response, f"CreateMultipartUpload {key}")
+        upload_id = self._xml_text(response.content, "UploadId")
+
+        part_count = (size + self.part_size - 1) // self.part_size
+        # Giới hạn số part gửi đồng thời để không chiếm hết connection pool
+        semaphore = asyncio.Semaphore(max(1, min(4, self.max_connections // 2)))
+
+        async def upload_part(number: int) -> Tuple[int, str]:
+            async with semaphore:
+                async with aiofiles.open(path, "rb") as f:
+                    await f.seek((number - 1) * self.part_size)
+                    data = await f.read(self.part_size)
+                part = await self._request(
+                    "PUT", key,
+                    params={"partNumber": str(number), "uploadId": upload_id},
+                    content=data,
+                )
+                self._raise_for_status(part, f"UploadPart {key}#{number}")
+                return number, part.headers["etag"]
+
+        try:
+            parts: List[Tuple[int, str]] = await asyncio.gather(
+                *(upload_part(n) for n in range(1, part_count + 1))
+            )
+            body = "<CompleteMultipartUpload>" + "".join(
+                f"<Part><PartNumber>{n}</PartNumber><ETag>{etag}</ETag></Part>"
+                for n, etag in sorted(parts)
+            ) + "</CompleteMultipartUpload>"
+            response = await self._request(
+                "POST", key, params={"uploadId": upload_id}, content=body.encode()
+            )
+            self._raise_for_status(response, f"CompleteMultipartUpload {key}")
+            # S3 có thể trả 200 kèm <Error> trong body
+            if b"<Error>" in response.content:
+                raise StorageError(f"S3 CompleteMultipartUpload {key} failed: {response.text[:200]}")
+        except BaseException:
+            await self._request("DELETE", key, params={"uploadId": upload_id})
+            raise
+
+    @staticmethod
+    def _xml_text(content: bytes, tag: str) -> str:
+        root = ElementTree.fromstring(content)
+        for element in root.iter():
+            if element.tag.rsplit("}", 1)[-1] == tag and element.text:
+                return element.text
+        raise StorageError(f"Missing <{tag}> in S3 response")
+
+    async def get_bytes(self, key: str) -> Optional[bytes]:
+        response = await self._request("GET", key)
+        if response.status_code == 404:
+            return None
+        self._raise_for_status(response, f"GET {key}")
+        return response.content
+
+    async def exists(self, key: str) -> bool:
+        response = await self._request("HEAD", key)
+        if response.status_code == 404:
+            return False
+        self._raise_for_status(response, f"HEAD {key}")
+        return True
+
+    async def delete(self, key: str) -> bool:
+        response = await self._request("DELETE", key)
+        self._raise_for_status(response, f"DELETE {key}")
+        return True
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{quote(key, safe='/-_.~')}"
+
+    async def presign_upload(
+        self, key: str, content_type: str, content_length: int, expires_in: int = 900
+    ) -> Dict[str, Any]:
+        amz_date = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        scope = f"{amz_date[:8]}/{self.region}/s3/aws4_request"
+        # Content-Length nằm trong chữ ký: S3 từ chối upload khác kích thước đã khai
+        headers = {
+            "host": self._host,
+            "content-type": content_type,
+            "content-length": str(content_length),
+        }
+        params = {
+            "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+            "X-Amz-Credential": f"{self.access_key}/{scope}",
+            "X-Amz-Date": amz_date,
+            "X-Amz-Expires": str(expires_in),
+            "X-Amz-SignedHeaders": "content-length;content-type;host",
+        }
+        canonical_uri = self._canonical_uri(key)
+        signature, _, _ = self._signature(
+            "PUT", canonical_uri, self._canonical_query(params),
+            headers, self.UNSIGNED_PAYLOAD, amz_date,
+        )
+        params["X-Amz-Signature"] = signature
+        return {
+            "method": "PUT",
+            "url": f"{self.endpoint_url}{canonical_uri}?{self._canonical_query(params)}",
+            "headers": {"Content-Type": content_type, "Content-Length": str(content_length)},
+            "key": key,
+            "expires_in": expires_in,
+        }
+
+
+def create_storage_backend(base_path: str) -> StorageBackend:
+    """Tạo storage backend theo settings.STORAGE_BACKEND."""
+    if settings.STORAGE_BACKEND == "s3":
+        return S3Storage(
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            bucket=settings.S3_BUCKET,
+            access_key=settings.S3_ACCESS_KEY,
+            secret_key=settings.S3_SECRET_KEY,
+            region=settings.S3_REGION,
+            public_url=settings.S3_PUBLIC_URL or None,
+            multipart_threshold=settings.S3_MULTIPART_THRESHOLD,
+            max_connections=settings.S3_MAX_CONNECTIONS,
+        )
+    return LocalStorage(base_path)
@@ -0,0 +1,177 @@
+# app/core/tenant.py
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Awaitable, Callable, Iterable, List, Optional
+
+from fastapi import HTTPException, Request, status
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.cache import create_cache
+from app.core.config import settings
+from app.models.shop import Shop
+
+
+@dataclass(frozen=True)
+class TenantSnapshot:
+    """
+    Thông tin shop (tenant) của request, resolve từ Host.
+
+    Immutable và không gắn với Session nên cache được giữa các request.
+    """
+    id: int
+    shopid: str
+    name: str
+    subdomain: str
+    owner_id: int
+    is_active: bool
+    default_shipping_fee: Decimal
+    free_shipping_threshold: Optional[Decimal]
+
+    @classmethod
+    def from_shop(cls, shop: Shop) -> "TenantSnapshot":
+        return cls(
+            id=shop.id,
+            shopid=shop.shopid,
+            name=shop.name,
+            subdomain=shop.subdomain,
+            owner_id=shop.owner_id,
+            is_active=bool(shop.is_active),
+            default_shipping_fee=Decimal(shop.default_shipping_fee or 0),
+            free_shipping_threshold=(
+                Decimal(shop.free_shipping_threshold)
+                if shop.free_shipping_threshold is not None else None
+            ),
+        )
+
+
+def subdomain_from_host(host: str, base_domains: Iterable[str]) -> Optional[str]:
+    """
+    "myshop.dropshop.vn:8000" -> "myshop" (với base domain "dropshop.vn").
+    Host không thuộc base domain nào, hoặc là chính base domain, trả về None.
+    """
+    host = host.split(":", 1)[0].strip().lower().rstrip(".")
+    for base in base_domains:
+        suffix = "." + base
+        if host.endswith(suffix):
+            label = host[: -len(suffix)]
+            # Chỉ nhận một cấp subdomain (không nhận "a.b.dropshop.vn")
+            if label and "." not in label:
+                return label
+    return None
+
+
+class TenantCache:
+    """
+    Cache subdomain -> TenantSnapshot, xây trên app.core.cache (namespace "tenant").
+
+    Subdomain không tồn tại cũng được cache (negative caching, TTL ngắn hơn)
+    để request tới host rác không query DB liên tục. Nhiều request cùng miss
+    một subdomain chỉ chạy một query (single-flight).
+    """
+
+    def __init__(self, maxsize: int, ttl: float, negative_ttl: float):
+        self._cache = create_cache("tenant", maxsize=maxsize, ttl=ttl)
+        self.negative_ttl = negative_ttl
+
+    async def get_or_load(
+        self, subdomain: str, loader: Callable[[], Awaitable[Optional[TenantSnapshot]]]
+    ) -> Optional[TenantSnapshot]:
+        return await self._cache.aget_or_set(subdomain, loader, negative_ttl=self.negative_ttl)
+
+    def invalidate(self, subdomain: str) -> None:
+        self._cache.delete(subdomain)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+tenant_cache = TenantCache(
+    maxsize=settings.TENANT_CACHE_MAX_SIZE,
+    ttl=settings.TENANT_CACHE_TTL_SECONDS,
+    negative_ttl=settings.TENANT_NEGATIVE_CACHE_TTL_SECONDS,
+)
+
+
+async def _load_tenant(subdomain: str) -> Optional[TenantSnapshot]:
+    # Import muộn: app.db.session import app.core.* khi khởi tạo engine
+    from app.db.session import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        shop = (
+            await db.execute(select(Shop).filter(Shop.subdomain == subdomain).limit(1))
+        ).scalars().first()
+        return TenantSnapshot.from_shop(shop) if shop else None
+
+
+async def resolve_tenant(subdomain: str) -> Optional[TenantSnapshot]:
+    """Lấy tenant theo subdomain: cache trước, DB (primary) khi miss."""
+    return await tenant_cache.get_or_load(subdomain, lambda: _load_tenant(subdomain))
+
+
+class TenantMiddleware:
+    """
+    Resolve shop từ Host header và gắn vào `request.state.tenant`
+    (TenantSnapshot hoặc None nếu host không phải subdomain của shop nào).
+
+    ASGI thuần (không dùng BaseHTTPMiddleware) để không thêm overhead cho
+    mọi request; host không thuộc TENANT_BASE_DOMAINS không chạm tới cache/DB.
+    """
+
+    def __init__(self, app: ASGIApp, base_domains: Optional[List[str]] = None):
+        self.app = app
+        self.base_domains = [d.lower() for d in (base_domains if base_domains is not None else settings.TENANT_BASE_DOMAINS)]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] in ("http", "websocket"):
+            tenant = None
+            host = next((value.decode("latin-1") for key, value in scope["headers"] if key == b"host"), "")
+            subdomain = subdomain_from_host(host, self.base_domains) if host else None
+            if subdomain:
+                tenant = await resolve_tenant(subdomain)
+            scope.setdefault("state", {})["tenant"] = tenant
+        await self.app(scope, receive, send)
+
+
+def get_current_tenant(request: Request) -> TenantSnapshot:
+    """Dependency: shop của request hiện tại, 404 nếu không có hoặc đã bị khóa."""
+    tenant: Optional[TenantSnapshot] = getattr(request.state, "tenant", None)
+    if tenant is None or not tenant.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Không tìm thấy shop"
+        )
+    return tenant
+
+
+# --- Invalidation khi shop được tạo/cập nhật/xóa ---
+#
+# Ghi nhận subdomain (cũ và mới) lúc flush, chỉ xóa cache sau khi commit để
+# request khác không kịp nạp lại dữ liệu chưa commit/đã rollback.
+
+def _collect_subdomains(mapper, connection, target: Shop) -> None:
+    session = Session.object_session(target)
+    if session is None:
+        return
+    pending = session.info.setdefault("tenant_invalidations", set())
+    pending.add(target.subdomain)
+    # Đổi subdomain: xóa cả entry của subdomain cũ
+    pending.update(value for value in inspect(target).attrs.subdomain.history.deleted if value)
+
+
+def _invalidate_after_commit(session: Session) -> None:
+    for subdomain in session.info.pop("tenant_invalidations", ()):
+        tenant_cache.invalidate(subdomain)
+
+
+def _discard_after_rollback(session: Session, previous_transaction) -> None:
+    session.info.pop("tenant_invalidations", None)
+
+
+event.listen(Shop, "after_insert", _collect_subdomains)
+event.listen(Shop, "after_update", _collect_subdomains)
+event.listen(Shop, "after_delete", _collect_subdomains)
+event.listen(Session, "after_commit", _invalidate_after_commit)
+event.listen(Session, "after_soft_rollback", _discard_after_rollback)
@@ -0,0 +1,193 @@
+# app/core/tokens.py
+
+import hashlib
+import time
+from typing import Any, Dict, Optional, Protocol
+
+from app.core.cache import create_cache
+from app.core.config import settings
+
+
+class InvalidTokenError(ValueError):
+    """Token sai chữ ký, hết hạn, sai định dạng hoặc ký bằng key không còn dùng."""
+
+
+# ---------------------------------------------------------------------------
+# JWT backend
+# ---------------------------------------------------------------------------
+
+class JWTBackend(Protocol):
+    """Thư viện JWT bên dưới TokenVerifier (python-jose hoặc PyJWT)."""
+
+    name: str
+
+    def encode(self, claims: Dict[str, Any], key: str, algorithm: str, headers: Optional[Dict[str, Any]]) -> str: ...
+
+    def decode(self, token: str, key: str, algorithm: str) -> Dict[str, Any]: ...
+
+    def unverified_header(self, token: str) -> Dict[str, Any]: ...
+
+
+class JoseBackend:
+    """python-jose (mặc định, đã có trong requirements)."""
+
+    name = "jose"
+
+    def __init__(self):
+        from jose import jwt, JWTError
+        self._jwt = jwt
+        self._error = JWTError
+
+    def encode(self, claims, key, algorithm, headers):
+        return self._jwt.encode(claims, key, algorithm=algorithm, headers=headers)
+
+    def decode(self, token, key, algorithm):
+        try:
+            return self._jwt.decode(token, key, algorithms=[algorithm])
+        except self._error as e:
+            raise InvalidTokenError(str(e)) from e
+
+    def unverified_header(self, token):
+        try:
+            return self._jwt.get_unverified_header(token)
+        except self._error as e:
+            raise InvalidTokenError(str(e)) from e
+
+
+class PyJWTBackend:
+    """PyJWT (`pip install pyjwt`): ít lớp kiểm tra hơn nên decode nhanh hơn python-jose."""
+
+    name = "pyjwt"
+
+    def __init__(self):
+        import jwt
+        self._jwt = jwt
+
+    def encode(self, claims, key, algorithm, headers):
+        return self._jwt.encode(claims, key, algorithm=algorithm, headers=headers)
+
+    def decode(self, token, key, algorithm):
+        try:
+            return self._jwt.decode(token, key, algorithms=[algorithm])
+        except self._jwt.PyJWTError as e:
+            raise InvalidTokenError(str(e)) from e
+
+    def unverified_header(self, token):
+        try:
+            return self._jwt.get_unverified_header(token)
+        except self._jwt.PyJWTError as e:
+            raise InvalidTokenError(str(e)) from e
+
+
+def create_backend(name: str) -> JWTBackend:
+    """
+    JWT_BACKEND: "jose", "pyjwt" hoặc "auto" (PyJWT nếu đã cài, không thì
+    python-jose). Hai backend sinh/đọc được token của nhau.
+    """
+    if name == "jose":
+        return JoseBackend()
+    if name == "pyjwt":
+        try:
+            return PyJWTBackend()
+        except ImportError as exc:
+            raise RuntimeError("JWT_BACKEND=pyjwt nhưng chưa cài package `pyjwt`") from exc
+    if name == "auto":
+        try:
+            return PyJWTBackend()
+        except ImportError:
+            return JoseBackend()
+    raise RuntimeError(f"JWT_BACKEND không hợp lệ: {name}")
+
+
+# ---------------------------------------------------------------------------
+# Verifier
+# ---------------------------------------------------------------------------
+
+class TokenVerifier:
+    """
+    Ký và xác thực access token (HS256) với nhiều key theo `kid`.
+
+    - Token mới được ký bằng key `active_kid` và mang `kid` trong header.
+      Xoay key: thêm key mới vào JWT_KEYS, chuyển JWT_ACTIVE_KID sang nó,
+      giữ key cũ tới khi token cũ hết hạn rồi mới bỏ.
+    - Token không có `kid` (phát hành trước khi dùng JWT_KEYS) được kiểm tra
+      bằng `legacy_key` (SECRET_KEY).
+    - Claims đã xác thực được cache theo SHA-256 của token tới lúc `exp`, nên
+      mỗi token chỉ bị parse + verify chữ ký một lần mỗi worker. Token lỗi
+      không được cache (tránh bị làm đầy cache bằng token rác).
+    """
+
+    def __init__(
+        self,
+        keys: Dict[str, str],
+        active_kid: Optional[str],
+        legacy_key: str,
+        backend: JWTBackend,
+        algorithm: str = "HS256",
+        cache_size: int = 10000,
+        cache_ttl: float = 1800,
+    ):
+        if active_kid is not None and active_kid not in keys:
+            raise RuntimeError(f"JWT_ACTIVE_KID={active_kid} không có trong JWT_KEYS")
+        self.keys = dict(keys)
+        self.active_kid = active_kid
+        self.legacy_key = legacy_key
+        self.backend = backend
+        self.algorithm = algorithm
+        self._cache = create_cache("access_token", maxsize=cache_size, ttl=cache_ttl, shared=False)
+
+    def sign(self, claims: Dict[str, Any]) -> str:
+        if self.active_kid is None:
+            return self.backend.encode(claims, self.legacy_key, self.algorithm, None)
+        return self.backend.encode(
+            claims, self.keys[self.active_kid], self.algorithm, {"kid": self.active_kid}
+        )
+
+    def _key_for(self, kid: Optional[str]) -> str:
+        if kid is None:
+            return self.legacy_key
+        key = self.keys.get(kid)
+        if key is None:
+            raise InvalidTokenError(f"kid không hợp lệ: {kid}")
+        return key
+
+    def verify(self, token: str) -> Dict[str, Any]:
+        """
+        Claims của token hợp lệ (không được sửa dict trả về: dùng chung qua cache).
+
+        Raises:
+            InvalidTokenError: token không hợp lệ hoặc đã hết hạn
+        """
+        cache_key = hashlib.sha256(token.encode()).digest()
+        cached = self._cache.get(cache_key)
+        now = time.time()
+        if cached is not None:
+            kid, claims = cached
+            # Key đã bị gỡ khỏi JWT_KEYS thì token cũng hết hiệu lực ngay
+            if claims["exp"] > now and (kid is None or kid in self.keys):
+                return claims
+            self._cache.delete(cache_key)
+
+        kid = self.backend.unverified_header(token).get("kid")
+        claims = self.backend.decode(token, self._key_for(kid), self.algorithm)
+        exp = claims.get("exp")
+        if not isinstance(exp, (int, float)):
+            # Token không có hạn dùng không được chấp nhận
+            raise InvalidTokenError("Token thiếu claim exp")
+        if exp > now:
+            self._cache.set(cache_key, (kid, claims), ttl=exp - now)
+        return claims
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+token_verifier = TokenVerifier(
+    keys=settings.JWT_KEYS,
+    active_kid=settings.JWT_ACTIVE_KID,
+    legacy_key=settings.SECRET_KEY,
+    backend=create_backend(settings.JWT_BACKEND),
+    algorithm=settings.ALGORITHM,
+    cache_size=settings.TOKEN_CACHE_MAX_SIZE,
+    cache_ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+)
@@ -0,0 +1,227 @@
+# app/core/upload_server.py
+
+import os
+import re
+import stat
+from email.utils import formatdate
+from mimetypes import guess_type
+from typing import Dict, Optional, Tuple
+
+import anyio
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Receive, Scope, Send
+
+# Tên file content-addressed do FileHandler sinh ra: <sha256>[_<variant>].<ext>
+CONTENT_ADDRESSED_NAME = re.compile(r"^[0-9a-f]{64}(?:_[a-z0-9]+)?\.[a-z0-9]+$")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class UploadFileResponse(Response):
+    """
+    Response trả file upload (toàn bộ hoặc một byte range).
+
+    Ưu tiên các extension ASGI cho phép server gửi file trực tiếp từ kernel:
+    `http.response.pathsend` (cả file) và `http.response.zerocopysend`
+    (sendfile, hỗ trợ offset/count cho range). Server không hỗ trợ thì đọc
+    file theo chunk như FileResponse.
+    """
+
+    chunk_size = 64 * 1024
+
+    def __init__(
+        self,
+        path: str,
+        headers: Dict[str, str],
+        status_code: int = 200,
+        byte_range: Optional[Tuple[int, int]] = None,
+        file_size: int = 0,
+    ):
+        super().__init__(content=None, status_code=status_code, headers=headers)
+        self.path = path
+        self.byte_range = byte_range
+        self.file_size = file_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({
+            "type": "http.response.start",
+            "status": self.status_code,
+            "headers": self.raw_headers,
+        })
+        if scope["method"].upper() == "HEAD":
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        extensions = scope.get("extensions") or {}
+        start, end = self.byte_range if self.byte_range else (0, self.file_size - 1)
+        count = end - start + 1
+
+        if count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        if self.byte_range is None and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": self.path})
+            return
+
+        if "http.response.zerocopysend" in extensions:
+            fd = await anyio.to_thread.run_sync(os.open, self.path, os.O_RDONLY)
+            try:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": fd,
+                    "offset": start,
+                    "count": count,
+                    "more_body": False,
+                })
+            finally:
+                os.close(fd)
+            return
+
+        async with await anyio.open_file(self.path, mode="rb") as file:
+            if start:
+                await file.seek(start)
+            remaining = count
+            while remaining > 0:
+                chunk = await file.read(min(self.chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({
+                    "type": "http.response.body",
+                    "body": chunk,
+                    "more_body": remaining > 0,
+                })
+            if remaining > 0:
+                # File bị cắt ngắn giữa chừng, vẫn phải kết thúc response
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+
+
+class UploadFiles(StaticFiles):
+    """
+    App phục vụ `/static/uploads/...` thay cho StaticFiles mặc định.
+
+    - ETag strong: file content-addressed dùng chính tên file (nội dung không
+      bao giờ đổi), file khác dùng mtime + size
+    - `Cache-Control: immutable` một năm cho file content-addressed
+    - 304 khi If-None-Match khớp, hỗ trợ Range/If-Range (một range)
+    - Tùy chọn `X-Accel-Redirect`: chỉ trả header để nginx tự gửi file
+    """
+
+    def __init__(
+        self,
+        *,
+        directory: str,
+        max_age: int = 3600,
+        accel_redirect_prefix: Optional[str] = None,
+        check_dir: bool = True,
+    ):
+        super().__init__(directory=directory, check_dir=check_dir)
+        self.max_age = max_age
+        self.accel_redirect_prefix = accel_redirect_prefix.rstrip("/") if accel_redirect_prefix else None
+
+    def file_response(
+        self,
+        full_path,
+        stat_result: os.stat_result,
+        scope: Scope,
+        status_code: int = 200,
+    ) -> Response:
+        request_headers = Headers(scope=scope)
+        full_path = str(full_path)
+        name = os.path.basename(full_path)
+        size = stat_result.st_size
+
+        if CONTENT_ADDRESSED_NAME.match(name):
+            etag = f'"{name}"'
+            cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            etag = f'"{stat_result.st_mtime_ns:x}-{size:x}"'
+            cache_control = f"public, max-age={self.max_age}"
+
+        headers = {
+            "etag": etag,
+            "cache-control": cache_control,
+            "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+            "accept-ranges": "bytes",
+        }
+
+        if self._etag_matches(request_headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        content_type = guess_type(name)[0] or "application/octet-stream"
+        headers["content-type"] = content_type
+
+        if self.accel_redirect_prefix:
+            relative = os.path.relpath(full_path, os.path.realpath(self.directory)).replace(os.sep, "/")
+            headers["x-accel-redirect"] = f"{self.accel_redirect_prefix}/{relative}"
+            return Response(status_code=200, headers=headers)
+
+        byte_range = None
+        range_header = request_headers.get("range")
+        if range_header and self._if_range_allows(request_headers.get("if-range"), etag, headers):
+            byte_range = self._parse_range(range_header, size)
+            if byte_range == "invalid":
+                headers["content-range"] = f"bytes */{size}"
+                return Response(status_code=416, headers=headers)
+
+        if byte_range:
+            start, end = byte_range
+            headers["content-range"] = f"bytes {start}-{end}/{size}"
+            headers["content-length"] = str(end - start + 1)
+            return UploadFileResponse(full_path, headers, 206, byte_range, size)
+
+        headers["content-length"] = str(size)
+        return UploadFileResponse(full_path, headers, status_code, None, size)
+
+    @staticmethod
+    def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        # So sánh weak theo RFC 9110 cho If-None-Match
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return etag in candidates
+
+    @staticmethod
+    def _if_range_allows(if_range: Optional[str], etag: str, headers: Dict[str, str]) -> bool:
+        if not if_range:
+            return True
+        return if_range.strip() in (etag, headers["last-modified"])
+
+    @staticmethod
+    def _parse_range(value: str, size: int):
+        """
+        Parse header Range một đoạn. Trả về (start, end), None nếu bỏ qua
+        (multi-range, sai cú pháp) hoặc "invalid" nếu range không thỏa mãn được.
+        """
+        match = _RANGE_RE.match(value.strip())
+        if not match:
+            return None
+        first, last = match.groups()
+        if not first and not last:
+            return None
+        if not first:
+            length = int(last)
+            if length == 0 or size == 0:
+                return "invalid"
+            return max(size - length, 0), size - 1
+        start = int(first)
+        end = int(last) if last else size - 1
+        if start >= size or end < start:
+            return "invalid"
+        return start, min(end, size - 1)
+
+    def lookup_path(self, path: str):
+        full_path, stat_result = super().lookup_path(path)
+        # Không phục vụ thư mục temp/ (file upload đang xử lý dở)
+        if stat_result and stat.S_ISREG(stat_result.st_mode):
+            relative = os.path.relpath(full_path, os.path.realpath(self.directory))
+            if relative.split(os.sep, 1)[0] == "temp":
+                return "", None
+        return full_path, stat_result
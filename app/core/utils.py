@@ -2,6 +2,7 @@
 
 import secrets
 import string
+import unicodedata
 
 def generate_random_id(prefix: str, length: int = 16) -> str:
     """
@@ -19,4 +20,25 @@ def generate_random_uid(length: int = 16) -> str:
     """
     alphabet = string.ascii_letters + string.digits
     random_part = ''.join(secrets.choice(alphabet) for _ in range(length))
-    return f"{random_part}"
\ No newline at end of file
+    return f"{random_part}"
+
+def normalize_search_text(*parts) -> str:
+    """
+    Chuẩn hóa text để tìm kiếm: lowercase, bỏ dấu tiếng Việt, gộp khoảng trắng.
+    Ví dụ: normalize_search_text("Nguyễn Văn Đức") -> "nguyen van duc"
+    """
+    text = " ".join(p for p in parts if p)
+    text = text.replace("đ", "d").replace("Đ", "D")
+    text = unicodedata.normalize("NFD", text)
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(text.lower().split())
+
+def slugify(text: str, max_length: int = 200) -> str:
+    """
+    Tạo slug URL từ text tiếng Việt.
+    Ví dụ: slugify("Áo thun Đỏ - size XL") -> "ao-thun-do-size-xl"
+    """
+    normalized = normalize_search_text(text)
+    slug = "".join(ch if ch.isalnum() and ch.isascii() else "-" for ch in normalized)
+    slug = "-".join(part for part in slug.split("-") if part)
+    return slug[:max_length].strip("-")
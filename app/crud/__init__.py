@@ -0,0 +1,3 @@
+# app/crud/__init__.py
+
+from . import crud_user, crud_shop, crud_file, crud_product, crud_order, crud_session, crud_user_async, crud_shop_async, user_bulk, user_uniqueness
\ No newline at end of file
@@ -0,0 +1,253 @@
+# app/crud/crud_file.py
+
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import update, delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import func
+
+from app.models.stored_file import StoredFile, FileUpload
+
+
+class FileNotOwnedError(Exception):
+    """File không tồn tại hoặc không phải file user đã upload."""
+
+    def __init__(self, filename: str):
+        super().__init__(filename)
+        self.filename = filename
+
+
+def get_stored_file(db: Session, folder: str, filename: str) -> Optional[StoredFile]:
+    """Lấy bản ghi file theo (folder, filename)."""
+    return (
+        db.query(StoredFile)
+        .filter(StoredFile.folder == folder, StoredFile.filename == filename)
+        .first()
+    )
+
+
+def has_stored_file(db: Session, folder: str, filename: str) -> bool:
+    """File đang được quản lý (còn tham chiếu) trong stored_files."""
+    return db.execute(
+        select(StoredFile.id).where(StoredFile.folder == folder, StoredFile.filename == filename)
+    ).first() is not None
+
+
+def get_filename_by_hash(db: Session, folder: str, content_hash: str) -> Optional[str]:
+    """Tên file đã lưu từ cùng bytes upload gốc (upload trùng khỏi phải xử lý lại)."""
+    return db.execute(
+        select(StoredFile.filename)
+        .where(StoredFile.folder == folder, StoredFile.content_hash == content_hash)
+        .limit(1)
+    ).scalar()
+
+
+def _add_reference(
+    db: Session, folder: str, filename: str, content_hash: str, size: int, owner_id: Optional[int]
+) -> bool:
+    stored = get_stored_file(db, folder, filename)
+    if stored is None:
+        stored = StoredFile(
+            folder=folder,
+            filename=filename,
+            content_hash=content_hash,
+            size=size,
+            ref_count=0,
+        )
+        db.add(stored)
+        db.flush()
+
+    if owner_id is not None:
+        upload = (
+            db.query(FileUpload)
+            .filter(FileUpload.stored_file_id == stored.id, FileUpload.user_id == owner_id)
+            .first()
+        )
+        if upload is not None:
+            upload.created_at = func.now()
+            return True
+        db.add(FileUpload(stored_file_id=stored.id, user_id=owner_id))
+
+    result = db.execute(
+        update(StoredFile)
+        .where(StoredFile.id == stored.id)
+        .values(ref_count=StoredFile.ref_count + 1)
+    )
+    # Bản ghi vừa bị xóa (ref_count về 0) giữa chừng: caller làm lại từ đầu
+    return result.rowcount > 0
+
+
+def add_reference(
+    db: Session,
+    folder: str,
+    filename: str,
+    content_hash: str,
+    size: int,
+    owner_id: Optional[int] = None,
+) -> None:
+    """
+    Ghi nhận file vừa upload (tạo bản ghi nếu chưa có) và thêm một tham chiếu.
+
+    - owner_id=None: caller tự giữ tham chiếu (vd: avatar_url của user) và
+      nhả bằng `release_file`.
+    - Có owner_id: tham chiếu là lượt upload (FileUpload) của user đó. Upload
+      lại cùng file chỉ làm mới lượt upload, ref_count giữ nguyên.
+    """
+    for _ in range(3):
+        try:
+            if _add_reference(db, folder, filename, content_hash, size, owner_id):
+                db.commit()
+                return
+            db.rollback()
+        except IntegrityError:
+            # Request khác vừa tạo cùng bản ghi/lượt upload: làm lại trên dữ liệu của nó
+            db.rollback()
+    raise RuntimeError(f"Không ghi nhận được file {folder}/{filename}")
+
+
+def acquire_uploaded_file(db: Session, folder: str, filename: str, owner_id: int) -> None:
+    """
+    Thêm một tham chiếu tới file mà user `owner_id` đã upload (vd: gắn ảnh
+    vào sản phẩm). Không commit: caller commit cùng transaction với dữ liệu
+    giữ tham chiếu.
+
+    Raises:
+        FileNotOwnedError: file không tồn tại hoặc user chưa upload file này
+            (hoặc lượt upload đã hết hạn).
+    """
+    owned = (
+        select(FileUpload.id)
+        .where(FileUpload.stored_file_id == StoredFile.id, FileUpload.user_id == owner_id)
+        .exists()
+    )
+    result = db.execute(
+        update(StoredFile)
+        .where(StoredFile.folder == folder, StoredFile.filename == filename, owned)
+        .values(ref_count=StoredFile.ref_count + 1)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        raise FileNotOwnedError(filename)
+
+
+def release_file(db: Session, folder: str, filename: str, commit: bool = True) -> Optional[int]:
+    """
+    Giảm ref_count; xóa bản ghi khi về 0.
+
+    Args:
+        commit: False để caller nhả tham chiếu trong transaction của mình
+            (vd: cùng lúc xóa sản phẩm)
+
+    Returns:
+        Số tham chiếu còn lại (0 nghĩa là caller được phép xóa file vật lý),
+        hoặc None nếu file không được quản lý bởi bảng này (file cũ).
+    """
+    result = db.execute(
+        update(StoredFile)
+        .where(
+            StoredFile.folder == folder,
+            StoredFile.filename == filename,
+            StoredFile.ref_count > 0,
+        )
+        .values(ref_count=StoredFile.ref_count - 1)
+        .execution_options(synchronize_session=False)
+    )
+    remaining = None
+    if result.rowcount > 0:
+        deleted = db.execute(
+            delete(StoredFile)
+            .where(
+                StoredFile.folder == folder,
+                StoredFile.filename == filename,
+                StoredFile.ref_count <= 0,
+            )
+            .execution_options(synchronize_session=False)
+        )
+        if deleted.rowcount > 0:
+            remaining = 0
+        else:
+            remaining = db.execute(
+                select(StoredFile.ref_count)
+                .where(StoredFile.folder == folder, StoredFile.filename == filename)
+            ).scalar() or 0
+    if commit:
+        db.commit()
+    return remaining
+
+
+def release_files(db: Session, folder: str, filenames: Iterable[str]) -> List[str]:
+    """
+    Nhả một tham chiếu cho mỗi filename, không commit.
+
+    Returns:
+        Các file không còn ai dùng (caller xóa file vật lý sau khi commit).
+    """
+    return [
+        filename
+        for filename in filenames
+        if release_file(db, folder, filename, commit=False) == 0
+    ]
+
+
+def release_upload(db: Session, folder: str, filename: str, owner_id: int) -> Optional[int]:
+    """
+    Bỏ lượt upload của user `owner_id` (nhả tham chiếu của lượt upload đó).
+
+    Returns:
+        Số tham chiếu còn lại, hoặc None nếu user không có lượt upload nào
+        cho file này.
+    """
+    upload_id = db.execute(
+        select(FileUpload.id)
+        .join(StoredFile, StoredFile.id == FileUpload.stored_file_id)
+        .where(
+            StoredFile.folder == folder,
+            StoredFile.filename == filename,
+            FileUpload.user_id == owner_id,
+        )
+    ).scalar()
+    if upload_id is None:
+        return None
+
+    deleted = db.execute(
+        delete(FileUpload)
+        .where(FileUpload.id == upload_id)
+        .execution_options(synchronize_session=False)
+    )
+    if deleted.rowcount == 0:
+        # Request khác vừa bỏ cùng lượt upload
+        db.commit()
+        return None
+    return release_file(db, folder, filename)
+
+
+def expire_uploads(db: Session, older_than: datetime) -> Tuple[int, List[Tuple[str, str]]]:
+    """
+    Xóa các lượt upload tạo trước `older_than` và nhả tham chiếu của chúng.
+
+    Returns:
+        (số lượt upload đã xóa, các (folder, filename) không còn ai dùng để
+        caller xóa file vật lý)
+    """
+    rows = db.execute(
+        select(FileUpload.id, StoredFile.folder, StoredFile.filename)
+        .join(StoredFile, StoredFile.id == FileUpload.stored_file_id)
+        .where(FileUpload.created_at < older_than)
+    ).all()
+
+    expired = 0
+    unreferenced = []
+    for upload_id, folder, filename in rows:
+        deleted = db.execute(
+            delete(FileUpload)
+            .where(FileUpload.id == upload_id)
+            .execution_options(synchronize_session=False)
+        )
+        if deleted.rowcount == 0:
+            continue
+        expired += 1
+        if release_file(db, folder, filename, commit=False) == 0:
+            unreferenced.append((folder, filename))
+    db.commit()
+    return expired, unreferenced
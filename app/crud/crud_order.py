@@ -0,0 +1,300 @@
+# app/crud/crud_order.py
+
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import datetime
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+
+from app.models.order import IdempotencyKey, Order, OrderItem, OrderStatus
+from app.models.product import Product, ProductVariant
+from app.models.shop import Shop
+from app.schemas.order import OrderCreate
+from app.crud.pagination import apply_keyset, encode_cursor
+
+# Trạng thái còn hủy được (chưa giao cho đơn vị vận chuyển)
+CANCELLABLE_STATUSES = (OrderStatus.pending, OrderStatus.confirmed)
+
+
+class OrderError(ValueError):
+    """Lỗi nghiệp vụ khi đặt/hủy đơn (caller trả về 4xx)."""
+
+
+class InvalidOrderItemError(OrderError):
+    """Biến thể không tồn tại, không thuộc shop hoặc đã ngừng bán."""
+
+
+class OutOfStockError(OrderError):
+    def __init__(self, sku: str):
+        super().__init__(f"Sản phẩm {sku} không đủ hàng")
+        self.sku = sku
+
+
+class IdempotencyKeyReusedError(OrderError):
+    """Cùng Idempotency-Key nhưng nội dung request khác lần trước."""
+
+
+class IdempotencyKeyInProgressError(OrderError):
+    """Request khác cùng Idempotency-Key đang được xử lý."""
+
+
+class OrderNotCancellableError(OrderError):
+    """Đơn đã giao vận chuyển/hoàn tất/đã hủy."""
+
+
+def request_fingerprint(order_in: OrderCreate) -> str:
+    """sha256 của body đặt hàng (dạng chuẩn hóa) để so với lần gửi trước cùng key."""
+    raw = json.dumps(order_in.model_dump(mode="json"), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def calculate_shipping_fee(shop: Shop, subtotal: Decimal) -> Decimal:
+    """Phí ship mặc định của shop, miễn phí khi đơn đạt free_shipping_threshold."""
+    if shop.free_shipping_threshold is not None and subtotal >= shop.free_shipping_threshold:
+        return Decimal("0")
+    return Decimal(shop.default_shipping_fee or 0)
+
+
+def get_order_by_orderid(db: Session, orderid: str) -> Optional[Order]:
+    return (
+        db.query(Order)
+        .options(selectinload(Order.items))
+        .filter(Order.orderid == orderid)
+        .first()
+    )
+
+
+def _get_order_by_id(db: Session, order_id: int) -> Optional[Order]:
+    return db.query(Order).options(selectinload(Order.items)).filter(Order.id == order_id).first()
+
+
+def _replay(db: Session, user_id: int, key: str, request_hash: str) -> Optional[Order]:
+    """Đơn đã tạo trước đó với cùng Idempotency-Key, None nếu key chưa dùng."""
+    record = (
+        db.query(IdempotencyKey)
+        .filter(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+        .first()
+    )
+    if record is None:
+        return None
+    if record.request_hash != request_hash:
+        raise IdempotencyKeyReusedError("Idempotency-Key đã được dùng cho một request khác")
+    if record.order_id is None:
+        raise IdempotencyKeyInProgressError("Request với Idempotency-Key này đang được xử lý")
+    return _get_order_by_id(db, record.order_id)
+
+
+def _reserve_stock(db: Session, variant: ProductVariant, quantity: int) -> None:
+    """
+    Trừ kho bằng một câu UPDATE có điều kiện (không đọc-rồi-ghi).
+
+    DB tự khóa dòng trong lúc UPDATE; request đồng thời trên cùng SKU chờ
+    nhau rồi đánh giá lại `stock >= quantity`, nên không bao giờ bán âm kho.
+    """
+    result = db.execute(
+        update(ProductVariant)
+        .where(
+            ProductVariant.id == variant.id,
+            ProductVariant.is_active.is_(True),
+            ProductVariant.stock >= quantity,
+        )
+        .values(stock=ProductVariant.stock - quantity)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        raise OutOfStockError(variant.sku)
+
+
+def _create_order(
+    db: Session,
+    shop_id: int,
+    customer_id: int,
+    order_in: OrderCreate,
+    idempotency_key: Optional[str],
+    request_hash: str,
+) -> Order:
+    record = None
+    if idempotency_key:
+        # Insert key trước: request đồng thời cùng key va vào unique constraint
+        # ngay (Postgres: chờ transaction này commit/rollback rồi mới báo lỗi)
+        record = IdempotencyKey(user_id=customer_id, key=idempotency_key, request_hash=request_hash)
+        db.add(record)
+        db.flush()
+
+    # Gộp dòng trùng biến thể, sắp theo id để mọi transaction khóa dòng theo cùng thứ tự (tránh deadlock)
+    quantities = OrderedDict()
+    for item in sorted(order_in.items, key=lambda item: item.variant_id):
+        quantities[item.variant_id] = quantities.get(item.variant_id, 0) + item.quantity
+
+    rows = (
+        db.query(ProductVariant, Product)
+        .join(Product, ProductVariant.product_id == Product.id)
+        .filter(ProductVariant.id.in_(list(quantities)), Product.shop_id == shop_id)
+        .all()
+    )
+    variants = {variant.id: (variant, product) for variant, product in rows}
+
+    order = Order(
+        shop_id=shop_id,
+        customer_id=customer_id,
+        customer_name=order_in.customer_name,
+        phone_number=order_in.phone_number,
+        shipping_address=order_in.shipping_address,
+        note=order_in.note,
+        status=OrderStatus.pending,
+    )
+    subtotal = Decimal("0")
+    for variant_id, quantity in quantities.items():
+        if variant_id not in variants:
+            raise InvalidOrderItemError(f"Biến thể {variant_id} không tồn tại")
+        variant, product = variants[variant_id]
+        if not product.is_active or not variant.is_active:
+            raise InvalidOrderItemError(f"Sản phẩm {variant.sku} đã ngừng bán")
+
+        _reserve_stock(db, variant, quantity)
+
+        line_total = variant.price * quantity
+        subtotal += line_total
+        order.items.append(OrderItem(
+            product_id=product.id,
+            variant_id=variant.id,
+            product_name=product.name,
+            sku=variant.sku,
+            options=variant.options,
+            unit_price=variant.price,
+            quantity=quantity,
+            line_total=line_total,
+        ))
+
+    # Đọc cấu hình ship trong cùng transaction với việc trừ kho
+    shop = db.query(Shop).filter(Shop.id == shop_id).one()
+    order.subtotal = subtotal
+    order.shipping_fee = calculate_shipping_fee(shop, subtotal)
+    order.total = subtotal + order.shipping_fee
+
+    db.add(order)
+    db.flush()
+    if record is not None:
+        record.order_id = order.id
+    return order
+
+
+def place_order(
+    db: Session,
+    shop_id: int,
+    customer_id: int,
+    order_in: OrderCreate,
+    idempotency_key: Optional[str] = None,
+) -> Tuple[Order, bool]:
+    """
+    Đặt hàng: giữ key idempotency, trừ kho, tính phí ship và tạo đơn trong
+    một transaction; lỗi ở bất kỳ bước nào thì rollback toàn bộ.
+
+    Returns:
+        (order, created): created=False khi trả lại đơn đã tạo với cùng Idempotency-Key
+
+    Raises:
+        OrderError (và các lớp con): lỗi nghiệp vụ, transaction đã rollback
+    """
+    request_hash = request_fingerprint(order_in)
+    if idempotency_key:
+        existing = _replay(db, customer_id, idempotency_key, request_hash)
+        if existing is not None:
+            return existing, False
+
+    try:
+        order = _create_order(db, shop_id, customer_id, order_in, idempotency_key, request_hash)
+        db.commit()
+    except OrderError:
+        db.rollback()
+        raise
+    except IntegrityError:
+        db.rollback()
+        if not idempotency_key:
+            raise
+        # Request khác cùng key vừa commit trước
+        existing = _replay(db, customer_id, idempotency_key, request_hash)
+        if existing is None:
+            raise
+        return existing, False
+
+    return _get_order_by_id(db, order.id), True
+
+
+def cancel_order(db: Session, order: Order) -> Order:
+    """
+    Hủy đơn và hoàn kho.
+
+    Chuyển trạng thái bằng UPDATE có điều kiện: hai request hủy cùng lúc chỉ
+    một request thắng, nên kho chỉ được hoàn một lần.
+    """
+    result = db.execute(
+        update(Order)
+        .where(Order.id == order.id, Order.status.in_(CANCELLABLE_STATUSES))
+        .values(status=OrderStatus.cancelled)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.rollback()
+        raise OrderNotCancellableError("Đơn hàng không thể hủy")
+
+    for item in order.items:
+        if item.variant_id is not None:
+            db.execute(
+                update(ProductVariant)
+                .where(ProductVariant.id == item.variant_id)
+                .values(stock=ProductVariant.stock + item.quantity)
+                .execution_options(synchronize_session=False)
+            )
+    db.commit()
+    db.refresh(order)
+    return order
+
+
+def get_orders_paginated(
+    db: Session,
+    shop_id: Optional[int] = None,
+    customer_id: Optional[int] = None,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> Tuple[List[Order], dict]:
+    """
+    Danh sách đơn (mới nhất trước) của một shop hoặc một khách, phân trang
+    keyset theo index (shop_id|customer_id, created_at, id).
+
+    Raises:
+        InvalidCursorError: nếu cursor không hợp lệ
+    """
+    query = db.query(Order).options(selectinload(Order.items))
+    if shop_id is not None:
+        query = query.filter(Order.shop_id == shop_id)
+    if customer_id is not None:
+        query = query.filter(Order.customer_id == customer_id)
+
+    orders = apply_keyset(query, Order.created_at, Order.id, cursor, limit).all()
+    has_next = len(orders) > limit
+    orders = orders[:limit]
+    next_cursor = encode_cursor(orders[-1].created_at, orders[-1].id) if has_next else None
+
+    pagination_info = {
+        "current_page": None,
+        "total_pages": None,
+        "total_items": None,
+        "items_per_page": limit,
+        "has_next": has_next,
+        "has_prev": cursor is not None,
+        "next_cursor": next_cursor,
+    }
+    return orders, pagination_info
+
+
+def purge_idempotency_keys(db: Session, older_than: datetime) -> int:
+    """Xóa Idempotency-Key cũ hơn `older_than`. Trả về số key đã xóa."""
+    result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < older_than))
+    db.commit()
+    return result.rowcount
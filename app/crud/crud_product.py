@@ -0,0 +1,308 @@
+# app/crud/crud_product.py
+
+from decimal import Decimal
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from app.core.utils import slugify
+from app.crud import crud_file
+from app.models.product import Category, Product, ProductImage, ProductVariant
+from app.schemas.product import (
+    CategoryCreate, ProductCreate, ProductUpdate, ProductVariantCreate, ProductVariantUpdate,
+)
+from app.crud.pagination import apply_keyset, apply_value_keyset, encode_cursor, encode_value_cursor
+
+SORT_OPTIONS = ("newest", "price_asc", "price_desc")
+
+
+# --- Category ---
+
+def get_categories(db: Session, shop_id: int) -> List[Category]:
+    return (
+        db.query(Category)
+        .filter(Category.shop_id == shop_id)
+        .order_by(Category.position, Category.id)
+        .all()
+    )
+
+
+def get_category(db: Session, shop_id: int, category_id: int) -> Optional[Category]:
+    return (
+        db.query(Category)
+        .filter(Category.shop_id == shop_id, Category.id == category_id)
+        .first()
+    )
+
+
+def create_category(db: Session, shop_id: int, category_in: CategoryCreate) -> Category:
+    db_category = Category(
+        shop_id=shop_id,
+        name=category_in.name,
+        slug=_unique_slug(db, Category, shop_id, category_in.slug or category_in.name),
+        position=category_in.position,
+    )
+    db.add(db_category)
+    db.commit()
+    db.refresh(db_category)
+    return db_category
+
+
+# --- Product ---
+
+def _unique_slug(db: Session, model, shop_id: int, text: str) -> str:
+    """Slug không trùng trong shop: "ao-thun", "ao-thun-2", "ao-thun-3"..."""
+    base = slugify(text) or "san-pham"
+    existing = {
+        slug for (slug,) in db.query(model.slug).filter(
+            model.shop_id == shop_id,
+            (model.slug == base) | model.slug.like(f"{base}-%"),
+        )
+    }
+    if base not in existing:
+        return base
+    suffix = 2
+    while f"{base}-{suffix}" in existing:
+        suffix += 1
+    return f"{base}-{suffix}"
+
+
+def get_product_by_productid(
+    db: Session, productid: str, shop_id: Optional[int] = None
+) -> Optional[Product]:
+    """Lấy chi tiết sản phẩm (kèm ảnh, biến thể, danh mục) bằng mã productid công khai."""
+    query = (
+        db.query(Product)
+        .options(
+            selectinload(Product.images),
+            selectinload(Product.variants),
+            joinedload(Product.category),
+        )
+        .filter(Product.productid == productid)
+    )
+    if shop_id is not None:
+        query = query.filter(Product.shop_id == shop_id)
+    return query.first()
+
+
+def get_product_by_slug(db: Session, shop_id: int, slug: str) -> Optional[Product]:
+    return (
+        db.query(Product)
+        .options(
+            selectinload(Product.images),
+            selectinload(Product.variants),
+            joinedload(Product.category),
+        )
+        .filter(Product.shop_id == shop_id, Product.slug == slug)
+        .first()
+    )
+
+
+def get_products_paginated(
+    db: Session,
+    shop_id: int,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    sort: str = "newest",
+    min_price: Optional[Decimal] = None,
+    max_price: Optional[Decimal] = None,
+    category_id: Optional[int] = None,
+    include_inactive: bool = False,
+) -> Tuple[List[Product], dict]:
+    """
+    Danh sách sản phẩm của shop cho storefront, chỉ phân trang bằng cursor.
+
+    Mỗi tổ hợp filter/sort được thiết kế để đi theo một composite index
+    (xem app/models/product.py), không OFFSET và không COUNT(*):
+        - newest:               ix_products_shop_active_created
+        - newest + category:    ix_products_shop_category_created
+        - price_asc/price_desc: ix_products_shop_active_price (khoảng giá là range scan)
+    Ảnh được nạp bằng selectinload (1 query IN cho cả trang, không N+1).
+
+    Raises:
+        InvalidCursorError: nếu cursor không hợp lệ
+        ValueError: nếu sort không hợp lệ
+    """
+    if sort not in SORT_OPTIONS:
+        raise ValueError(f"sort phải là một trong {SORT_OPTIONS}")
+
+    query = db.query(Product).options(selectinload(Product.images)).filter(Product.shop_id == shop_id)
+    if not include_inactive:
+        query = query.filter(Product.is_active.is_(True))
+    if category_id is not None:
+        query = query.filter(Product.category_id == category_id)
+    if min_price is not None:
+        query = query.filter(Product.price >= min_price)
+    if max_price is not None:
+        query = query.filter(Product.price <= max_price)
+
+    if sort == "newest":
+        products = apply_keyset(query, Product.created_at, Product.id, cursor, limit).all()
+    else:
+        products = apply_value_keyset(
+            query, Product.price, Product.id, cursor, limit,
+            descending=(sort == "price_desc"), parse=Decimal,
+        ).all()
+
+    has_next = len(products) > limit
+    products = products[:limit]
+    next_cursor = None
+    if has_next:
+        last = products[-1]
+        if sort == "newest":
+            next_cursor = encode_cursor(last.created_at, last.id)
+        else:
+            next_cursor = encode_value_cursor(last.price, last.id)
+
+    pagination_info = {
+        "current_page": None,
+        "total_pages": None,
+        "total_items": None,
+        "items_per_page": limit,
+        "has_next": has_next,
+        "has_prev": cursor is not None,
+        "next_cursor": next_cursor,
+    }
+
+    return products, pagination_info
+
+
+def _refresh_price(product: Product) -> None:
+    """Giá sản phẩm = giá thấp nhất của các biến thể đang bán (để lọc/sắp xếp bằng index)."""
+    prices = [variant.price for variant in product.variants if variant.is_active]
+    if prices:
+        product.price = min(prices)
+
+
+def _acquire_images(db: Session, images: List[dict], owner_id: int) -> None:
+    """Mỗi ảnh sản phẩm giữ một tham chiếu tới file; chỉ gắn được ảnh do chính owner upload."""
+    try:
+        for image in images:
+            crud_file.acquire_uploaded_file(db, "products", image["filename"], owner_id)
+    except crud_file.FileNotOwnedError:
+        db.rollback()
+        raise
+
+
+def create_product(
+    db: Session,
+    shop_id: int,
+    product_in: ProductCreate,
+    images: Optional[List[dict]] = None,
+    owner_id: Optional[int] = None,
+) -> Product:
+    """
+    Tạo sản phẩm cùng biến thể và ảnh trong một transaction.
+
+    `images` là danh sách dict {"filename", "url"} của ảnh mà user `owner_id`
+    đã upload; tham chiếu tới file được thêm trong cùng transaction.
+
+    Raises:
+        crud_file.FileNotOwnedError: có ảnh không phải do owner upload
+    """
+    _acquire_images(db, images or [], owner_id)
+
+    db_product = Product(
+        shop_id=shop_id,
+        category_id=product_in.category_id,
+        name=product_in.name,
+        slug=_unique_slug(db, Product, shop_id, product_in.slug or product_in.name),
+        description=product_in.description,
+        price=product_in.price,
+        compare_at_price=product_in.compare_at_price,
+        is_active=product_in.is_active,
+    )
+
+    variants = product_in.variants or [
+        ProductVariantCreate(sku="DEFAULT", stock=product_in.stock)
+    ]
+    for variant_in in variants:
+        db_product.variants.append(_build_variant(variant_in, product_in.price))
+    _refresh_price(db_product)
+
+    for position, image in enumerate(images or []):
+        db_product.images.append(ProductImage(position=position, **image))
+
+    db.add(db_product)
+    db.commit()
+    db.refresh(db_product)
+    return db_product
+
+
+def update_product(db: Session, product: Product, product_in: ProductUpdate) -> Product:
+    update_data = product_in.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(product, field, value)
+    db.commit()
+    db.refresh(product)
+    return product
+
+
+def delete_product(db: Session, product: Product) -> List[str]:
+    """
+    Xóa sản phẩm (biến thể/ảnh bị xóa theo) và nhả tham chiếu của các ảnh
+    trong cùng transaction.
+
+    Returns:
+        Tên các file ảnh không còn ai dùng để caller xóa file vật lý.
+    """
+    filenames = [image.filename for image in product.images]
+    db.delete(product)
+    unreferenced = crud_file.release_files(db, "products", filenames)
+    db.commit()
+    return unreferenced
+
+
+# --- Variant ---
+
+def _build_variant(variant_in: ProductVariantCreate, default_price: Decimal) -> ProductVariant:
+    data = variant_in.model_dump()
+    if data["price"] is None:
+        data["price"] = default_price
+    return ProductVariant(**data)
+
+
+def add_variant(db: Session, product: Product, variant_in: ProductVariantCreate) -> ProductVariant:
+    variant = _build_variant(variant_in, product.price)
+    product.variants.append(variant)
+    _refresh_price(product)
+    db.commit()
+    db.refresh(variant)
+    return variant
+
+
+def update_variant(
+    db: Session, product: Product, variant: ProductVariant, variant_in: ProductVariantUpdate
+) -> ProductVariant:
+    update_data = variant_in.model_dump(exclude_unset=True)
+    for field, value in update_data.items():
+        setattr(variant, field, value)
+    _refresh_price(product)
+    db.commit()
+    db.refresh(variant)
+    return variant
+
+
+# --- Image ---
+
+def add_images(db: Session, product: Product, images: List[dict], owner_id: int) -> List[ProductImage]:
+    """
+    Thêm ảnh (do user `owner_id` upload) vào cuối danh sách ảnh của sản phẩm.
+
+    Raises:
+        crud_file.FileNotOwnedError: có ảnh không phải do owner upload
+    """
+    _acquire_images(db, images, owner_id)
+    next_position = (
+        db.query(func.coalesce(func.max(ProductImage.position) + 1, 0))
+        .filter(ProductImage.product_id == product.id)
+        .scalar()
+    )
+    db_images = [
+        ProductImage(product_id=product.id, position=next_position + offset, **image)
+        for offset, image in enumerate(images)
+    ]
+    db.add_all(db_images)
+    db.commit()
+    return db_images
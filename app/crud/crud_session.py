@@ -0,0 +1,210 @@
+# app/crud/crud_session.py
+#
+# Phiên đăng nhập (refresh token) - xem app/models/user_session.py.
+
+import hashlib
+import secrets
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.principal import Principal, revoked_sessions
+from app.models.user import User
+from app.models.user_session import UserSession
+
+
+class InvalidRefreshTokenError(ValueError):
+    """Refresh token không tồn tại, đã hết hạn hoặc đã bị thu hồi."""
+
+
+class RefreshTokenReuseError(InvalidRefreshTokenError):
+    """Refresh token đã được xoay bị dùng lại: cả chuỗi phiên đã bị thu hồi."""
+
+
+def hash_refresh_token(token: str) -> str:
+    # Token ngẫu nhiên 256 bit nên SHA-256 là đủ (không cần bcrypt), tra cứu bằng index unique
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _add_session(
+    db: Session,
+    user_id: int,
+    device: Optional[str],
+    ip_address: Optional[str],
+    family_id: Optional[str] = None,
+) -> Tuple[UserSession, str]:
+    token = secrets.token_urlsafe(32)
+    session = UserSession(
+        user_id=user_id,
+        family_id=family_id or uuid.uuid4().hex,
+        token_hash=hash_refresh_token(token),
+        device=device[:255] if device else None,
+        ip_address=ip_address,
+        expires_at=_now() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    )
+    db.add(session)
+    db.flush()
+    return session, token
+
+
+def create_session(
+    db: Session, user: User, device: Optional[str] = None, ip_address: Optional[str] = None
+) -> Tuple[int, str]:
+    """Phiên mới khi đăng nhập. Trả về (id phiên, refresh token dạng rõ - chỉ có lúc này)."""
+    session, token = _add_session(db, user.id, device, ip_address)
+    session_id = session.id
+    db.commit()
+    return session_id, token
+
+
+def rotate_session(
+    db: Session, refresh_token: str, device: Optional[str] = None, ip_address: Optional[str] = None
+) -> Tuple[Principal, int, str]:
+    """
+    Đổi refresh token lấy phiên mới cùng family (refresh token chỉ dùng được
+    một lần). Một lần tra cứu theo index unique + một UPDATE có điều kiện
+    (hai request dùng cùng token thì chỉ một request thắng). Trả về
+    (principal của user - đọc lại role/trạng thái mới nhất, id phiên mới,
+    refresh token mới).
+
+    Raises:
+        RefreshTokenReuseError: token đã được xoay trước đó (cả family bị thu hồi)
+        InvalidRefreshTokenError: token không hợp lệ/hết hạn/đã thu hồi, hoặc user bị khóa
+    """
+    session = db.execute(
+        select(UserSession).where(UserSession.token_hash == hash_refresh_token(refresh_token))
+    ).scalar_one_or_none()
+    if session is None:
+        raise InvalidRefreshTokenError("Refresh token không hợp lệ")
+
+    now = _now()
+    result = db.execute(
+        update(UserSession)
+        .where(
+            UserSession.id == session.id,
+            UserSession.rotated_at.is_(None),
+            UserSession.revoked_at.is_(None),
+            UserSession.expires_at > now,
+        )
+        .values(rotated_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount != 1:
+        db.rollback()
+        db.refresh(session)
+        if session.rotated_at is not None and session.revoked_at is None:
+            revoke_family(db, session.family_id)
+            raise RefreshTokenReuseError("Refresh token đã được sử dụng")
+        raise InvalidRefreshTokenError("Refresh token đã hết hạn hoặc đã bị thu hồi")
+
+    user = db.get(User, session.user_id)
+    if user is None or not user.is_active:
+        db.rollback()
+        raise InvalidRefreshTokenError("Tài khoản đã bị vô hiệu hóa")
+
+    principal = Principal.from_user(user)
+    new_session, token = _add_session(
+        db, session.user_id, device or session.device, ip_address, family_id=session.family_id
+    )
+    session_id = new_session.id
+    db.commit()
+    return principal, session_id, token
+
+
+def _revoked_since() -> datetime:
+    # Access token của phiên bị thu hồi trước mốc này đã hết hạn
+    return _now() - timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+
+
+def _revoked_ids_statement(user_id: int):
+    return select(UserSession.id).where(
+        UserSession.user_id == user_id,
+        UserSession.revoked_at >= _revoked_since(),
+    )
+
+
+def get_revoked_session_ids(db: Session, user_id: int) -> List[int]:
+    """Id các phiên của user bị thu hồi mà access token có thể còn hạn (xem RevokedSessions)."""
+    return db.execute(_revoked_ids_statement(user_id)).scalars().all()
+
+
+def _publish(db: Session, user_id: int, uid: Optional[str] = None) -> None:
+    """Ghi lại danh sách phiên vừa bị thu hồi của user vào revoked_sessions."""
+    if uid is None:
+        uid = db.execute(select(User.uid).where(User.id == user_id)).scalar()
+    if uid is not None:
+        revoked_sessions.revoke(uid, get_revoked_session_ids(db, user_id))
+
+
+def revoke_family(db: Session, family_id: str) -> int:
+    """Thu hồi mọi phiên trong chuỗi xoay vòng của một lần đăng nhập (logout một thiết bị)."""
+    user_id = db.execute(
+        select(UserSession.user_id).where(UserSession.family_id == family_id).limit(1)
+    ).scalar()
+    result = db.execute(
+        update(UserSession)
+        .where(UserSession.family_id == family_id, UserSession.revoked_at.is_(None))
+        .values(revoked_at=_now())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    if user_id is not None:
+        _publish(db, user_id)
+    return result.rowcount
+
+
+def revoke_by_token(db: Session, refresh_token: str) -> int:
+    """Logout: thu hồi family của refresh token. Token không tồn tại thì không làm gì."""
+    family_id = db.execute(
+        select(UserSession.family_id).where(UserSession.token_hash == hash_refresh_token(refresh_token))
+    ).scalar()
+    if family_id is None:
+        return 0
+    return revoke_family(db, family_id)
+
+
+def _revoke_user_statement(user_id: int):
+    return (
+        update(UserSession)
+        .where(UserSession.user_id == user_id, UserSession.revoked_at.is_(None))
+        .values(revoked_at=_now())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def revoke_user_sessions(db: Session, user: User) -> int:
+    """Thu hồi mọi phiên của user (logout mọi thiết bị, khóa/xóa tài khoản)."""
+    user_id, uid = user.id, user.uid
+    result = db.execute(_revoke_user_statement(user_id))
+    db.commit()
+    _publish(db, user_id, uid)
+    return result.rowcount
+
+
+async def arevoke_user_sessions(db: AsyncSession, user: User) -> int:
+    """Bản async của revoke_user_sessions."""
+    user_id, uid = user.id, user.uid
+    result = await db.execute(_revoke_user_statement(user_id))
+    await db.commit()
+    revoked_sessions.revoke(uid, (await db.execute(_revoked_ids_statement(user_id))).scalars().all())
+    return result.rowcount
+
+
+def purge_sessions(db: Session, now: Optional[datetime] = None) -> int:
+    """Xóa phiên đã hết hạn (cả các phiên đã xoay/thu hồi của chúng). Trả về số dòng đã xóa."""
+    result = db.execute(
+        delete(UserSession)
+        .where(UserSession.expires_at < (now or _now()))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount
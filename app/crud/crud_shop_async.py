@@ -0,0 +1,31 @@
+# app/crud/crud_shop_async.py
+#
+# Bản async của crud_shop (dùng với AsyncSession / deps.get_async_db).
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.shop import Shop
+from app.schemas.shop import ShopCreate
+
+async def get_shop_by_owner(db: AsyncSession, owner_id: int) -> Shop | None:
+    result = await db.execute(select(Shop).filter(Shop.owner_id == owner_id).limit(1))
+    return result.scalars().first()
+
+async def get_shop_by_subdomain(db: AsyncSession, subdomain: str) -> Shop | None:
+    result = await db.execute(select(Shop).filter(Shop.subdomain == subdomain).limit(1))
+    return result.scalars().first()
+
+async def get_shop_by_shopid(db: AsyncSession, shopid: str) -> Shop | None:
+    """Lấy shop bằng mã shopid công khai."""
+    result = await db.execute(select(Shop).filter(Shop.shopid == shopid).limit(1))
+    return result.scalars().first()
+
+async def create_shop(db: AsyncSession, shop_in: ShopCreate, owner_id: int) -> Shop:
+    db_shop = Shop(
+        **shop_in.model_dump(),
+        owner_id=owner_id
+    )
+    db.add(db_shop)
+    await db.commit()
+    await db.refresh(db_shop)
+    return db_shop
@@ -2,10 +2,16 @@
 
 from typing import Optional, List, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, update
+from sqlalchemy.exc import IntegrityError
 from app.models.user import User, UserRole
 from app.schemas.user import UserCreate, UserUpdate
 from app.core.security import create_password_hash
+from app.core.principal import principal_cache
+from app.crud import crud_session
+from app.crud.pagination import apply_keyset, decode_offset_cursor, encode_cursor, encode_offset_cursor
+from app.crud.user_search import apply_user_search
+from app.crud.user_uniqueness import raise_for_integrity_error
 import math
 
 
@@ -24,32 +30,32 @@ def get_users_paginated(
     page: int = 1,
     limit: int = 10,
     search: Optional[str] = None,
-    role: Optional[str] = None
+    role: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
 ) -> Tuple[List[User], dict]:
     """
     Lấy danh sách users với phân trang và filter.
     
     Args:
         db: Database session
-        page: Số trang (bắt đầu từ 1)
+        page: Số trang (bắt đầu từ 1), bị bỏ qua khi có cursor
         limit: Số items per page
         search: Từ khóa tìm kiếm (tìm trong full_name và email)
         role: Lọc theo vai trò
+        cursor: Cursor lấy từ `next_cursor` của trang trước (cùng search)
+        include_total: False để bỏ qua query COUNT(*)
     
     Returns:
         Tuple[List[User], dict]: (danh sách users, thông tin pagination)
+    
+    Raises:
+        InvalidCursorError: nếu cursor không hợp lệ
     """
     query = db.query(User)
     
-    # Áp dụng filter theo search
-    if search:
-        search_term = f"%{search}%"
-        query = query.filter(
-            or_(
-                User.full_name.ilike(search_term),
-                User.email.ilike(search_term)
-            )
-        )
+    # Áp dụng filter theo search (pg_trgm / FTS5 tùy DB, không phân biệt dấu)
+    query, rank_order = apply_user_search(db, query, search)
     
     # Áp dụng filter theo role
     if role and role != "all":
@@ -60,35 +66,66 @@ def get_users_paginated(
             # Role không hợp lệ, bỏ qua filter
             pass
     
-    # Đếm tổng số records
-    total_items = query.count()
-    total_pages = math.ceil(total_items / limit) if total_items > 0 else 1
-    
-    # Tính offset
-    offset = (page - 1) * limit
+    # Đếm tổng số records (có thể tắt để tránh COUNT(*) trên bảng lớn)
+    total_items = query.count() if include_total else None
+    total_pages = None
+    if total_items is not None:
+        total_pages = math.ceil(total_items / limit) if total_items > 0 else 1
     
-    # Lấy data với pagination, sắp xếp theo created_at desc
-    users = query.order_by(User.created_at.desc()).offset(offset).limit(limit).all()
+    if cursor and not rank_order:
+        # Keyset mode: WHERE (created_at, id) < cursor, dùng index ix_users_created_at_id
+        users = apply_keyset(query, User.created_at, User.id, cursor, limit).all()
+        current_page = None
+        has_prev = True
+    else:
+        # Offset mode, sắp xếp theo độ liên quan (khi tìm kiếm) rồi created_at desc.
+        # Kết quả xếp theo độ liên quan không có khóa ổn định cho keyset nên
+        # cursor của chúng là offset (encode_offset_cursor)
+        offset = decode_offset_cursor(cursor) if cursor else (page - 1) * limit
+        users = (
+            query.order_by(*rank_order, User.created_at.desc(), User.id.desc())
+            .offset(offset)
+            .limit(limit + 1)
+            .all()
+        )
+        current_page = None if cursor else page
+        has_prev = offset > 0
     
-    # Tính toán thông tin pagination
-    has_next = page < total_pages
-    has_prev = page > 1
+    # Lấy dư 1 record để biết còn trang sau
+    has_next = len(users) > limit
+    users = users[:limit]
+    next_cursor = None
+    if has_next:
+        if rank_order:
+            next_cursor = encode_offset_cursor(offset + limit)
+        else:
+            next_cursor = encode_cursor(users[-1].created_at, users[-1].id)
     
     pagination_info = {
-        "current_page": page,
+        "current_page": current_page,
         "total_pages": total_pages,
         "total_items": total_items,
         "items_per_page": limit,
         "has_next": has_next,
-        "has_prev": has_prev
+        "has_prev": has_prev,
+        "next_cursor": next_cursor,
     }
     
     return users, pagination_info
 
 
-def create_user(db: Session, user_in: UserCreate) -> User:
-    """Tạo user mới."""
-    hashed_password = create_password_hash(user_in.password)
+def create_user(db: Session, user_in: UserCreate, hashed_password: Optional[str] = None) -> User:
+    """
+    Tạo user mới.
+    
+    Nếu caller đã hash password (vd: qua password_service trong endpoint async)
+    thì truyền vào `hashed_password` để không phải hash lại.
+    
+    Raises:
+        UniqueFieldError: nếu email/số điện thoại/CCCD đã được sử dụng
+    """
+    if hashed_password is None:
+        hashed_password = create_password_hash(user_in.password)
     
     db_user = User(
         full_name=user_in.full_name,
@@ -101,34 +138,63 @@ def create_user(db: Session, user_in: UserCreate) -> User:
     )
     
     db.add(db_user)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise_for_integrity_error(e)
     db.refresh(db_user)
     return db_user
 
 
-def update_user(db: Session, user: User, user_in: UserUpdate) -> User:
-    """Cập nhật thông tin user."""
+def update_user(
+    db: Session, user: User, user_in: UserUpdate, hashed_password: Optional[str] = None
+) -> User:
+    """
+    Cập nhật thông tin user.
+    
+    Đổi password mà caller đã hash sẵn (qua password_service) thì truyền vào
+    `hashed_password` để không phải hash lại.
+    
+    Raises:
+        UniqueFieldError: nếu email/số điện thoại/CCCD đã được sử dụng
+    """
     update_data = user_in.dict(exclude_unset=True)
     
     # Xử lý password riêng nếu có
     if "password" in update_data:
         password = update_data.pop("password")
         if password:  # Chỉ hash nếu password không rỗng
-            update_data["hashed_password"] = create_password_hash(password)
+            update_data["hashed_password"] = hashed_password or create_password_hash(password)
     
     # Cập nhật các trường khác
+    # Đổi mật khẩu hoặc khóa tài khoản: phiên đăng nhập hiện có phải hết hiệu lực
+    revoke_sessions = "hashed_password" in update_data or (
+        user.is_active and update_data.get("is_active") is False
+    )
     for field, value in update_data.items():
         setattr(user, field, value)
     
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError as e:
+        db.rollback()
+        raise_for_integrity_error(e)
     db.refresh(user)
+    principal_cache.invalidate(user.uid)
+    if revoke_sessions:
+        crud_session.revoke_user_sessions(db, user)
     return user
 
 
 def delete_user(db: Session, user: User) -> bool:
     """Xóa user."""
+    # Access token đang dùng của user hết hiệu lực ngay (phiên bị xóa theo user)
+    crud_session.revoke_user_sessions(db, user)
+    uid = user.uid
     db.delete(user)
     db.commit()
+    principal_cache.invalidate(uid)
     return True
 
 
@@ -137,17 +203,43 @@ def update_user_status(db: Session, user: User, is_active: bool) -> User:
     user.is_active = is_active
     db.commit()
     db.refresh(user)
+    principal_cache.invalidate(user.uid)
+    if not is_active:
+        # Khóa tài khoản: refresh token và access token đang dùng hết hiệu lực ngay
+        crud_session.revoke_user_sessions(db, user)
     return user
 
 
-def change_user_password(db: Session, user: User, new_password: str) -> User:
-    """Đổi mật khẩu user."""
-    user.hashed_password = create_password_hash(new_password)
+def change_user_password(
+    db: Session, user: User, new_password: str, hashed_password: Optional[str] = None
+) -> User:
+    """Đổi mật khẩu user (`hashed_password`: hash sẵn của new_password, nếu có)."""
+    user.hashed_password = hashed_password or create_password_hash(new_password)
     db.commit()
     db.refresh(user)
+    principal_cache.invalidate(user.uid)
+    # Phiên đăng nhập bằng mật khẩu cũ (refresh lẫn access token) hết hiệu lực ngay
+    crud_session.revoke_user_sessions(db, user)
     return user
 
 
+def rehash_user_password(db: Session, user_id: int, old_hash: str, new_hash: str) -> bool:
+    """
+    Lưu hash mới (theo chính sách hash hiện tại) sau khi đăng nhập đúng.
+
+    Chỉ ghi nếu hash trong DB vẫn là `old_hash`: mật khẩu vừa được đổi ở
+    request khác thì giữ nguyên. Trả về True nếu đã cập nhật.
+    """
+    result = db.execute(
+        update(User)
+        .where(User.id == user_id, User.hashed_password == old_hash)
+        .values(hashed_password=new_hash)
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
 def check_email_exists(db: Session, email: str, exclude_uid: Optional[str] = None) -> bool:
     """Kiểm tra email đã tồn tại chưa (dùng cho validation)."""
     query = db.query(User).filter(User.email == email)
@@ -0,0 +1,238 @@
+# app/crud/crud_user_async.py
+#
+# Bản async của crud_user (dùng với AsyncSession / deps.get_async_db).
+# Giữ cùng tên hàm và ngữ nghĩa với crud_user để chuyển endpoint dần dần.
+
+from typing import Optional, List, Tuple
+from sqlalchemy import func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.user import User, UserRole
+from app.schemas.user import UserCreate, UserUpdate
+from app.core.password_service import password_service
+from app.core.principal import principal_cache
+from app.crud import crud_session
+from app.crud.pagination import apply_keyset, decode_offset_cursor, encode_cursor, encode_offset_cursor
+from app.crud.user_search import get_user_search_backend
+from app.crud.user_uniqueness import raise_for_integrity_error
+from app.core.utils import normalize_search_text
+import math
+
+
+async def get_user_by_email(db: AsyncSession, email: str) -> Optional[User]:
+    """Lấy user theo email."""
+    result = await db.execute(select(User).filter(User.email == email).limit(1))
+    return result.scalars().first()
+
+
+async def get_user_by_uid(db: AsyncSession, uid: str) -> Optional[User]:
+    """Lấy user bằng mã uid công khai."""
+    result = await db.execute(select(User).filter(User.uid == uid).limit(1))
+    return result.scalars().first()
+
+
+async def get_users_paginated(
+    db: AsyncSession,
+    page: int = 1,
+    limit: int = 10,
+    search: Optional[str] = None,
+    role: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+) -> Tuple[List[User], dict]:
+    """
+    Lấy danh sách users với phân trang và filter (xem crud_user.get_users_paginated).
+    
+    Raises:
+        InvalidCursorError: nếu cursor không hợp lệ
+    """
+    stmt = select(User)
+    
+    # Chọn backend tìm kiếm cần inspect DB (sync) nên chạy qua run_sync
+    rank_order = []
+    term = normalize_search_text(search) if search else ""
+    if term:
+        backend = await db.run_sync(get_user_search_backend)
+        stmt, rank_order = backend.apply(stmt, term)
+    
+    if role and role != "all":
+        try:
+            stmt = stmt.filter(User.role == UserRole(role))
+        except ValueError:
+            # Role không hợp lệ, bỏ qua filter
+            pass
+    
+    total_items = None
+    total_pages = None
+    if include_total:
+        total_items = await db.scalar(select(func.count()).select_from(stmt.subquery()))
+        total_pages = math.ceil(total_items / limit) if total_items > 0 else 1
+    
+    if cursor and not rank_order:
+        stmt = apply_keyset(
+            stmt, User.created_at, User.id, cursor, limit,
+            dialect_name=db.get_bind().dialect.name,
+        )
+        current_page = None
+        has_prev = True
+    else:
+        # Kết quả xếp theo độ liên quan: cursor là offset (xem crud_user)
+        offset = decode_offset_cursor(cursor) if cursor else (page - 1) * limit
+        stmt = (
+            stmt.order_by(*rank_order, User.created_at.desc(), User.id.desc())
+            .offset(offset)
+            .limit(limit + 1)
+        )
+        current_page = None if cursor else page
+        has_prev = offset > 0
+    
+    users = list((await db.execute(stmt)).scalars().all())
+    
+    # Lấy dư 1 record để biết còn trang sau
+    has_next = len(users) > limit
+    users = users[:limit]
+    next_cursor = None
+    if has_next:
+        if rank_order:
+            next_cursor = encode_offset_cursor(offset + limit)
+        else:
+            next_cursor = encode_cursor(users[-1].created_at, users[-1].id)
+    
+    pagination_info = {
+        "current_page": current_page,
+        "total_pages": total_pages,
+        "total_items": total_items,
+        "items_per_page": limit,
+        "has_next": has_next,
+        "has_prev": has_prev,
+        "next_cursor": next_cursor,
+    }
+    
+    return users, pagination_info
+
+
+async def create_user(db: AsyncSession, user_in: UserCreate, hashed_password: Optional[str] = None) -> User:
+    """
+    Tạo user mới. Password được hash qua password_service (không block event loop).
+    
+    Raises:
+        UniqueFieldError: nếu email/số điện thoại/CCCD đã được sử dụng
+    """
+    if hashed_password is None:
+        hashed_password = await password_service.hash(user_in.password)
+    
+    db_user = User(
+        full_name=user_in.full_name,
+        email=user_in.email,
+        phone_number=user_in.phone_number,
+        cccd=user_in.cccd,
+        role=user_in.role,
+        is_active=user_in.is_active,
+        hashed_password=hashed_password,
+    )
+    
+    db.add(db_user)
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        raise_for_integrity_error(e)
+    await db.refresh(db_user)
+    return db_user
+
+
+async def update_user(db: AsyncSession, user: User, user_in: UserUpdate) -> User:
+    """Cập nhật thông tin user."""
+    update_data = user_in.dict(exclude_unset=True)
+    
+    # Xử lý password riêng nếu có
+    if "password" in update_data:
+        password = update_data.pop("password")
+        if password:  # Chỉ hash nếu password không rỗng
+            update_data["hashed_password"] = await password_service.hash(password)
+    
+    # Đổi mật khẩu hoặc khóa tài khoản: phiên đăng nhập hiện có phải hết hiệu lực
+    revoke_sessions = "hashed_password" in update_data or (
+        user.is_active and update_data.get("is_active") is False
+    )
+    for field, value in update_data.items():
+        setattr(user, field, value)
+    
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        raise_for_integrity_error(e)
+    await db.refresh(user)
+    principal_cache.invalidate(user.uid)
+    if revoke_sessions:
+        await crud_session.arevoke_user_sessions(db, user)
+    return user
+
+
+async def delete_user(db: AsyncSession, user: User) -> bool:
+    """Xóa user."""
+    # Access token đang dùng của user hết hiệu lực ngay (phiên bị xóa theo user)
+    await crud_session.arevoke_user_sessions(db, user)
+    uid = user.uid
+    await db.delete(user)
+    await db.commit()
+    principal_cache.invalidate(uid)
+    return True
+
+
+async def update_user_status(db: AsyncSession, user: User, is_active: bool) -> User:
+    """Cập nhật trạng thái active của user."""
+    user.is_active = is_active
+    await db.commit()
+    await db.refresh(user)
+    principal_cache.invalidate(user.uid)
+    if not is_active:
+        # Khóa tài khoản: refresh token và access token đang dùng hết hiệu lực ngay
+        await crud_session.arevoke_user_sessions(db, user)
+    return user
+
+
+async def change_user_password(db: AsyncSession, user: User, new_password: str) -> User:
+    """Đổi mật khẩu user."""
+    user.hashed_password = await password_service.hash(new_password)
+    await db.commit()
+    await db.refresh(user)
+    principal_cache.invalidate(user.uid)
+    # Phiên đăng nhập bằng mật khẩu cũ (refresh lẫn access token) hết hiệu lực ngay
+    await crud_session.arevoke_user_sessions(db, user)
+    return user
+
+
+async def rehash_user_password(db: AsyncSession, user_id: int, old_hash: str, new_hash: str) -> bool:
+    """Lưu hash mới sau khi đăng nhập đúng (chỉ khi hash trong DB vẫn là `old_hash`)."""
+    result = await db.execute(
+        update(User)
+        .where(User.id == user_id, User.hashed_password == old_hash)
+        .values(hashed_password=new_hash)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount == 1
+
+
+async def _exists(db: AsyncSession, condition, exclude_uid: Optional[str]) -> bool:
+    stmt = select(User.id).filter(condition)
+    if exclude_uid:
+        stmt = stmt.filter(User.uid != exclude_uid)
+    return (await db.scalar(stmt.limit(1))) is not None
+
+
+async def check_email_exists(db: AsyncSession, email: str, exclude_uid: Optional[str] = None) -> bool:
+    """Kiểm tra email đã tồn tại chưa (dùng cho validation)."""
+    return await _exists(db, User.email == email, exclude_uid)
+
+
+async def check_phone_exists(db: AsyncSession, phone: str, exclude_uid: Optional[str] = None) -> bool:
+    """Kiểm tra số điện thoại đã tồn tại chưa."""
+    return await _exists(db, User.phone_number == phone, exclude_uid)
+
+
+async def check_cccd_exists(db: AsyncSession, cccd: str, exclude_uid: Optional[str] = None) -> bool:
+    """Kiểm tra CCCD đã tồn tại chưa."""
+    return await _exists(db, User.cccd == cccd, exclude_uid)
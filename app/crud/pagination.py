@@ -0,0 +1,138 @@
+# app/crud/pagination.py
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, Optional, Tuple
+
+from sqlalchemy import String, tuple_, type_coerce
+from sqlalchemy.orm import Query
+
+
+class InvalidCursorError(ValueError):
+    """Cursor không hợp lệ (bị sửa, sai định dạng...)."""
+
+
+def encode_cursor(created_at: Optional[datetime], id: int) -> str:
+    """Mã hóa vị trí (created_at, id) thành cursor opaque, an toàn cho URL."""
+    payload = {"c": created_at.isoformat() if created_at else None, "i": id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    """Giải mã cursor thành (created_at, id)."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at = datetime.fromisoformat(payload["c"]) if payload["c"] else None
+        return created_at, int(payload["i"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursorError("Cursor không hợp lệ") from exc
+
+
+def encode_offset_cursor(offset: int) -> str:
+    """
+    Cursor cho danh sách không xếp theo khóa ổn định (vd: kết quả tìm kiếm
+    xếp theo độ liên quan): chỉ là vị trí bắt đầu của trang tiếp theo.
+    """
+    raw = json.dumps({"o": offset}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_offset_cursor(cursor: str) -> int:
+    """Giải mã cursor của encode_offset_cursor."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = int(json.loads(base64.urlsafe_b64decode(padded.encode()))["o"])
+    except (ValueError, KeyError, TypeError) as exc:
+        raise InvalidCursorError("Cursor không hợp lệ") from exc
+    if offset < 0:
+        raise InvalidCursorError("Cursor không hợp lệ")
+    return offset
+
+
+def _sqlite_timestamp(value: datetime) -> str:
+    # SQLite lưu DateTime dạng text: CURRENT_TIMESTAMP không có phần micro giây,
+    # còn bind param của SQLAlchemy luôn có ".ffffff". Format giống hệt giá trị
+    # đã lưu để so sánh chuỗi cho đúng.
+    if value.microsecond:
+        return value.strftime("%Y-%m-%d %H:%M:%S.%f")
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def apply_keyset(
+    query: Query,
+    created_at_column: Any,
+    id_column: Any,
+    cursor: Optional[str],
+    limit: int,
+    dialect_name: Optional[str] = None,
+) -> Query:
+    """
+    Áp dụng keyset pagination theo (created_at DESC, id DESC).
+
+    Nhận cả Query (sync) lẫn Select (async); với Select phải truyền
+    `dialect_name` vì statement không gắn với session.
+    Lấy dư 1 record để caller biết còn trang sau hay không.
+    """
+    if cursor:
+        created_at, last_id = decode_cursor(cursor)
+        if created_at is None:
+            query = query.filter(id_column < last_id)
+        else:
+            column = created_at_column
+            value: Any = created_at
+            if dialect_name is None:
+                dialect_name = query.session.get_bind().dialect.name
+            if dialect_name == "sqlite":
+                column = type_coerce(created_at_column, String)
+                value = _sqlite_timestamp(created_at)
+            # Row-value comparison để DB dùng được index (created_at, id)
+            query = query.filter(tuple_(column, id_column) < tuple_(value, last_id))
+    return query.order_by(created_at_column.desc(), id_column.desc()).limit(limit + 1)
+
+
+def encode_value_cursor(value: Any, id: int) -> str:
+    """Cursor cho keyset theo một cột giá trị bất kỳ (vd: price) + id."""
+    payload = {"v": str(value), "i": id}
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_value_cursor(cursor: str, parse: Callable[[str], Any]) -> Tuple[Any, int]:
+    """Giải mã cursor của encode_value_cursor, `parse` đổi chuỗi về kiểu của cột."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return parse(payload["v"]), int(payload["i"])
+    except (ValueError, KeyError, TypeError, ArithmeticError) as exc:
+        raise InvalidCursorError("Cursor không hợp lệ") from exc
+
+
+def apply_value_keyset(
+    query: Query,
+    column: Any,
+    id_column: Any,
+    cursor: Optional[str],
+    limit: int,
+    descending: bool = False,
+    parse: Callable[[str], Any] = str,
+) -> Query:
+    """
+    Keyset pagination theo (column, id), tăng hoặc giảm dần.
+
+    Cần index kết thúc bằng (column, id) để DB đọc tiếp từ vị trí cursor thay
+    vì OFFSET. Lấy dư 1 record như apply_keyset.
+    """
+    if cursor:
+        value, last_id = decode_value_cursor(cursor, parse)
+        if descending:
+            query = query.filter(tuple_(column, id_column) < tuple_(value, last_id))
+        else:
+            query = query.filter(tuple_(column, id_column) > tuple_(value, last_id))
+    if descending:
+        query = query.order_by(column.desc(), id_column.desc())
+    else:
+        query = query.order_by(column.asc(), id_column.asc())
+    return query.limit(limit + 1)
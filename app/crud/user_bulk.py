@@ -0,0 +1,338 @@
+# app/crud/user_bulk.py
+#
+# Import/export user hàng loạt (admin onboard affiliator/customer theo lô).
+
+import codecs
+import csv
+import io
+import json
+from itertools import islice
+from typing import Any, Dict, IO, Iterator, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import insert, literal, select, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.core.password_service import password_service
+from app.core.utils import normalize_search_text
+from app.crud.user_uniqueness import UNIQUE_FIELDS, conflict_fields
+from app.models.user import User, UserRole
+from app.schemas.user import UserCreate
+
+IMPORT_FORMATS = ("csv", "ndjson")
+
+# Cột của file export (không bao giờ có hashed_password)
+EXPORT_FIELDS = ("uid", "full_name", "email", "phone_number", "cccd", "role", "is_active", "created_at")
+
+Row = Tuple[int, Any]  # (số dòng trong file, dict hoặc lỗi parse)
+
+
+class RowError(ValueError):
+    """Dòng không đọc được (JSON hỏng...)."""
+
+
+class ImportFileError(ValueError):
+    """Cả file không đọc được (vd: header không phải UTF-8)."""
+
+
+NOT_UTF8 = "Dòng không phải UTF-8 (hãy lưu file với encoding UTF-8)"
+
+
+def _decoded_lines(file: IO[bytes], bad_lines: Set[int]) -> Iterator[str]:
+    """
+    Giải mã từng dòng UTF-8 (bỏ BOM ở đầu file). Dòng không phải UTF-8 được
+    giải mã kèm ký tự thay thế và ghi số dòng vào `bad_lines`, để chỉ dòng
+    đó bị đánh lỗi thay vì cả request.
+    """
+    for line_num, raw in enumerate(file, start=1):
+        if line_num == 1 and raw.startswith(codecs.BOM_UTF8):
+            raw = raw[len(codecs.BOM_UTF8):]
+        try:
+            yield raw.decode("utf-8")
+        except UnicodeDecodeError:
+            bad_lines.add(line_num)
+            yield raw.decode("utf-8", errors="replace")
+
+
+def _iter_csv_rows(file: IO[bytes]) -> Iterator[Row]:
+    bad_lines: Set[int] = set()
+    reader = csv.DictReader(_decoded_lines(file, bad_lines))
+    try:
+        reader.fieldnames
+    except csv.Error as e:
+        raise ImportFileError(f"Header CSV không hợp lệ: {e}")
+    if bad_lines:
+        raise ImportFileError("Header không phải UTF-8 (hãy lưu file với encoding UTF-8)")
+
+    while True:
+        first_line = reader.line_num + 1
+        try:
+            record = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            yield reader.line_num, RowError(f"CSV không hợp lệ: {e}")
+            continue
+        if any(first_line <= line_num <= reader.line_num for line_num in bad_lines):
+            yield reader.line_num, RowError(NOT_UTF8)
+            continue
+        # Bỏ cột thừa (key None) và ô trống để áp dụng giá trị mặc định của schema
+        yield reader.line_num, {
+            key.strip(): value.strip()
+            for key, value in record.items()
+            if key is not None and isinstance(value, str) and value.strip()
+        }
+
+
+def _iter_ndjson_rows(file: IO[bytes]) -> Iterator[Row]:
+    bad_lines: Set[int] = set()
+    for line_num, line in enumerate(_decoded_lines(file, bad_lines), start=1):
+        if line_num in bad_lines:
+            yield line_num, RowError(NOT_UTF8)
+            continue
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            yield line_num, RowError("JSON không hợp lệ")
+            continue
+        if not isinstance(record, dict):
+            yield line_num, RowError("Mỗi dòng phải là một JSON object")
+            continue
+        yield line_num, {key: value for key, value in record.items() if value not in (None, "")}
+
+
+def iter_import_rows(file: IO[bytes], fmt: str) -> Iterator[Row]:
+    """
+    Đọc từng dòng từ file upload (đã được Starlette spool ra disk), không
+    nạp cả file vào RAM. Trả về (số dòng, dict) hoặc (số dòng, RowError).
+
+    Raises:
+        ImportFileError: header CSV không đọc được (trước khi trả dòng nào)
+    """
+    if fmt == "csv":
+        return _iter_csv_rows(file)
+    return _iter_ndjson_rows(file)
+
+
+def _row_email(value: Any) -> Optional[str]:
+    """Email để báo lỗi theo dòng (NDJSON có thể gửi số, list...)."""
+    return str(value) if value is not None else None
+
+
+def _validation_messages(error: ValidationError) -> List[str]:
+    return [
+        f"{'.'.join(str(part) for part in item['loc'])}: {item['msg']}"
+        for item in error.errors()
+    ]
+
+
+async def find_existing_values(
+    db: AsyncSession, values: Dict[str, Set[str]]
+) -> Dict[str, Set[str]]:
+    """
+    Các giá trị đã có trong DB của từng trường unique, bằng một query
+    UNION ALL (mỗi nhánh là một IN (...) dùng index unique của cột).
+    """
+    selects = [
+        select(literal(field).label("field"), getattr(User, field).label("value"))
+        .where(getattr(User, field).in_(field_values))
+        for field, field_values in values.items()
+        if field_values
+    ]
+    existing: Dict[str, Set[str]] = {field: set() for field in values}
+    if not selects:
+        return existing
+    result = await db.execute(union_all(*selects))
+    for field, value in result:
+        existing[field].add(value)
+    return existing
+
+
+def _user_row(user_in: UserCreate, hashed_password: str) -> Dict[str, Any]:
+    # Core insert không chạy event before_insert của ORM: tự điền search_text
+    return {
+        "full_name": user_in.full_name,
+        "email": user_in.email,
+        "phone_number": user_in.phone_number,
+        "cccd": user_in.cccd,
+        "role": UserRole(user_in.role.value),
+        "is_active": user_in.is_active,
+        "hashed_password": hashed_password,
+        "search_text": normalize_search_text(user_in.full_name, user_in.email),
+    }
+
+
+async def _insert_rows(
+    db: AsyncSession, rows: List[Tuple[int, Dict[str, Any]]], errors: List[dict]
+) -> int:
+    """
+    Insert cả chunk bằng một executemany. Nếu va unique constraint (request
+    khác vừa tạo cùng email...), insert lại từng dòng trong savepoint để chỉ
+    đánh lỗi đúng dòng bị trùng.
+    """
+    if not rows:
+        return 0
+    try:
+        await db.execute(insert(User), [row for _, row in rows])
+        await db.commit()
+        return len(rows)
+    except IntegrityError:
+        await db.rollback()
+
+    created = 0
+    for line_num, row in rows:
+        try:
+            async with db.begin_nested():
+                await db.execute(insert(User), [row])
+            created += 1
+        except IntegrityError as e:
+            messages = [UNIQUE_FIELDS[field] for field in conflict_fields(e)] or ["Dữ liệu bị trùng với user đã có"]
+            errors.append({"line": line_num, "email": row["email"], "errors": messages})
+    await db.commit()
+    return created
+
+
+async def import_users(
+    db: AsyncSession, file: IO[bytes], fmt: str, chunk_size: int = 500
+) -> Dict[str, Any]:
+    """
+    Import user từ file CSV/NDJSON theo từng chunk.
+
+    Mỗi chunk: validate bằng UserCreate, kiểm tra trùng trong chunk và với DB
+    (một query cho cả chunk), hash password song song trong password_service,
+    rồi insert bằng một executemany và commit. Dòng lỗi không chặn các dòng
+    khác; kết quả có danh sách lỗi theo số dòng.
+
+    Raises:
+        ValueError: nếu fmt không hợp lệ
+        ImportFileError: header CSV không đọc được (chưa có dòng nào được tạo)
+    """
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"format phải là một trong {IMPORT_FORMATS}")
+
+    rows = iter_import_rows(file, fmt)
+    # Giá trị unique đã gặp ở các chunk trước (trùng trong cùng file)
+    seen: Dict[str, Set[str]] = {field: set() for field in UNIQUE_FIELDS}
+    errors: List[dict] = []
+    total = created = 0
+
+    while True:
+        # Đọc file (I/O đồng bộ) ngoài event loop
+        chunk = await run_in_threadpool(lambda: list(islice(rows, chunk_size)))
+        if not chunk:
+            break
+        total += len(chunk)
+
+        valid: List[Tuple[int, UserCreate]] = []
+        for line_num, record in chunk:
+            if isinstance(record, RowError):
+                errors.append({"line": line_num, "email": None, "errors": [str(record)]})
+                continue
+            try:
+                user_in = UserCreate(**record)
+            except ValidationError as e:
+                errors.append({"line": line_num, "email": _row_email(record.get("email")), "errors": _validation_messages(e)})
+                continue
+            valid.append((line_num, user_in))
+
+        existing = await find_existing_values(db, {
+            field: {getattr(user_in, field) for _, user_in in valid if getattr(user_in, field)}
+            for field in UNIQUE_FIELDS
+        })
+
+        accepted: List[Tuple[int, UserCreate]] = []
+        for line_num, user_in in valid:
+            messages = []
+            for field, message in UNIQUE_FIELDS.items():
+                value = getattr(user_in, field)
+                if not value:
+                    continue
+                if value in existing[field]:
+                    messages.append(message)
+                elif value in seen[field]:
+                    messages.append(f"{message} ở dòng trước trong file")
+            if messages:
+                errors.append({"line": line_num, "email": user_in.email, "errors": messages})
+                continue
+            for field in UNIQUE_FIELDS:
+                value = getattr(user_in, field)
+                if value:
+                    seen[field].add(value)
+            accepted.append((line_num, user_in))
+
+        hashes = await password_service.hash_many([user_in.password for _, user_in in accepted])
+        created += await _insert_rows(
+            db,
+            [(line_num, _user_row(user_in, hashed)) for (line_num, user_in), hashed in zip(accepted, hashes)],
+            errors,
+        )
+
+    errors.sort(key=lambda error: error["line"])
+    return {"total": total, "created": created, "failed": total - created, "errors": errors}
+
+
+def _format_value(value: Any) -> Any:
+    if isinstance(value, UserRole):
+        return value.value
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return value
+
+
+def parse_export_role(role: Optional[str]) -> Optional[UserRole]:
+    """
+    Role lọc export: None/"all" là không lọc.
+
+    Raises:
+        ValueError: role không hợp lệ
+    """
+    if not role or role == "all":
+        return None
+    return UserRole(role)
+
+
+def iter_export_rows(
+    db: Session, fmt: str, role: Optional[str] = None, batch_size: int = 1000
+) -> Iterator[str]:
+    """
+    Sinh nội dung file export từng dòng một.
+
+    Dùng server-side cursor (stream_results) và đọc theo batch nên bộ nhớ
+    không phụ thuộc số user. Generator được StreamingResponse chạy trong
+    threadpool; caller kiểm tra `role` bằng parse_export_role trước khi
+    bắt đầu stream.
+
+    Raises:
+        ValueError: role không hợp lệ
+    """
+    columns = [getattr(User, field) for field in EXPORT_FIELDS]
+    stmt = select(*columns).order_by(User.id)
+    role_filter = parse_export_role(role)
+    if role_filter is not None:
+        stmt = stmt.where(User.role == role_filter)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if fmt == "csv":
+        writer.writerow(EXPORT_FIELDS)
+
+    result = db.execute(stmt.execution_options(stream_results=True, yield_per=batch_size))
+    for partition in result.partitions():
+        for row in partition:
+            values = [_format_value(value) for value in row]
+            if fmt == "csv":
+                writer.writerow(values)
+            else:
+                buffer.write(json.dumps(dict(zip(EXPORT_FIELDS, values)), ensure_ascii=False))
+                buffer.write("\n")
+        # Mỗi batch là một chunk của response
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
@@ -0,0 +1,108 @@
+# app/crud/user_search.py
+
+import re
+import time
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, inspect, literal_column, table, column, text
+from sqlalchemy.orm import Query, Session
+
+from app.core.utils import normalize_search_text
+from app.models.user import User
+
+
+def _escape_like(term: str) -> str:
+    return term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class UserSearchBackend(ABC):
+    """Backend tìm kiếm user theo tên/email."""
+
+    @abstractmethod
+    def apply(self, query: Query, term: str) -> Tuple[Query, List]:
+        """
+        Nhận query và từ khóa (đã chuẩn hóa), trả về query đã filter cùng
+        danh sách biểu thức ORDER BY để xếp hạng kết quả (có thể rỗng).
+        """
+
+
+class LikeSearchBackend(UserSearchBackend):
+    """Fallback: LIKE '%term%' trên search_text (không dùng được index)."""
+
+    def apply(self, query: Query, term: str) -> Tuple[Query, List]:
+        pattern = f"%{_escape_like(term)}%"
+        return query.filter(User.search_text.like(pattern, escape="\\")), []
+
+
+class PostgresTrigramSearchBackend(UserSearchBackend):
+    """
+    PostgreSQL: pg_trgm GIN index trên users.search_text.
+
+    LIKE '%term%' được index ix_users_search_text_trgm phục vụ, kết quả xếp
+    theo similarity().
+    """
+
+    def apply(self, query: Query, term: str) -> Tuple[Query, List]:
+        pattern = f"%{_escape_like(term)}%"
+        query = query.filter(User.search_text.like(pattern, escape="\\"))
+        return query, [func.similarity(User.search_text, term).desc()]
+
+
+class SqliteFtsSearchBackend(UserSearchBackend):
+    """
+    SQLite: bảng FTS5 users_fts (external content = users), đồng bộ bằng trigger.
+
+    Mỗi từ khóa được match theo prefix, kết quả xếp theo bm25().
+    """
+
+    fts = table("users_fts", column("rowid"))
+
+    def apply(self, query: Query, term: str) -> Tuple[Query, List]:
+        tokens = [t for t in re.split(r"\W+", term) if t]
+        if not tokens:
+            return query, []
+        match = " ".join(f'"{t}"*' for t in tokens)
+        query = query.join(self.fts, self.fts.c.rowid == User.id).filter(
+            text("users_fts MATCH :users_fts_query").bindparams(users_fts_query=match)
+        )
+        return query, [func.bm25(literal_column("users_fts")).asc()]
+
+
+# Fallback LIKE chỉ được cache ngắn: chạy migration tạo users_fts sau khi app
+# đã khởi động thì lần kiểm tra lại kế tiếp sẽ chuyển sang FTS
+_FALLBACK_RECHECK_SECONDS = 60.0
+
+_backends_by_bind: Dict[str, Tuple[UserSearchBackend, Optional[float]]] = {}
+
+
+def _detect_backend(bind) -> Tuple[UserSearchBackend, bool]:
+    """(backend, có phải fallback không)."""
+    dialect = bind.dialect.name
+    if dialect == "postgresql":
+        return PostgresTrigramSearchBackend(), False
+    if dialect == "sqlite" and inspect(bind).has_table("users_fts"):
+        return SqliteFtsSearchBackend(), False
+    # DB chưa chạy migration tạo bảng FTS (vd: create_all khi dev)
+    return LikeSearchBackend(), True
+
+
+def get_user_search_backend(db: Session) -> UserSearchBackend:
+    """Chọn backend phù hợp với dialect của DB (cache theo engine URL)."""
+    bind = db.get_bind()
+    key = str(bind.url)
+    now = time.monotonic()
+    cached = _backends_by_bind.get(key)
+    if cached is not None and (cached[1] is None or cached[1] > now):
+        return cached[0]
+    backend, fallback = _detect_backend(bind)
+    _backends_by_bind[key] = (backend, now + _FALLBACK_RECHECK_SECONDS if fallback else None)
+    return backend
+
+
+def apply_user_search(db: Session, query: Query, search: Optional[str]) -> Tuple[Query, List]:
+    """Chuẩn hóa từ khóa (bỏ dấu) rồi áp dụng backend tìm kiếm."""
+    term = normalize_search_text(search) if search else ""
+    if not term:
+        return query, []
+    return get_user_search_backend(db).apply(query, term)
@@ -0,0 +1,132 @@
+# app/crud/user_uniqueness.py
+#
+# Kiểm tra các trường unique của user (email, số điện thoại, CCCD).
+
+import re
+from typing import Dict, List, Optional
+
+from sqlalchemy import exists, literal, select, union_all
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.user import User
+
+# Trường unique (theo thứ tự ưu tiên báo lỗi) và thông báo tương ứng
+UNIQUE_FIELDS = {
+    "email": "Email đã được sử dụng",
+    "phone_number": "Số điện thoại đã được sử dụng",
+    "cccd": "Số CCCD đã được sử dụng",
+}
+
+# SQLite: "UNIQUE constraint failed: users.email"
+_SQLITE_UNIQUE = re.compile(r"UNIQUE constraint failed: (.+)")
+# PostgreSQL: 'DETAIL:  Key (email)=(a@x.com) already exists.'
+_POSTGRES_KEY = re.compile(r"Key \(([^)]+)\)=")
+
+
+class UniqueFieldError(ValueError):
+    """Một hoặc nhiều trường unique đã được user khác sử dụng."""
+
+    def __init__(self, fields: List[str]):
+        self.fields = fields
+        super().__init__(self.detail)
+
+    @property
+    def detail(self) -> str:
+        """Thông báo cho trường đầu tiên bị trùng (giống các check_*_exists trước đây)."""
+        return UNIQUE_FIELDS[self.fields[0]]
+
+
+def _conflicts_statement(values: Dict[str, Optional[str]], exclude_uid: Optional[str]):
+    """
+    Một câu query cho mọi trường:
+        SELECT 'email' WHERE EXISTS (SELECT 1 FROM users WHERE email = ? AND uid != ?)
+        UNION ALL SELECT 'phone_number' WHERE EXISTS (...) ...
+    Chỉ trả về tên các trường bị trùng, mỗi EXISTS dừng ở dòng index đầu tiên.
+    """
+    selects = []
+    for field in UNIQUE_FIELDS:
+        value = values.get(field)
+        if not value:
+            continue
+        condition = exists().where(getattr(User, field) == value)
+        if exclude_uid:
+            condition = condition.where(User.uid != exclude_uid)
+        selects.append(select(literal(field).label("field")).where(condition))
+    if not selects:
+        return None
+    return selects[0] if len(selects) == 1 else union_all(*selects)
+
+
+def _ordered(fields) -> List[str]:
+    found = set(fields)
+    return [field for field in UNIQUE_FIELDS if field in found]
+
+
+def find_conflicts(
+    db: Session, values: Dict[str, Optional[str]], exclude_uid: Optional[str] = None
+) -> List[str]:
+    """Tên các trường trong `values` đã được user khác (khác exclude_uid) sử dụng."""
+    stmt = _conflicts_statement(values, exclude_uid)
+    if stmt is None:
+        return []
+    return _ordered(db.execute(stmt).scalars())
+
+
+async def afind_conflicts(
+    db: AsyncSession, values: Dict[str, Optional[str]], exclude_uid: Optional[str] = None
+) -> List[str]:
+    """Bản async của find_conflicts."""
+    stmt = _conflicts_statement(values, exclude_uid)
+    if stmt is None:
+        return []
+    return _ordered((await db.execute(stmt)).scalars())
+
+
+def ensure_unique(
+    db: Session, values: Dict[str, Optional[str]], exclude_uid: Optional[str] = None
+) -> None:
+    """
+    Kiểm tra trước khi ghi để báo lỗi sớm.
+
+    Không thay được unique constraint (request đồng thời vẫn có thể chen vào
+    giữa); lúc commit dùng `conflict_fields` để báo cùng lỗi.
+
+    Raises:
+        UniqueFieldError: nếu có trường bị trùng
+    """
+    fields = find_conflicts(db, values, exclude_uid)
+    if fields:
+        raise UniqueFieldError(fields)
+
+
+def conflict_fields(error: IntegrityError) -> List[str]:
+    """Các trường unique của users bị vi phạm trong IntegrityError (rỗng nếu là lỗi khác)."""
+    message = str(error.orig)
+    columns: List[str] = []
+
+    match = _SQLITE_UNIQUE.search(message)
+    if match:
+        columns = [column.strip().split(".")[-1] for column in match.group(1).split(",")]
+    else:
+        match = _POSTGRES_KEY.search(message)
+        if match:
+            columns = [column.strip() for column in match.group(1).split(",")]
+        else:
+            # Không có DETAIL: dựa vào tên constraint/index (ix_users_email, users_cccd_key...)
+            constraint = getattr(getattr(error.orig, "diag", None), "constraint_name", None) or ""
+            columns = [field for field in UNIQUE_FIELDS if constraint.endswith(f"_{field}") or constraint.endswith(f"_{field}_key")]
+
+    return _ordered(column for column in columns if column in UNIQUE_FIELDS)
+
+
+def raise_for_integrity_error(error: IntegrityError) -> None:
+    """
+    Đổi IntegrityError do trùng email/số điện thoại/CCCD thành UniqueFieldError.
+    Lỗi khác được raise lại nguyên vẹn. Caller phải rollback session trước.
+    """
+    fields = conflict_fields(error)
+    if fields:
+        raise UniqueFieldError(fields) from error
+    raise error
@@ -6,4 +6,8 @@
 from app.db.base_class import Base  # MỚI: Import từ file base_class
 from app.models.user import User
 from app.models.shop import Shop
-# ... sau này import các model khác như Product, Order ở đây
\ No newline at end of file
+from app.models.stored_file import StoredFile, FileUpload
+from app.models.product import Category, Product, ProductVariant, ProductImage
+from app.models.order import Order, OrderItem, IdempotencyKey
+from app.models.user_session import UserSession
+# ... sau này import các model khác ở đây
\ No newline at end of file
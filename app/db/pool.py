@@ -0,0 +1,170 @@
+# app/db/pool.py
+
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.core.config import settings
+
+
+class PoolStats:
+    """Bộ đếm cho một pool: số lần checkout, thời gian chờ, số lần timeout."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.waits_over_threshold = 0
+
+    def record(self, waited: float, timed_out: bool = False) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            if waited * 1000 >= settings.DB_POOL_SLOW_CHECKOUT_MS:
+                self.waits_over_threshold += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+                "slow_checkouts": self.waits_over_threshold,
+            }
+
+
+class _TimedPoolMixin:
+    """Đo thời gian chờ lấy connection từ pool (kể cả khi timeout)."""
+
+    stats: PoolStats
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.stats.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - started)
+        return connection
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+
+class TimedAsyncAdaptedQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.stats = PoolStats()
+
+
+# Driver async tương ứng với từng dialect
+_ASYNC_DRIVERS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """Đổi DATABASE_URL (driver sync) sang driver async: asyncpg / aiosqlite."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    driver = _ASYNC_DRIVERS.get(backend)
+    if driver is None:
+        raise ValueError(f"Không hỗ trợ async cho database: {backend}")
+    return parsed.set(drivername=f"{backend}+{driver}").render_as_string(hide_password=False)
+
+
+def engine_options(url: str, is_async: bool = False) -> Dict[str, Any]:
+    """
+    Tham số create_engine/create_async_engine lấy từ Settings.
+
+    - Bình thường: QueuePool có đo thời gian chờ, kích thước/overflow/timeout/
+      recycle cấu hình được; pre-ping tùy chọn (mỗi checkout tốn thêm 1 round-trip,
+      có thể tắt và dựa vào pool_recycle)
+    - DB_PGBOUNCER: NullPool (PgBouncer đã pool phía server) và tắt cache
+      prepared statement của asyncpg (transaction pooling không giữ được
+      prepared statement giữa các transaction)
+    """
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    options: Dict[str, Any] = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+
+    if backend == "sqlite" and (is_async or parsed.database in (None, "", ":memory:")):
+        # SQLite in-memory / aiosqlite giữ pool mặc định của dialect: aiosqlite
+        # dùng NullPool, connection giữ lại trong pool sẽ giữ thread worker
+        # của aiosqlite khiến process không thoát được
+        return options
+
+    if settings.DB_PGBOUNCER and backend == "postgresql":
+        options["poolclass"] = NullPool
+        if is_async:
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                # Tên prepared statement duy nhất để không đụng nhau khi
+                # PgBouncer chuyển transaction sang server connection khác
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+            }
+        return options
+
+    options.update(
+        poolclass=TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return options
+
+
+_engines: Dict[str, Any] = {}
+
+
+def register_engine(name: str, engine: Any) -> None:
+    """Đăng ký engine (sync hoặc async) để xuất metrics."""
+    _engines[name] = engine
+
+
+def _pool_snapshot(engine: Any) -> Dict[str, Any]:
+    sync_engine: Engine = getattr(engine, "sync_engine", engine)
+    pool = sync_engine.pool
+    data: Dict[str, Any] = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        data.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            checked_in=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            timeout=pool.timeout(),
+        )
+    stats: Optional[PoolStats] = getattr(pool, "stats", None)
+    if stats is not None:
+        data.update(stats.snapshot())
+    return data
+
+
+def pool_metrics() -> Dict[str, Dict[str, Any]]:
+    """Trạng thái hiện tại của tất cả pool đã đăng ký."""
+    return {name: _pool_snapshot(engine) for name, engine in _engines.items()}
@@ -0,0 +1,173 @@
+# app/db/replicas.py
+
+import itertools
+import threading
+import time
+from typing import Any, Callable, List, Optional
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.pool import engine_options, get_async_database_url, register_engine
+
+
+class RoutingSession(Session):
+    """
+    Session định tuyến theo loại câu lệnh.
+
+    Khi được tạo với `replica`, mọi SELECT đi tới replica đó (cố định trong
+    suốt session để các query của một request nhìn cùng một snapshot); flush
+    và INSERT/UPDATE/DELETE luôn đi về primary. Không có replica thì giống
+    hệt Session thường.
+    """
+
+    def __init__(self, *args: Any, replica: Optional[Engine] = None, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.replica = replica
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self.replica is not None and not self._flushing and not isinstance(clause, UpdateBase):
+            return self.replica
+        return super().get_bind(mapper, clause=clause, **kw)
+
+    def _connection_for_bind(self, engine, execution_options=None, **kw):
+        if engine is not self.replica:
+            return super()._connection_for_bind(engine, execution_options, **kw)
+        try:
+            return super()._connection_for_bind(engine, execution_options, **kw)
+        except exc.DBAPIError as error:
+            if not error.connection_invalidated and not isinstance(error, exc.OperationalError):
+                raise
+            # Không kết nối được replica (đã bị đánh dấu lỗi qua handle_error):
+            # phần còn lại của session đọc từ primary
+            self.replica = None
+            return super()._connection_for_bind(self.bind, execution_options, **kw)
+
+
+class Replica:
+    """Một read replica: engine sync + async và trạng thái health."""
+
+    def __init__(self, name: str, url: str, async_url: str, cooldown: float, timer: Callable[[], float]):
+        self.name = name
+        self.engine = create_engine(url, **engine_options(url))
+        self.async_engine: AsyncEngine = create_async_engine(async_url, **engine_options(async_url, is_async=True))
+        self.cooldown = cooldown
+        self._timer = timer
+        self.unhealthy_until = 0.0
+        self.failures = 0
+        register_engine(name, self.engine)
+        register_engine(f"{name}_async", self.async_engine)
+        for sync_engine in (self.engine, self.async_engine.sync_engine):
+            event.listen(sync_engine, "handle_error", self._on_error)
+
+    @property
+    def healthy(self) -> bool:
+        return self._timer() >= self.unhealthy_until
+
+    def mark_unhealthy(self) -> None:
+        self.failures += 1
+        self.unhealthy_until = self._timer() + self.cooldown
+
+    def _on_error(self, context) -> None:
+        # Chỉ lỗi kết nối mới loại replica; lỗi SQL thông thường thì bỏ qua
+        if context.is_disconnect or context.connection is None:
+            self.mark_unhealthy()
+
+
+class ReplicaRouter:
+    """
+    Chọn replica cho các dependency chỉ đọc.
+
+    - Round-robin giữa các replica đang healthy; replica vừa lỗi kết nối bị
+      bỏ qua trong `cooldown` giây rồi được thử lại
+    - Read-your-writes: principal vừa ghi (commit có flush) được đọc từ
+      primary trong `sticky_seconds` giây để không thấy dữ liệu cũ do lag
+    - Không có replica / tất cả đều lỗi: trả về None (dùng primary)
+    """
+
+    def __init__(
+        self,
+        replicas: List[Replica],
+        sticky_seconds: float,
+        max_tracked: int = 10000,
+    ):
+        self.replicas = replicas
+        self.sticky_seconds = sticky_seconds
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+        self._recent_writers = TTLCache(maxsize=max_tracked, ttl=sticky_seconds)
+
+    def mark_write(self, uid: Optional[str]) -> None:
+        if uid and self.replicas and self.sticky_seconds > 0:
+            self._recent_writers.set(uid, True)
+
+    def is_sticky(self, uid: Optional[str]) -> bool:
+        return bool(uid) and self._recent_writers.get(uid, False)
+
+    def choose(self, uid: Optional[str] = None) -> Optional[Replica]:
+        if not self.replicas or self.is_sticky(uid):
+            return None
+        with self._lock:
+            start = next(self._counter)
+        count = len(self.replicas)
+        for offset in range(count):
+            replica = self.replicas[(start + offset) % count]
+            if replica.healthy:
+                return replica
+        return None
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            replica.engine.dispose()
+            await replica.async_engine.dispose()
+
+    def status(self) -> List[dict]:
+        return [
+            {
+                "name": replica.name,
+                "healthy": replica.healthy,
+                "failures": replica.failures,
+                "retry_in": max(round(replica.unhealthy_until - replica._timer(), 3), 0.0),
+            }
+            for replica in self.replicas
+        ]
+
+
+# --- Đánh dấu principal vừa ghi ---
+#
+# Dependency lấy user hiện tại ghi uid vào session.info["principal_uid"]; session
+# nào flush thì coi là đã ghi, sau commit thì báo cho router.
+
+def _on_after_flush(session: Session, flush_context) -> None:
+    session.info["wrote"] = True
+
+
+def _on_after_commit(session: Session) -> None:
+    if session.info.pop("wrote", False):
+        replica_router.mark_write(session.info.get("principal_uid"))
+
+
+event.listen(Session, "after_flush", _on_after_flush)
+event.listen(Session, "after_commit", _on_after_commit)
+
+
+def _build_router() -> ReplicaRouter:
+    replicas = [
+        Replica(
+            name=f"replica_{index}",
+            url=url,
+            async_url=get_async_database_url(url),
+            cooldown=settings.DB_REPLICA_COOLDOWN_SECONDS,
+            timer=time.monotonic,
+        )
+        for index, url in enumerate(settings.DATABASE_REPLICA_URLS)
+    ]
+    return ReplicaRouter(replicas, sticky_seconds=settings.DB_READ_YOUR_WRITES_SECONDS)
+
+
+replica_router = _build_router()
@@ -1,12 +1,33 @@
 # app/db/session.py
 
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
+from app.db.pool import engine_options, get_async_database_url, register_engine
+from app.db.replicas import RoutingSession
 
-# Tạo engine kết nối với CSDL
-engine = create_engine(str(settings.DATABASE_URL), pool_pre_ping=True)
+# Tạo engine kết nối với CSDL (cấu hình pool lấy từ Settings, xem app/db/pool.py)
+engine = create_engine(str(settings.DATABASE_URL), **engine_options(str(settings.DATABASE_URL)))
+register_engine("primary", engine)
 
-# Tạo một lớp SessionLocal, mỗi instance của lớp này sẽ là một phiên làm việc với CSDL
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
\ No newline at end of file
+# Tạo một lớp SessionLocal, mỗi instance của lớp này sẽ là một phiên làm việc với CSDL.
+# SessionLocal(replica=...) cho session chỉ đọc đi tới read replica (xem app/db/replicas.py)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=RoutingSession)
+
+
+# Engine async chạy song song với engine sync, để chuyển dần từng endpoint sang async
+_async_url = settings.ASYNC_DATABASE_URL or get_async_database_url(str(settings.DATABASE_URL))
+async_engine = create_async_engine(_async_url, **engine_options(_async_url, is_async=True))
+register_engine("primary_async", async_engine)
+
+# expire_on_commit=False: object vẫn đọc được sau commit mà không cần lazy load
+# (lazy load ngoài greenlet của AsyncSession sẽ lỗi MissingGreenlet)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    sync_session_class=RoutingSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
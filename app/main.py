@@ -1,4 +1,6 @@
 # app/main.py
+import logging
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
@@ -9,7 +11,16 @@ from starlette.exceptions import HTTPException as StarletteHTTPException
 
 from app.api.v1.api import api_router
 from app.core.config import settings
-from app.db.session import engine
+from app.core.password_service import password_service
+from app.core.file_handler import file_handler
+from app.core.instrumentation import (
+    InstrumentationMiddleware, REQUEST_ID_HEADER, configure_request_logger, get_request_id, instrumentation_headers,
+)
+from app.core.maintenance import maintenance
+from app.core.upload_server import UploadFiles
+from app.core.tenant import TenantMiddleware
+from app.db.session import engine, async_engine
+from app.db.replicas import replica_router
 from app.db import base
 
 from fastapi.staticfiles import StaticFiles
@@ -18,6 +29,8 @@ from fastapi.staticfiles import StaticFiles
 # Điều này đảm bảo rằng tất cả models được đăng ký với SQLAlchemy
 from app.models import user  # Import các models khác khi có: shop, product, etc.
 
+logger = logging.getLogger(__name__)
+
 def create_application() -> FastAPI:
     """
     Tạo và cấu hình ứng dụng FastAPI
@@ -44,7 +57,17 @@ def create_application() -> FastAPI:
     setup_exception_handlers(app)
 
     # Serve static files
-    app.mount("/static", StaticFiles(directory="app/static"), name="static")
+    # File upload có app riêng (ETag, cache immutable, range); phải mount trước /static
+    app.mount(
+        "/static/uploads",
+        UploadFiles(
+            directory=file_handler.base_path,
+            max_age=settings.UPLOADS_CACHE_MAX_AGE,
+            accel_redirect_prefix=settings.UPLOADS_ACCEL_REDIRECT_PREFIX or None,
+        ),
+        name="uploads",
+    )
+    app.mount("/static", StaticFiles(directory="app/static", check_dir=False), name="static")
     
     return app
 
@@ -65,19 +88,29 @@ def setup_cors(app: FastAPI) -> None:
             "Authorization",
             "X-Requested-With",
             "X-Request-ID",
+            "Idempotency-Key",
         ],
+        # Cho frontend đọc được request ID và thời gian xử lý
+        expose_headers=[REQUEST_ID_HEADER, "Server-Timing"],
     )
 
 def setup_middleware(app: FastAPI) -> None:
     """
     Cấu hình các middleware bảo mật
     """
+    # Resolve shop (tenant) từ Host, gắn vào request.state.tenant
+    app.add_middleware(TenantMiddleware)
+    
     # Trusted Host Middleware - bảo vệ khỏi Host header attacks
     if settings.ALLOWED_HOSTS:
         app.add_middleware(
             TrustedHostMiddleware, 
             allowed_hosts=settings.ALLOWED_HOSTS
         )
+    
+    # Request ID, Server-Timing, đếm query - thêm sau cùng để là middleware ngoài cùng
+    configure_request_logger()
+    app.add_middleware(InstrumentationMiddleware)
 
 def setup_routers(app: FastAPI) -> None:
     """
@@ -128,7 +161,9 @@ def setup_exception_handlers(app: FastAPI) -> None:
                 "message": exc.detail,
                 "status_code": exc.status_code,
                 "path": request.url.path
-            }
+            },
+            # Giữ header của exception (WWW-Authenticate, Retry-After...)
+            headers=getattr(exc, "headers", None),
         )
     
     @app.exception_handler(RequestValidationError)
@@ -160,9 +195,12 @@ def setup_exception_handlers(app: FastAPI) -> None:
         """
         Handler cho các exception chung (500 Internal Server Error)
         """
-        # Trong production, bạn nên log lỗi chi tiết nhưng không trả về cho client
-        # import logging
-        # logging.error(f"Unhandled exception: {exc}", exc_info=True)
+        # Log chi tiết (kèm request ID để đối chiếu với log request), không trả về cho client
+        logger.error(
+            "Unhandled exception request_id=%s %s %s",
+            get_request_id(), request.method, request.url.path,
+            exc_info=exc,
+        )
         
         return JSONResponse(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -171,7 +209,9 @@ def setup_exception_handlers(app: FastAPI) -> None:
                 "message": "Internal server error",
                 "status_code": 500,
                 "path": request.url.path
-            }
+            },
+            # Response này render ngoài InstrumentationMiddleware
+            headers=instrumentation_headers(),
         )
 
 # Tạo ứng dụng FastAPI
@@ -186,6 +226,7 @@ async def startup_event():
     print(f"🚀 {settings.PROJECT_NAME} is starting up...")
     print(f"📖 Documentation available at: {settings.API_V1_STR}/docs")
     print(f"🔗 API base URL: {settings.API_V1_STR}")
+    maintenance.start()
 
 @app.on_event("shutdown")
 async def shutdown_event():
@@ -193,6 +234,11 @@ async def shutdown_event():
     Xử lý khi ứng dụng tắt
     """
     print(f"🛑 {settings.PROJECT_NAME} is shutting down...")
+    await maintenance.stop()
+    password_service.shutdown()
+    await file_handler.shutdown()
+    await async_engine.dispose()
+    await replica_router.dispose()
 
 # Nếu chạy trực tiếp file này
 if __name__ == "__main__":
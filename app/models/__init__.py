@@ -1,4 +1,8 @@
 # app/models/__init__.py
 
 from .user import User, UserRole
-from .shop import Shop
\ No newline at end of file
+from .shop import Shop
+from .stored_file import StoredFile, FileUpload
+from .product import Category, Product, ProductVariant, ProductImage
+from .order import Order, OrderItem, OrderStatus, IdempotencyKey
+from .user_session import UserSession
@@ -0,0 +1,98 @@
+# app/models/order.py
+
+import enum
+
+from sqlalchemy import (
+    Column, DateTime, Enum, ForeignKey, Index, Integer, JSON, Numeric, String, Text,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+from app.core.utils import generate_random_uid
+
+
+class OrderStatus(str, enum.Enum):
+    pending = "pending"
+    confirmed = "confirmed"
+    shipping = "shipping"
+    completed = "completed"
+    cancelled = "cancelled"
+
+
+class Order(Base):
+    __tablename__ = "orders"
+    __table_args__ = (
+        # Danh sách đơn của shop / của khách, mới nhất trước (keyset)
+        Index("ix_orders_shop_created_id", "shop_id", "created_at", "id"),
+        Index("ix_orders_customer_created_id", "customer_id", "created_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    orderid = Column(String(50), unique=True, index=True, default=lambda: generate_random_uid(16))
+    shop_id = Column(Integer, ForeignKey("shops.id", ondelete="CASCADE"), nullable=False)
+    customer_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+
+    # Thông tin giao hàng (chụp lại lúc đặt, không phụ thuộc profile user)
+    customer_name = Column(String(255), nullable=False)
+    phone_number = Column(String(20), nullable=False)
+    shipping_address = Column(String(500), nullable=False)
+    note = Column(Text)
+
+    subtotal = Column(Numeric(15, 2), nullable=False)
+    shipping_fee = Column(Numeric(15, 2), nullable=False, default=0)
+    total = Column(Numeric(15, 2), nullable=False)
+
+    status = Column(Enum(OrderStatus), default=OrderStatus.pending, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    items = relationship(
+        "OrderItem",
+        back_populates="order",
+        cascade="all, delete-orphan",
+        order_by="OrderItem.id",
+    )
+
+
+class OrderItem(Base):
+    __tablename__ = "order_items"
+
+    id = Column(Integer, primary_key=True, index=True)
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=False, index=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="SET NULL"), nullable=True)
+    variant_id = Column(Integer, ForeignKey("product_variants.id", ondelete="SET NULL"), nullable=True)
+
+    # Chụp lại tên/SKU/giá lúc đặt: sản phẩm sửa/xóa sau đó không ảnh hưởng đơn cũ
+    product_name = Column(String(255), nullable=False)
+    sku = Column(String(100), nullable=False)
+    options = Column(JSON)
+    unit_price = Column(Numeric(15, 2), nullable=False)
+    quantity = Column(Integer, nullable=False)
+    line_total = Column(Numeric(15, 2), nullable=False)
+
+    order = relationship("Order", back_populates="items")
+
+
+class IdempotencyKey(Base):
+    """
+    Idempotency-Key của request đặt hàng.
+
+    Được insert trong cùng transaction với đơn hàng: client retry cùng key
+    nhận lại đơn đã tạo thay vì tạo (và trừ kho) lần nữa. Đặt hàng thất bại
+    thì key rollback theo, retry được.
+    """
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (
+        UniqueConstraint("user_id", "key", name="uq_idempotency_keys_user_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    key = Column(String(255), nullable=False)
+    # sha256 của body request: cùng key nhưng khác nội dung là lỗi của client
+    request_hash = Column(String(64), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id", ondelete="CASCADE"), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -0,0 +1,112 @@
+# app/models/product.py
+
+from sqlalchemy import (
+    Boolean, Column, DateTime, ForeignKey, Index, Integer, JSON, Numeric, String, Text,
+    UniqueConstraint,
+)
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+from app.core.utils import generate_random_uid
+
+
+class Category(Base):
+    """Danh mục sản phẩm của một shop."""
+    __tablename__ = "categories"
+    __table_args__ = (
+        UniqueConstraint("shop_id", "slug", name="uq_categories_shop_slug"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    shop_id = Column(Integer, ForeignKey("shops.id", ondelete="CASCADE"), nullable=False)
+    name = Column(String(255), nullable=False)
+    slug = Column(String(255), nullable=False)
+    position = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class Product(Base):
+    __tablename__ = "products"
+    __table_args__ = (
+        UniqueConstraint("shop_id", "slug", name="uq_products_shop_slug"),
+        # Listing storefront: WHERE shop_id = ? AND is_active ORDER BY created_at DESC, id DESC
+        Index("ix_products_shop_active_created", "shop_id", "is_active", "created_at", "id"),
+        # Lọc khoảng giá / sắp xếp theo giá trong một shop
+        Index("ix_products_shop_active_price", "shop_id", "is_active", "price", "id"),
+        # Lọc theo danh mục rồi xếp mới nhất
+        Index("ix_products_shop_category_created", "shop_id", "category_id", "is_active", "created_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    productid = Column(String(50), unique=True, index=True, default=lambda: generate_random_uid(16))
+    shop_id = Column(Integer, ForeignKey("shops.id", ondelete="CASCADE"), nullable=False)
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="SET NULL"), nullable=True)
+
+    name = Column(String(255), nullable=False)
+    slug = Column(String(255), nullable=False)
+    description = Column(Text)
+
+    # Giá hiển thị/lọc (giá thấp nhất của các biến thể), lưu sẵn để lọc bằng index
+    price = Column(Numeric(15, 2), nullable=False, default=0)
+    compare_at_price = Column(Numeric(15, 2), nullable=True)
+
+    is_active = Column(Boolean, nullable=False, default=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    category = relationship("Category")
+    variants = relationship(
+        "ProductVariant",
+        back_populates="product",
+        cascade="all, delete-orphan",
+        order_by="ProductVariant.id",
+    )
+    images = relationship(
+        "ProductImage",
+        back_populates="product",
+        cascade="all, delete-orphan",
+        order_by="ProductImage.position",
+    )
+
+
+class ProductVariant(Base):
+    """Biến thể bán được (SKU) của sản phẩm: giá và tồn kho riêng."""
+    __tablename__ = "product_variants"
+    __table_args__ = (
+        UniqueConstraint("product_id", "sku", name="uq_product_variants_product_sku"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False, index=True)
+    sku = Column(String(100), nullable=False)
+    name = Column(String(255))
+    options = Column(JSON)  # {"color": "Đỏ", "size": "XL"}
+    price = Column(Numeric(15, 2), nullable=False)
+    stock = Column(Integer, nullable=False, default=0)
+    is_active = Column(Boolean, nullable=False, default=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    product = relationship("Product", back_populates="variants")
+
+
+class ProductImage(Base):
+    __tablename__ = "product_images"
+    __table_args__ = (
+        Index("ix_product_images_product_position", "product_id", "position"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False)
+    # Tên file content-addressed do FileHandler trả về (folder "products")
+    filename = Column(String(255), nullable=False)
+    url = Column(String, nullable=False)
+    alt = Column(String(255))
+    position = Column(Integer, nullable=False, default=0)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    product = relationship("Product", back_populates="images")
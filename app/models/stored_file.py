@@ -0,0 +1,50 @@
+# app/models/stored_file.py
+
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+
+class StoredFile(Base):
+    """
+    File upload lưu theo nội dung (content-addressed).
+
+    Tên file được suy ra từ sha256 của ảnh đã chuẩn hóa (ảnh chính JPEG) nên
+    các upload cho ra cùng ảnh dùng chung một file trên storage; content_hash
+    là sha256 của bytes upload gốc để nhận ra upload trùng mà không phải xử
+    lý lại. ref_count đếm số tham chiếu: mỗi lượt upload còn hiệu lực
+    (FileUpload), mỗi ảnh sản phẩm và mỗi avatar đang dùng file.
+    """
+    __tablename__ = "stored_files"
+    __table_args__ = (
+        UniqueConstraint("folder", "filename", name="uq_stored_files_folder_filename"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    folder = Column(String(50), nullable=False)
+    filename = Column(String(255), nullable=False)
+    content_hash = Column(String(64), nullable=False, index=True)
+    size = Column(Integer, nullable=False, default=0)
+    ref_count = Column(Integer, nullable=False, default=1)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class FileUpload(Base):
+    """
+    Lượt upload của một user: giữ một tham chiếu tới file và là bằng chứng
+    user đó được gắn file vào dữ liệu của mình (vd: ảnh sản phẩm). Upload
+    lại cùng nội dung chỉ làm mới created_at; hết FILE_UPLOAD_TTL_HOURS thì
+    bị maintenance xóa và nhả tham chiếu.
+    """
+    __tablename__ = "file_uploads"
+    __table_args__ = (
+        UniqueConstraint("stored_file_id", "user_id", name="uq_file_uploads_file_user"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    stored_file_id = Column(Integer, ForeignKey("stored_files.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
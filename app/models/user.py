@@ -1,13 +1,13 @@
 # app/models/user.py
 
 import enum
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum, Index, Text, event
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from app.db.base_class import Base
 
-from app.core.utils import generate_random_uid
+from app.core.utils import generate_random_uid, normalize_search_text
 
 class UserRole(str, enum.Enum):
     sysadmin = "sysadmin"
@@ -17,6 +17,17 @@ class UserRole(str, enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Phục vụ keyset pagination ORDER BY created_at DESC, id DESC
+        Index("ix_users_created_at_id", "created_at", "id"),
+        # Trigram index cho tìm kiếm trên PostgreSQL (SQLite dùng bảng FTS5 users_fts)
+        Index(
+            "ix_users_search_text_trgm",
+            "search_text",
+            postgresql_using="gin",
+            postgresql_ops={"search_text": "gin_trgm_ops"},
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     uid = Column(String(50), unique=True, index=True, default=lambda: generate_random_uid(16))
@@ -29,8 +40,18 @@ class User(Base):
     role = Column(Enum(UserRole), default=UserRole.customer, nullable=False)
     is_active = Column(Boolean, default=True)
     
+    # full_name + email đã chuẩn hóa (bỏ dấu, lowercase), dùng cho tìm kiếm
+    search_text = Column(Text)
+    
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
     # Mối quan hệ: Một User (shop_owner) có một Shop
-    shop = relationship("Shop", back_populates="owner", uselist=False)
\ No newline at end of file
+    shop = relationship("Shop", back_populates="owner", uselist=False)
+
+
+@event.listens_for(User, "before_insert")
+@event.listens_for(User, "before_update")
+def _update_search_text(mapper, connection, target: User) -> None:
+    """Giữ search_text đồng bộ với full_name/email."""
+    target.search_text = normalize_search_text(target.full_name, target.email)
@@ -0,0 +1,34 @@
+# app/models/user_session.py
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.sql import func
+
+from app.db.base_class import Base
+
+
+class UserSession(Base):
+    """
+    Phiên đăng nhập ứng với một refresh token.
+
+    Chỉ lưu SHA-256 của refresh token. Mỗi lần refresh, phiên cũ được đánh
+    dấu `rotated_at` và một phiên mới cùng `family_id` được tạo (chuỗi xoay
+    vòng của một lần đăng nhập). Dùng lại refresh token đã xoay nghĩa là
+    token bị lộ: cả family bị thu hồi.
+    """
+    __tablename__ = "user_sessions"
+    __table_args__ = (
+        # Thu hồi tất cả phiên của user (logout mọi thiết bị, khóa tài khoản)
+        Index("ix_user_sessions_user_revoked", "user_id", "revoked_at"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    family_id = Column(String(32), nullable=False, index=True)
+    token_hash = Column(String(64), nullable=False, unique=True)
+    device = Column(String(255))
+    ip_address = Column(String(45))
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+    rotated_at = Column(DateTime(timezone=True))
+    revoked_at = Column(DateTime(timezone=True))
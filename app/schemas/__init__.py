@@ -1,9 +1,10 @@
 # app/schemas/__init__.py
 
-from .token import Token, TokenData
+from .token import Token, TokenData, RefreshTokenRequest
 from .user import User, UserCreate, UserUpdate
 from .shop import Shop, ShopCreate, ShopUpdate, ShopPublic
-
-# Sau này có thêm product, order... thì cũng thêm vào đây
-# from .product import Product, ProductCreate
-# from .order import Order, OrderCreate
\ No newline at end of file
+from .product import (
+    Category, CategoryCreate, Product, ProductCreate, ProductUpdate, ProductSummary,
+    ProductVariant, ProductVariantCreate, ProductVariantUpdate, ProductImage, ProductListResponse,
+)
+from .order import Order, OrderCreate, OrderItem, OrderItemCreate, OrderListResponse
\ No newline at end of file
@@ -0,0 +1,60 @@
+# app/schemas/order.py
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.models.order import OrderStatus
+from app.schemas.user import PaginationInfo
+
+
+class OrderItemCreate(BaseModel):
+    variant_id: int
+    quantity: int = Field(..., ge=1, le=1000)
+
+
+class OrderCreate(BaseModel):
+    items: List[OrderItemCreate] = Field(..., min_length=1, max_length=100)
+    customer_name: str = Field(..., min_length=2, max_length=255)
+    phone_number: str = Field(..., min_length=8, max_length=20)
+    shipping_address: str = Field(..., min_length=5, max_length=500)
+    note: Optional[str] = Field(None, max_length=1000)
+
+
+class OrderItem(BaseModel):
+    product_id: Optional[int] = None
+    variant_id: Optional[int] = None
+    product_name: str
+    sku: str
+    options: Optional[Dict[str, Any]] = None
+    unit_price: Decimal
+    quantity: int
+    line_total: Decimal
+
+    class Config:
+        from_attributes = True
+
+
+class Order(BaseModel):
+    orderid: str
+    status: OrderStatus
+    customer_name: str
+    phone_number: str
+    shipping_address: str
+    note: Optional[str] = None
+    subtotal: Decimal
+    shipping_fee: Decimal
+    total: Decimal
+    items: List[OrderItem] = []
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class OrderListResponse(BaseModel):
+    data: List[Order]
+    pagination: PaginationInfo
@@ -0,0 +1,121 @@
+# app/schemas/product.py
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from app.schemas.user import PaginationInfo
+
+
+# --- Category ---
+class CategoryCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=255)
+    slug: Optional[str] = Field(None, max_length=255)
+    position: int = 0
+
+
+class Category(BaseModel):
+    id: int
+    name: str
+    slug: str
+    position: int
+
+    class Config:
+        from_attributes = True
+
+
+# --- Image ---
+class ProductImage(BaseModel):
+    filename: str
+    url: str
+    alt: Optional[str] = None
+    position: int
+
+    class Config:
+        from_attributes = True
+
+
+# --- Variant ---
+class ProductVariantCreate(BaseModel):
+    sku: str = Field(..., min_length=1, max_length=100)
+    name: Optional[str] = Field(None, max_length=255)
+    options: Optional[Dict[str, Any]] = None
+    price: Optional[Decimal] = Field(None, ge=0)  # None = lấy giá sản phẩm
+    stock: int = Field(0, ge=0)
+    is_active: bool = True
+
+
+class ProductVariantUpdate(BaseModel):
+    name: Optional[str] = Field(None, max_length=255)
+    options: Optional[Dict[str, Any]] = None
+    price: Optional[Decimal] = Field(None, ge=0)
+    stock: Optional[int] = Field(None, ge=0)
+    is_active: Optional[bool] = None
+
+
+class ProductVariant(BaseModel):
+    id: int
+    sku: str
+    name: Optional[str] = None
+    options: Optional[Dict[str, Any]] = None
+    price: Decimal
+    stock: int
+    is_active: bool
+
+    class Config:
+        from_attributes = True
+
+
+# --- Product ---
+class ProductCreate(BaseModel):
+    name: str = Field(..., min_length=1, max_length=255)
+    slug: Optional[str] = Field(None, max_length=255)
+    description: Optional[str] = None
+    category_id: Optional[int] = None
+    price: Decimal = Field(..., ge=0)
+    compare_at_price: Optional[Decimal] = Field(None, ge=0)
+    is_active: bool = True
+    # Không có biến thể thì tạo một biến thể mặc định với `stock`
+    variants: List[ProductVariantCreate] = []
+    stock: int = Field(0, ge=0)
+    # Tên file ảnh đã upload qua /upload/product-images
+    images: List[str] = []
+
+
+class ProductUpdate(BaseModel):
+    name: Optional[str] = Field(None, min_length=1, max_length=255)
+    description: Optional[str] = None
+    category_id: Optional[int] = None
+    compare_at_price: Optional[Decimal] = Field(None, ge=0)
+    is_active: Optional[bool] = None
+
+
+class ProductSummary(BaseModel):
+    """Sản phẩm trong danh sách (không kèm biến thể)."""
+    productid: str
+    name: str
+    slug: str
+    price: Decimal
+    compare_at_price: Optional[Decimal] = None
+    category_id: Optional[int] = None
+    is_active: bool
+    created_at: datetime
+    images: List[ProductImage] = []
+
+    class Config:
+        from_attributes = True
+
+
+class Product(ProductSummary):
+    """Chi tiết sản phẩm."""
+    description: Optional[str] = None
+    category: Optional[Category] = None
+    variants: List[ProductVariant] = []
+    updated_at: Optional[datetime] = None
+
+
+class ProductListResponse(BaseModel):
+    data: List[ProductSummary]
+    pagination: PaginationInfo
@@ -1,10 +1,19 @@
 # app/schemas/token.py
 
-from pydantic import BaseModel
+from typing import Optional
+
+from pydantic import BaseModel, Field
 
 class Token(BaseModel):
     access_token: str
     token_type: str
+    # Dùng với POST /auth/refresh để lấy access token mới không cần đăng nhập lại
+    refresh_token: Optional[str] = None
+    # Số giây access token còn hiệu lực
+    expires_in: Optional[int] = None
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str = Field(..., min_length=1, max_length=255)
 
 class TokenData(BaseModel):
     email: str | None = None
\ No newline at end of file
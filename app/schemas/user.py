@@ -60,14 +60,27 @@ class UserPasswordUpdate(BaseModel):
 
 # Pagination schemas
 class PaginationInfo(BaseModel):
-    current_page: int
-    total_pages: int
-    total_items: int
+    current_page: Optional[int] = None  # None khi phân trang bằng cursor
+    total_pages: Optional[int] = None  # None khi include_total=false
+    total_items: Optional[int] = None
     items_per_page: int
     has_next: bool
     has_prev: bool
+    next_cursor: Optional[str] = None
 
 
 class UserListResponse(BaseModel):
     data: list[User]
-    pagination: PaginationInfo
\ No newline at end of file
+    pagination: PaginationInfo
+
+class UserImportRowError(BaseModel):
+    line: int  # Số dòng trong file (CSV tính cả dòng header)
+    email: Optional[str] = None
+    errors: list[str]
+
+
+class UserImportResult(BaseModel):
+    total: int
+    created: int
+    failed: int
+    errors: list[UserImportRowError]
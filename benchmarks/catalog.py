@@ -0,0 +1,166 @@
+# benchmarks/catalog.py
+"""
+Benchmark listing sản phẩm trên catalog lớn (mặc định 1 triệu sản phẩm).
+
+Seed dữ liệu tổng hợp vào một database riêng rồi đo thời gian các query của
+crud_product.get_products_paginated (trang đầu, trang sâu bằng cursor, lọc
+khoảng giá, lọc danh mục) và in query plan để kiểm tra index được dùng.
+
+    python -m benchmarks.catalog --database-url sqlite:///./catalog_bench.db --products 1000000
+    python -m benchmarks.catalog --database-url postgresql://... --skip-seed
+
+Không chạy trên database thật: script tạo bảng và ghi dữ liệu giả.
+"""
+
+import argparse
+import random
+import statistics
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.orm import Session
+
+from app.core.utils import generate_random_uid
+from app.crud import crud_product
+from app.db.base import Base
+from app.models.product import Category, Product, ProductImage
+from app.models.shop import Shop
+from app.models.user import User
+
+SHOPS = 20
+CATEGORIES_PER_SHOP = 12
+CHUNK_SIZE = 10000
+
+
+def seed(engine, products: int) -> None:
+    """Tạo bảng và sinh dữ liệu bằng executemany theo từng chunk."""
+    Base.metadata.create_all(engine)
+    rng = random.Random(42)
+    start = datetime(2023, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(User), [
+            {"uid": generate_random_uid(), "full_name": f"Owner {i}", "email": f"owner{i}@bench.local",
+             "hashed_password": "x", "search_text": f"owner {i}"}
+            for i in range(SHOPS)
+        ])
+        owner_ids = [row[0] for row in conn.execute(text("SELECT id FROM users ORDER BY id"))][-SHOPS:]
+        conn.execute(insert(Shop), [
+            {"shopid": generate_random_uid(15), "name": f"Shop {i}", "subdomain": f"bench{i}", "owner_id": owner_id}
+            for i, owner_id in enumerate(owner_ids)
+        ])
+        shop_ids = [row[0] for row in conn.execute(text("SELECT id FROM shops ORDER BY id"))][-SHOPS:]
+        conn.execute(insert(Category), [
+            {"shop_id": shop_id, "name": f"Danh mục {c}", "slug": f"danh-muc-{c}", "position": c}
+            for shop_id in shop_ids for c in range(CATEGORIES_PER_SHOP)
+        ])
+        categories = {}
+        for category_id, shop_id in conn.execute(text("SELECT id, shop_id FROM categories")):
+            categories.setdefault(shop_id, []).append(category_id)
+
+    done = 0
+    while done < products:
+        size = min(CHUNK_SIZE, products - done)
+        rows = []
+        for i in range(done, done + size):
+            shop_id = shop_ids[i % SHOPS]
+            rows.append({
+                "productid": generate_random_uid(16),
+                "shop_id": shop_id,
+                "category_id": rng.choice(categories[shop_id]),
+                "name": f"Sản phẩm {i}",
+                "slug": f"san-pham-{i}",
+                "price": Decimal(rng.randrange(10, 5000) * 1000),
+                "is_active": rng.random() > 0.1,
+                # Có phần micro giây như timestamp thật (SQLite so sánh created_at dạng chuỗi)
+                "created_at": start + timedelta(seconds=i * 30, microseconds=rng.randrange(1, 10**6)),
+            })
+        with engine.begin() as conn:
+            conn.execute(insert(Product), rows)
+            first_id = conn.execute(text("SELECT MAX(id) FROM products")).scalar() - size + 1
+            conn.execute(insert(ProductImage), [
+                {"product_id": first_id + offset, "filename": f"{offset}.jpg",
+                 "url": f"/static/uploads/products/{offset}.jpg", "position": 0}
+                for offset in range(size)
+            ])
+        done += size
+        print(f"\rseed {done}/{products}", end="", flush=True)
+    print()
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+
+
+def _query_plan(session: Session, query) -> list:
+    statement = query.statement.compile(session.get_bind(), compile_kwargs={"literal_binds": True})
+    prefix = "EXPLAIN QUERY PLAN " if session.get_bind().dialect.name == "sqlite" else "EXPLAIN "
+    return [str(row[-1]) for row in session.execute(text(prefix + str(statement)))]
+
+
+def measure(engine, runs: int) -> None:
+    with Session(engine) as session:
+        shop_id = session.execute(text("SELECT MIN(id) FROM shops")).scalar()
+        category_id = session.execute(
+            text("SELECT MIN(id) FROM categories WHERE shop_id = :shop_id"), {"shop_id": shop_id}
+        ).scalar()
+
+        def deep_cursor(sort: str, pages: int = 50) -> str:
+            cursor = None
+            for _ in range(pages):
+                _, info = crud_product.get_products_paginated(session, shop_id, limit=20, cursor=cursor, sort=sort)
+                cursor = info["next_cursor"]
+            return cursor
+
+        scenarios = {
+            "newest, trang đầu": {},
+            "newest, trang 51 (cursor)": {"cursor": deep_cursor("newest")},
+            "price_asc, trang 51 (cursor)": {"sort": "price_asc", "cursor": deep_cursor("price_asc")},
+            "khoảng giá 100k-200k": {"sort": "price_asc", "min_price": Decimal(100000), "max_price": Decimal(200000)},
+            "danh mục, newest": {"category_id": category_id},
+        }
+
+        print(f"{'scenario':32} {'p50 ms':>8} {'p95 ms':>8}")
+        for name, params in scenarios.items():
+            timings = []
+            for _ in range(runs):
+                session.expunge_all()
+                began = time.perf_counter()
+                crud_product.get_products_paginated(session, shop_id, limit=20, **params)
+                timings.append((time.perf_counter() - began) * 1000)
+            timings.sort()
+            p95 = timings[min(len(timings) - 1, int(len(timings) * 0.95))]
+            print(f"{name:32} {statistics.median(timings):8.2f} {p95:8.2f}")
+
+        print("\nQuery plan:")
+        for name, params in scenarios.items():
+            query = session.query(Product).filter(Product.shop_id == shop_id, Product.is_active.is_(True))
+            if params.get("category_id"):
+                query = query.filter(Product.category_id == params["category_id"])
+            if params.get("min_price"):
+                query = query.filter(Product.price >= params["min_price"], Product.price <= params["max_price"])
+            if params.get("sort", "newest") == "newest":
+                query = query.order_by(Product.created_at.desc(), Product.id.desc())
+            else:
+                query = query.order_by(Product.price, Product.id)
+            print(f"- {name}: " + " | ".join(_query_plan(session, query.limit(21))))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite:///./catalog_bench.db")
+    parser.add_argument("--products", type=int, default=1_000_000)
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--skip-seed", action="store_true", help="Dùng dữ liệu đã seed từ lần chạy trước")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    if not args.skip_seed:
+        began = time.perf_counter()
+        seed(engine, args.products)
+        print(f"seed: {time.perf_counter() - began:.1f}s")
+    measure(engine, args.runs)
+
+
+if __name__ == "__main__":
+    main()
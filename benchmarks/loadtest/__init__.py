@@ -0,0 +1,8 @@
+# benchmarks/loadtest/__init__.py
+"""
+Load test cho API: seed dữ liệu tổng hợp, chạy các kịch bản qua app ASGI
+trong process (httpx ASGITransport) hoặc qua uvicorn nhiều worker, báo cáo
+p50/p95/p99 và RPS dạng JSON, so sánh với baseline.
+
+Xem `python -m benchmarks.loadtest --help`.
+"""
@@ -0,0 +1,157 @@
+# benchmarks/loadtest/__main__.py
+"""
+Load test API trên database tổng hợp.
+
+Seed N user (một sysadmin, M chủ shop, còn lại customer/affiliator), rồi chạy
+các kịch bản login, /auth/me, /users (tìm kiếm, trang sâu OFFSET và cursor),
+tạo shop và upload ảnh. Kết quả (p50/p95/p99, RPS, status code) in ra bảng và
+ghi JSON; nếu có baseline thì so sánh và thoát với mã 1 khi có regression.
+
+    # Trong process, qua httpx ASGITransport
+    python -m benchmarks.loadtest --users 20000 --output loadtest.json
+
+    # Qua uvicorn 4 worker, lưu làm baseline
+    python -m benchmarks.loadtest --mode uvicorn --workers 4 --skip-seed --output baseline.json
+
+    # So sánh với baseline (mặc định cho phép lệch 20%)
+    python -m benchmarks.loadtest --skip-seed --baseline baseline.json --tolerance 0.2
+
+Baseline chỉ có ý nghĩa trên cùng máy, cùng mode/worker/số user. Không chạy
+trên database thật: script tạo bảng và ghi dữ liệu giả.
+"""
+
+import argparse
+import asyncio
+import os
+import platform
+import shutil
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+DEFAULT_SCENARIOS = "login,auth_me,users_search,users_deep_offset,users_deep_cursor,shop_create,image_upload"
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.loadtest", description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--database-url", default="sqlite:///./loadtest_bench.db")
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--shops", type=int, default=500)
+    parser.add_argument("--skip-seed", action="store_true", help="Dùng dữ liệu đã seed từ lần chạy trước")
+    parser.add_argument("--mode", choices=("inprocess", "uvicorn"), default="inprocess")
+    parser.add_argument("--workers", type=int, default=2, help="Số worker uvicorn (--mode uvicorn)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--scenarios", default=DEFAULT_SCENARIOS, help="Danh sách kịch bản, cách nhau bởi dấu phẩy")
+    parser.add_argument("--requests", type=int, default=300, help="Số request mỗi kịch bản")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=20, help="Số request làm nóng mỗi kịch bản (không tính)")
+    parser.add_argument("--output", help="Ghi kết quả JSON ra file")
+    parser.add_argument("--baseline", help="File JSON kết quả trước đó để so sánh")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Mức lệch cho phép so với baseline (0.2 = 20%%)")
+    return parser.parse_args()
+
+
+async def run(args: argparse.Namespace, env: dict) -> dict:
+    from sqlalchemy import create_engine
+
+    from benchmarks.loadtest import runner
+    from benchmarks.loadtest.scenarios import SCENARIOS, load_context
+    from benchmarks.loadtest.seed import is_seeded, seed
+
+    names = [name.strip() for name in args.scenarios.split(",") if name.strip()]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        raise SystemExit(f"Kịch bản không tồn tại: {', '.join(unknown)} (có: {', '.join(SCENARIOS)})")
+
+    engine = create_engine(args.database_url)
+    if not args.skip_seed:
+        if is_seeded(engine):
+            raise SystemExit("Database đã có dữ liệu: dùng --skip-seed hoặc một database mới")
+        seed(engine, args.users, args.shops)
+    ctx = load_context(engine)
+    engine.dispose()
+
+    if args.mode == "uvicorn":
+        client_context = runner.uvicorn_client(args.workers, args.port, env)
+    else:
+        client_context = runner.inprocess_client()
+
+    results = {}
+    async with client_context as client:
+        if "users_deep_cursor" in names:
+            await runner.collect_deep_cursors(client, ctx)
+        for name in names:
+            scenario = SCENARIOS[name]
+            # Kịch bản dùng dữ liệu một lần (tạo shop) không làm nóng để không tiêu hao user
+            if args.warmup and scenario.limit is None:
+                await runner.run_scenario(client, scenario, ctx, args.warmup, args.concurrency)
+            results[name] = await runner.run_scenario(client, scenario, ctx, args.requests, args.concurrency)
+            print(f"{name}: {results[name]['rps']} rps, p95 {results[name]['p95_ms']} ms", flush=True)
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "mode": args.mode,
+            "workers": args.workers if args.mode == "uvicorn" else 1,
+            "database": args.database_url.split(":", 1)[0],
+            "users": ctx.total_users,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "scenarios": results,
+    }
+
+
+def main() -> None:
+    args = parse_args()
+
+    # Phải đặt trước khi import app.*: settings và engine được tạo lúc import
+    env = {
+        "DATABASE_URL": args.database_url,
+        "ALLOWED_HOSTS": "localhost,127.0.0.1",
+        "DEBUG": "false",
+        # Không log từng request (làm chậm và lẫn vào kết quả)
+        "REQUEST_LOG_LEVEL": "WARNING",
+        "REQUEST_SLOW_MS": "0",
+        # Ảnh upload của kịch bản image_upload ghi vào thư mục tạm, không vào source tree
+        "UPLOAD_DIR": tempfile.mkdtemp(prefix="dropshop-loadtest-uploads-"),
+    }
+    os.environ.update(env)
+
+    from benchmarks.loadtest import runner
+
+    try:
+        result = asyncio.run(run(args, env))
+    finally:
+        shutil.rmtree(env["UPLOAD_DIR"], ignore_errors=True)
+    baseline = runner.load_json(args.baseline) if args.baseline else None
+    runner.print_table(result, baseline)
+    if args.output:
+        runner.write_json(args.output, result)
+        print(f"\nĐã ghi {args.output}")
+
+    if baseline is not None:
+        mismatches = runner.meta_mismatches(result, baseline)
+        if mismatches:
+            print(f"\nCảnh báo: cấu hình khác baseline ({'; '.join(mismatches)})", file=sys.stderr)
+        regressions = runner.compare(result, baseline, args.tolerance)
+        if regressions:
+            print(f"\nREGRESSION so với {args.baseline}:", file=sys.stderr)
+            for line in regressions:
+                print(f"  - {line}", file=sys.stderr)
+            sys.exit(1)
+        print(f"\nKhông có regression so với {args.baseline} (tolerance {args.tolerance:.0%})")
+    else:
+        errors = sum(stats["errors"] for stats in result["scenarios"].values())
+        if errors:
+            print(f"\n{errors} request lỗi", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
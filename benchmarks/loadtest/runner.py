@@ -0,0 +1,208 @@
+# benchmarks/loadtest/runner.py
+"""Chạy kịch bản với N request đồng thời, tính percentile/RPS và so sánh baseline."""
+
+import asyncio
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from benchmarks.loadtest.scenarios import API, PAGE_SIZE, BenchContext, Scenario
+
+# Chỉ số được so sánh với baseline: (tên, True nếu lớn hơn là tệ hơn)
+COMPARED_METRICS = (("p50_ms", True), ("p95_ms", True), ("p99_ms", True), ("rps", False))
+# Cấu hình phải giống baseline thì so sánh mới có ý nghĩa
+COMPARED_META = ("mode", "workers", "database", "users", "concurrency")
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Percentile kiểu nearest-rank trên list đã sort."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(p / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies: List[float], statuses: Counter, errors: int, elapsed: float) -> Dict[str, Any]:
+    latencies = sorted(latencies)
+    count = len(latencies)
+    return {
+        "requests": count,
+        "errors": errors,
+        "rps": round(count / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(sum(latencies) / count, 2) if count else 0.0,
+        "max_ms": round(latencies[-1], 2) if count else 0.0,
+        "status_codes": {str(code): n for code, n in sorted(statuses.items())},
+    }
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    ctx: BenchContext,
+    requests: int,
+    concurrency: int,
+    offset: int = 0,
+) -> Dict[str, Any]:
+    """
+    Gửi `requests` request với tối đa `concurrency` request đang chạy cùng lúc.
+    Request trả status ngoài `scenario.expected` (hoặc lỗi kết nối) bị tính là lỗi.
+    """
+    if scenario.limit is not None:
+        requests = min(requests, scenario.limit(ctx) - offset)
+    counter = iter(range(offset, offset + requests))
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    errors = 0
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in counter:
+            began = time.perf_counter()
+            try:
+                response = await client.request(**scenario.build(ctx, i))
+                status_code = response.status_code
+            except httpx.HTTPError:
+                status_code = 0
+            latencies.append((time.perf_counter() - began) * 1000)
+            statuses[status_code] += 1
+            if status_code not in scenario.expected:
+                errors += 1
+
+    began = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, min(concurrency, requests)))))
+    return summarize(latencies, statuses, errors, time.perf_counter() - began)
+
+
+async def collect_deep_cursors(client: httpx.AsyncClient, ctx: BenchContext, depth: int = 50) -> None:
+    """Đi qua `depth` trang đầu bằng cursor, giữ cursor của 10 trang cuối cho kịch bản users_deep_cursor."""
+    cursor: Optional[str] = None
+    cursors: List[str] = []
+    for _ in range(depth):
+        params: Dict[str, Any] = {"limit": PAGE_SIZE, "include_total": "false"}
+        if cursor:
+            params["cursor"] = cursor
+        response = await client.get(f"{API}/users/", params=params, headers={"Authorization": f"Bearer {ctx.admin_token}"})
+        response.raise_for_status()
+        cursor = response.json()["pagination"].get("next_cursor")
+        if not cursor:
+            break
+        cursors.append(cursor)
+    ctx.deep_cursors = cursors[-10:]
+
+
+@asynccontextmanager
+async def inprocess_client() -> AsyncIterator[httpx.AsyncClient]:
+    """Client gọi thẳng app ASGI trong process (không có network, một event loop)."""
+    from app.main import app
+
+    # ASGITransport không chạy lifespan: tự gọi startup/shutdown
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://localhost", timeout=60) as client:
+            yield client
+    finally:
+        await app.router.shutdown()
+
+
+@asynccontextmanager
+async def uvicorn_client(workers: int, port: int, env: Dict[str, str]) -> AsyncIterator[httpx.AsyncClient]:
+    """Chạy `uvicorn app.main:app --workers N` ở process con, gửi request qua HTTP thật."""
+    command = [
+        sys.executable, "-m", "uvicorn", "app.main:app",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--workers", str(workers), "--log-level", "warning", "--no-access-log",
+    ]
+    server = subprocess.Popen(command, env={**os.environ, **env})
+    base_url = f"http://127.0.0.1:{port}"
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    try:
+        async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+            deadline = time.monotonic() + 60
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn thoát với mã {server.returncode}")
+                try:
+                    if (await client.get("/health")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn không sẵn sàng sau 60s")
+                await asyncio.sleep(0.2)
+            yield client
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """
+    So sánh từng kịch bản với baseline. Trả về danh sách regression: latency
+    tăng hoặc RPS giảm quá `tolerance` (tỉ lệ, vd 0.2 = 20%), hoặc có lỗi.
+    """
+    regressions = []
+    for name, current in result["scenarios"].items():
+        if current["errors"]:
+            regressions.append(f"{name}: {current['errors']} request lỗi ({current['status_codes']})")
+        previous = baseline.get("scenarios", {}).get(name)
+        if not previous:
+            continue
+        for metric, higher_is_worse in COMPARED_METRICS:
+            old, new = previous.get(metric), current.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            if (change > tolerance) if higher_is_worse else (change < -tolerance):
+                regressions.append(f"{name}: {metric} {old} -> {new} ({change:+.0%})")
+    return regressions
+
+
+def meta_mismatches(result: Dict[str, Any], baseline: Dict[str, Any]) -> List[str]:
+    """Các thông số cấu hình khác với lúc tạo baseline."""
+    current, previous = result["meta"], baseline.get("meta", {})
+    return [
+        f"{key}: {previous.get(key)} -> {current.get(key)}"
+        for key in COMPARED_META
+        if previous.get(key) != current.get(key)
+    ]
+
+
+def print_table(result: Dict[str, Any], baseline: Optional[Dict[str, Any]] = None) -> None:
+    print(f"\n{'scenario':20} {'req':>6} {'err':>5} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, stats in result["scenarios"].items():
+        print(
+            f"{name:20} {stats['requests']:6} {stats['errors']:5} {stats['rps']:9.1f} "
+            f"{stats['p50_ms']:9.2f} {stats['p95_ms']:9.2f} {stats['p99_ms']:9.2f}"
+        )
+        previous = (baseline or {}).get("scenarios", {}).get(name)
+        if previous:
+            print(
+                f"{'  baseline':20} {previous['requests']:6} {previous['errors']:5} {previous['rps']:9.1f} "
+                f"{previous['p50_ms']:9.2f} {previous['p95_ms']:9.2f} {previous['p99_ms']:9.2f}"
+            )
+
+
+def load_json(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def write_json(path: str, data: Dict[str, Any]) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.write("\n")
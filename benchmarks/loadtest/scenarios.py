@@ -0,0 +1,154 @@
+# benchmarks/loadtest/scenarios.py
+"""Các kịch bản load test. Mỗi kịch bản sinh tham số cho `httpx.AsyncClient.request`."""
+
+import io
+import random
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core import security
+from app.models.shop import Shop
+from app.models.user import User, UserRole
+
+from benchmarks.loadtest.seed import ADMIN_EMAIL, BENCH_PASSWORD, SEARCH_TERMS
+
+API = "/api/v1"
+PAGE_SIZE = 20
+
+
+@dataclass
+class BenchContext:
+    """Dữ liệu đọc từ database đã seed, dùng chung cho mọi kịch bản."""
+    admin_token: str
+    users: List[Tuple[str, str]]  # (email, token) của user đang active
+    free_users: List[str]  # token của customer chưa có shop (kịch bản tạo shop)
+    total_users: int
+    deep_cursors: List[str] = field(default_factory=list)
+    image: bytes = b""
+    run_tag: str = field(default_factory=lambda: uuid.uuid4().hex[:6])
+
+
+def _bearer(token: str) -> Dict[str, str]:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _jpeg(width: int = 1200, height: int = 900) -> bytes:
+    """Ảnh JPEG nhiễu (không nén được nhiều, giống ảnh chụp) cho kịch bản upload."""
+    from PIL import Image
+
+    image = Image.frombytes("RGB", (width, height), random.Random(7).randbytes(width * height * 3))
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def load_context(engine, sample: int = 1000) -> BenchContext:
+    """
+    Đọc user mẫu và tạo sẵn access token (không đi qua /auth/login, để các
+    kịch bản khác không phải trả giá bcrypt).
+    """
+    with Session(engine) as db:
+        admin_uid = db.execute(select(User.uid).where(User.email == ADMIN_EMAIL)).scalar_one()
+        users = db.execute(
+            select(User.email, User.uid).where(User.is_active.is_(True), User.email != ADMIN_EMAIL)
+            .order_by(User.id).limit(sample)
+        ).all()
+        free_users = db.execute(
+            select(User.uid)
+            .outerjoin(Shop, Shop.owner_id == User.id)
+            .where(User.role == UserRole.customer, Shop.id.is_(None))
+            .order_by(User.id.desc()).limit(sample)
+        ).scalars().all()
+        total_users = db.execute(select(func.count()).select_from(User)).scalar()
+
+    return BenchContext(
+        admin_token=security.create_access_token(subject=admin_uid),
+        users=[(email, security.create_access_token(subject=uid)) for email, uid in users],
+        free_users=[security.create_access_token(subject=uid) for uid in free_users],
+        total_users=total_users,
+        image=_jpeg(),
+    )
+
+
+@dataclass
+class Scenario:
+    name: str
+    description: str
+    build: Callable[[BenchContext, int], Dict[str, Any]]
+    expected: Tuple[int, ...] = (200,)
+    # Số request tối đa kịch bản chạy được (vd: mỗi user chỉ tạo được một shop)
+    limit: Optional[Callable[[BenchContext], int]] = None
+
+
+def _user(ctx: BenchContext, i: int) -> Tuple[str, str]:
+    return ctx.users[i % len(ctx.users)]
+
+
+def _login(ctx: BenchContext, i: int) -> Dict[str, Any]:
+    email, _ = _user(ctx, i)
+    return {"method": "POST", "url": f"{API}/auth/login", "json": {"username": email, "password": BENCH_PASSWORD}}
+
+
+def _me(ctx: BenchContext, i: int) -> Dict[str, Any]:
+    return {"method": "GET", "url": f"{API}/auth/me", "headers": _bearer(_user(ctx, i)[1])}
+
+
+def _users_search(ctx: BenchContext, i: int) -> Dict[str, Any]:
+    return {
+        "method": "GET", "url": f"{API}/users/",
+        "params": {"search": SEARCH_TERMS[i % len(SEARCH_TERMS)], "limit": PAGE_SIZE},
+        "headers": _bearer(ctx.admin_token),
+    }
+
+
+def _users_deep_offset(ctx: BenchContext, i: int) -> Dict[str, Any]:
+    # Các trang ở 10% cuối danh sách: OFFSET lớn + COUNT(*)
+    last_page = max(1, ctx.total_users // PAGE_SIZE)
+    page = last_page - (i % max(1, last_page // 10))
+    return {
+        "method": "GET", "url": f"{API}/users/",
+        "params": {"page": page, "limit": PAGE_SIZE},
+        "headers": _bearer(ctx.admin_token),
+    }
+
+
+def _users_deep_cursor(ctx: BenchContext, i: int) -> Dict[str, Any]:
+    params: Dict[str, Any] = {"limit": PAGE_SIZE, "include_total": "false"}
+    if ctx.deep_cursors:
+        params["cursor"] = ctx.deep_cursors[i % len(ctx.deep_cursors)]
+    return {"method": "GET", "url": f"{API}/users/", "params": params, "headers": _bearer(ctx.admin_token)}
+
+
+def _shop_create(ctx: BenchContext, i: int) -> Dict[str, Any]:
+    return {
+        "method": "POST", "url": f"{API}/shops/",
+        "json": {"name": f"Bench shop {i}", "subdomain": f"lt-{ctx.run_tag}-{i}"},
+        "headers": _bearer(ctx.free_users[i]),
+    }
+
+
+def _image_upload(ctx: BenchContext, i: int) -> Dict[str, Any]:
+    return {
+        "method": "POST", "url": f"{API}/upload/avatar",
+        "files": {"file": (f"avatar-{i}.jpg", ctx.image, "image/jpeg")},
+        "headers": _bearer(_user(ctx, i)[1]),
+    }
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    scenario.name: scenario
+    for scenario in (
+        Scenario("login", "POST /auth/login (bcrypt verify)", _login),
+        Scenario("auth_me", "GET /auth/me", _me),
+        Scenario("users_search", "GET /users?search=...", _users_search),
+        Scenario("users_deep_offset", "GET /users?page=<10% cuối> (OFFSET + COUNT)", _users_deep_offset),
+        Scenario("users_deep_cursor", "GET /users?cursor=<trang sâu>&include_total=false", _users_deep_cursor),
+        Scenario("shop_create", "POST /shops (mỗi request một user mới)", _shop_create,
+                 expected=(201,), limit=lambda ctx: len(ctx.free_users)),
+        Scenario("image_upload", "POST /upload/avatar (ảnh JPEG ~1200x900)", _image_upload),
+    )
+}
@@ -0,0 +1,93 @@
+# benchmarks/loadtest/seed.py
+"""Sinh user/shop tổng hợp cho load test (executemany theo chunk như benchmarks.catalog)."""
+
+import random
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, insert, inspect, select
+
+from app.core import security
+from app.core.utils import generate_random_uid, normalize_search_text
+from app.db.base import Base
+from app.models.shop import Shop
+from app.models.user import User, UserRole
+
+# Mọi user seed dùng chung password (chỉ hash một lần)
+BENCH_PASSWORD = "bench-password-123"
+ADMIN_EMAIL = "admin@loadtest.dropshop.vn"
+CHUNK_SIZE = 5000
+
+_HO = ["Nguyễn", "Trần", "Lê", "Phạm", "Hoàng", "Huỳnh", "Phan", "Vũ", "Võ", "Đặng", "Bùi", "Đỗ"]
+_DEM = ["Văn", "Thị", "Minh", "Ngọc", "Hữu", "Thanh", "Quốc", "Gia", "Đức", "Anh"]
+_TEN = ["An", "Bình", "Châu", "Dũng", "Giang", "Hà", "Hùng", "Khánh", "Linh", "Mai",
+        "Nam", "Phúc", "Quân", "Sơn", "Tâm", "Thảo", "Trang", "Tuấn", "Vy", "Yến"]
+
+# Từ khóa cho kịch bản tìm kiếm (có dấu, có tiền tố email)
+SEARCH_TERMS = ["Nguyễn", "trần thị", "Minh", "hùng", "user12", "Đặng Văn", "linh", "phuc"]
+
+
+def user_email(i: int) -> str:
+    return f"user{i}@loadtest.dropshop.vn"
+
+
+def is_seeded(engine) -> bool:
+    if not inspect(engine).has_table(User.__tablename__):
+        return False
+    with engine.connect() as conn:
+        return bool(conn.execute(select(func.count()).select_from(User)).scalar())
+
+
+def seed(engine, users: int, shops: int) -> None:
+    """
+    Tạo bảng, một sysadmin (ADMIN_EMAIL), `users` user thường và `shops`
+    shop (chủ shop là các user đầu tiên). Còn lại là customer/affiliator
+    chưa có shop, dùng cho kịch bản tạo shop.
+    """
+    Base.metadata.create_all(engine)
+    rng = random.Random(42)
+    hashed_password = security.create_password_hash(BENCH_PASSWORD)
+    start = datetime(2023, 1, 1)
+
+    with engine.begin() as conn:
+        conn.execute(insert(User), [{
+            "uid": generate_random_uid(), "full_name": "Bench Admin", "email": ADMIN_EMAIL,
+            "hashed_password": hashed_password, "role": UserRole.sysadmin,
+            "search_text": normalize_search_text("Bench Admin", ADMIN_EMAIL),
+        }])
+
+    done = 0
+    while done < users:
+        size = min(CHUNK_SIZE, users - done)
+        rows = []
+        for i in range(done, done + size):
+            full_name = f"{rng.choice(_HO)} {rng.choice(_DEM)} {rng.choice(_TEN)}"
+            if i < shops:
+                role = UserRole.shop_owner
+            else:
+                role = UserRole.affiliator if rng.random() < 0.2 else UserRole.customer
+            rows.append({
+                "uid": generate_random_uid(),
+                "full_name": full_name,
+                "email": user_email(i),
+                "hashed_password": hashed_password,
+                "role": role,
+                "search_text": normalize_search_text(full_name, user_email(i)),
+                # Có phần micro giây như timestamp thật (keyset so sánh created_at)
+                "created_at": start + timedelta(seconds=i * 60, microseconds=rng.randrange(1, 10**6)),
+            })
+        with engine.begin() as conn:
+            conn.execute(insert(User), rows)
+        done += size
+        print(f"\rseed users {done}/{users}", end="", flush=True)
+    print()
+
+    with engine.begin() as conn:
+        owners = conn.execute(
+            select(User.id).where(User.role == UserRole.shop_owner).order_by(User.id)
+        ).scalars().all()
+        if owners:
+            conn.execute(insert(Shop), [
+                {"shopid": generate_random_uid(15), "name": f"Shop {n}", "subdomain": f"bench{n}", "owner_id": owner_id}
+                for n, owner_id in enumerate(owners)
+            ])
+    print(f"seed shops {len(owners)}")
@@ -0,0 +1,147 @@
+# benchmarks/order_contention.py
+"""
+Benchmark đặt hàng đồng thời trên một SKU "hot" (flash sale).
+
+N thread cùng đặt 1 sản phẩm có `--stock` tồn kho qua crud_order.place_order,
+mỗi thread một Session. Kiểm tra không bán âm kho (số đơn thành công đúng
+bằng tồn kho ban đầu, kho còn 0) và đo latency/throughput. Kịch bản thứ hai
+gửi cùng một Idempotency-Key từ nhiều thread: chỉ được tạo đúng một đơn.
+
+    python -m benchmarks.order_contention --database-url sqlite:///./orders_bench.db
+    python -m benchmarks.order_contention --database-url postgresql://... --threads 64 --orders 2000
+
+Không chạy trên database thật: script tạo bảng và ghi dữ liệu giả.
+"""
+
+import argparse
+import statistics
+import threading
+import time
+import uuid
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, exc
+from sqlalchemy.orm import sessionmaker
+
+from app.crud import crud_order
+from app.db.base import Base
+from app.models.order import Order
+from app.models.product import Product, ProductVariant
+from app.models.shop import Shop
+from app.models.user import User
+from app.schemas.order import OrderCreate, OrderItemCreate
+
+
+def seed(Session, stock: int) -> tuple:
+    with Session() as db:
+        tag = uuid.uuid4().hex[:8]
+        owner = User(full_name="Bench", email=f"bench-{tag}@bench.local", hashed_password="x")
+        db.add(owner)
+        db.flush()
+        shop = Shop(name="Flash sale", subdomain=f"flash-{tag}", owner_id=owner.id,
+                    default_shipping_fee=30000, free_shipping_threshold=500000)
+        db.add(shop)
+        db.flush()
+        product = Product(shop_id=shop.id, name="Hot item", slug=f"hot-{tag}", price=99000)
+        product.variants.append(ProductVariant(sku="HOT", price=99000, stock=stock))
+        db.add(product)
+        db.commit()
+        return shop.id, owner.id, product.variants[0].id
+
+
+def _percentile(values, percent: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percent))]
+
+
+def run(Session, shop_id: int, customer_id: int, variant_id: int, orders: int, threads: int, keys) -> dict:
+    order_in = OrderCreate(
+        items=[OrderItemCreate(variant_id=variant_id, quantity=1)],
+        customer_name="Khách bench",
+        phone_number="0900000000",
+        shipping_address="1 Lê Lợi, Quận 1",
+    )
+    outcomes = Counter()
+    latencies = []
+    order_ids = set()
+    lock = threading.Lock()
+
+    def place(index: int) -> None:
+        began = time.perf_counter()
+        with Session() as db:
+            # Lỗi lock/serialization của DB: client retry (cùng key nếu có)
+            for _ in range(20):
+                try:
+                    order, created = crud_order.place_order(db, shop_id, customer_id, order_in, keys(index))
+                    outcome = "created" if created else "replayed"
+                    break
+                except crud_order.OutOfStockError:
+                    order, outcome = None, "out_of_stock"
+                    break
+                except crud_order.IdempotencyKeyInProgressError:
+                    db.rollback()
+                    time.sleep(0.005)
+                except exc.OperationalError:
+                    db.rollback()
+                    with lock:
+                        outcomes["db_retry"] += 1
+                    time.sleep(0.005)
+            else:
+                order, outcome = None, "failed"
+        with lock:
+            outcomes[outcome] += 1
+            latencies.append((time.perf_counter() - began) * 1000)
+            if order is not None:
+                order_ids.add(order.id)
+
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(place, range(orders)))
+    elapsed = time.perf_counter() - began
+
+    with Session() as db:
+        stock = db.get(ProductVariant, variant_id).stock
+    return {
+        "outcomes": dict(outcomes),
+        "distinct_orders": len(order_ids),
+        "final_stock": stock,
+        "throughput_rps": round(orders / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 2),
+        "p95_ms": round(_percentile(latencies, 0.95), 2),
+        "p99_ms": round(_percentile(latencies, 0.99), 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default="sqlite:///./orders_bench.db")
+    parser.add_argument("--stock", type=int, default=100)
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=32)
+    args = parser.parse_args()
+
+    connect_args = {"timeout": 30, "check_same_thread": False} if args.database_url.startswith("sqlite") else {}
+    engine = create_engine(args.database_url, pool_size=args.threads, connect_args=connect_args)
+    Base.metadata.create_all(engine)
+    Session = sessionmaker(bind=engine, autoflush=False)
+
+    shop_id, customer_id, variant_id = seed(Session, args.stock)
+    print(f"== {args.orders} đơn / {args.threads} thread, tồn kho {args.stock}, mỗi đơn một key")
+    result = run(Session, shop_id, customer_id, variant_id, args.orders, args.threads, lambda i: uuid.uuid4().hex)
+    print(result)
+    assert result["outcomes"].get("created", 0) == args.stock, "số đơn thành công khác tồn kho ban đầu"
+    assert result["final_stock"] == 0, "tồn kho cuối khác 0"
+
+    shop_id, customer_id, variant_id = seed(Session, args.stock)
+    key = uuid.uuid4().hex
+    print(f"== {args.threads * 4} request retry cùng một Idempotency-Key")
+    result = run(Session, shop_id, customer_id, variant_id, args.threads * 4, args.threads, lambda i: key)
+    print(result)
+    assert result["distinct_orders"] == 1 and result["final_stock"] == args.stock - 1, "retry tạo nhiều hơn một đơn"
+    with Session() as db:
+        assert db.query(Order).filter(Order.shop_id == shop_id).count() == 1
+
+
+if __name__ == "__main__":
+    main()
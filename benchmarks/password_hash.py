@@ -0,0 +1,119 @@
+# benchmarks/password_hash.py
+"""
+Chọn cost cho chính sách hash mật khẩu theo latency mục tiêu trên máy này.
+
+Đo thời gian hash (trung vị) của bcrypt với từng số rounds và argon2 (nếu đã
+cài argon2-cffi) với từng time_cost ở memory_cost/parallelism cho trước, qua
+đúng CryptContext mà app dùng (security.create_password_context). Với mỗi
+scheme chọn cost cao nhất mà vẫn không vượt `--target-ms`, in ra biến môi
+trường cần đặt và số lần đăng nhập/giây tối đa với PASSWORD_HASH_WORKERS.
+
+    python -m benchmarks.password_hash --target-ms 250
+    python -m benchmarks.password_hash --scheme argon2 --argon2-memory-kib 19456 --argon2-parallelism 1
+
+Chạy trên đúng loại máy chạy production: kết quả phụ thuộc CPU.
+"""
+
+import argparse
+import statistics
+import time
+from typing import List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.security import create_password_context
+
+PASSWORD = "benchmark-password-123"
+
+
+def argon2_available() -> bool:
+    try:
+        import argon2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def measure(context, samples: int) -> float:
+    """Trung vị thời gian hash (ms); verify tốn tương đương hash."""
+    context.hash(PASSWORD)  # warmup
+    timings = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        context.hash(PASSWORD)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def sweep(scheme: str, costs: range, target_ms: float, samples: int, **params) -> List[Tuple[int, float]]:
+    """Đo lần lượt từng cost, dừng khi đã vượt xa mục tiêu (cost sau còn chậm hơn)."""
+    results = []
+    for cost in costs:
+        if scheme == "bcrypt":
+            context = create_password_context("bcrypt", bcrypt_rounds=cost)
+        else:
+            context = create_password_context("argon2", argon2_time_cost=cost, **params)
+        ms = measure(context, samples)
+        results.append((cost, ms))
+        print(f"  {scheme:<7} cost={cost:<3} {ms:9.1f} ms")
+        if ms > target_ms * 2:
+            break
+    return results
+
+
+def pick(results: List[Tuple[int, float]], target_ms: float) -> Optional[Tuple[int, float]]:
+    within = [item for item in results if item[1] <= target_ms]
+    return max(within) if within else None
+
+
+def report(scheme: str, choice: Optional[Tuple[int, float]], env: List[str], workers: int) -> None:
+    if choice is None:
+        print(f"{scheme}: ngay cả cost thấp nhất cũng vượt mục tiêu")
+        return
+    cost, ms = choice
+    print(f"{scheme}: cost={cost} ({ms:.1f} ms, tối đa ~{workers * 1000 / ms:.0f} lần đăng nhập/giây với {workers} worker)")
+    for line in env:
+        print(f"    {line}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target-ms", type=float, default=250.0, help="latency hash mục tiêu (ms)")
+    parser.add_argument("--scheme", choices=["bcrypt", "argon2", "all"], default="all")
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument("--bcrypt-min-rounds", type=int, default=10)
+    parser.add_argument("--bcrypt-max-rounds", type=int, default=16)
+    parser.add_argument("--argon2-memory-kib", type=int, default=settings.PASSWORD_ARGON2_MEMORY_COST)
+    parser.add_argument("--argon2-parallelism", type=int, default=settings.PASSWORD_ARGON2_PARALLELISM)
+    parser.add_argument("--argon2-max-time-cost", type=int, default=10)
+    args = parser.parse_args()
+
+    workers = settings.PASSWORD_HASH_WORKERS
+    print(f"Mục tiêu {args.target_ms:.0f} ms/hash, hiện tại: {settings.PASSWORD_HASH_SCHEME}"
+          f" (bcrypt rounds={settings.PASSWORD_BCRYPT_ROUNDS}, argon2 t={settings.PASSWORD_ARGON2_TIME_COST}"
+          f" m={settings.PASSWORD_ARGON2_MEMORY_COST} p={settings.PASSWORD_ARGON2_PARALLELISM})")
+
+    if args.scheme in ("bcrypt", "all"):
+        results = sweep("bcrypt", range(args.bcrypt_min_rounds, args.bcrypt_max_rounds + 1), args.target_ms, args.samples)
+        choice = pick(results, args.target_ms)
+        report("bcrypt", choice, [
+            "PASSWORD_HASH_SCHEME=bcrypt",
+            f"PASSWORD_BCRYPT_ROUNDS={choice[0] if choice else ''}",
+        ], workers)
+
+    if args.scheme in ("argon2", "all"):
+        if not argon2_available():
+            print("argon2: bỏ qua (chưa cài argon2-cffi)")
+            return
+        params = {"argon2_memory_cost": args.argon2_memory_kib, "argon2_parallelism": args.argon2_parallelism}
+        results = sweep("argon2", range(1, args.argon2_max_time_cost + 1), args.target_ms, args.samples, **params)
+        choice = pick(results, args.target_ms)
+        report("argon2", choice, [
+            "PASSWORD_HASH_SCHEME=argon2",
+            f"PASSWORD_ARGON2_TIME_COST={choice[0] if choice else ''}",
+            f"PASSWORD_ARGON2_MEMORY_COST={args.argon2_memory_kib}",
+            f"PASSWORD_ARGON2_PARALLELISM={args.argon2_parallelism}",
+        ], workers)
+
+
+if __name__ == "__main__":
+    main()
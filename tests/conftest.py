@@ -0,0 +1,41 @@
+# tests/conftest.py
+#
+# Chạy: python -m pytest -q (từ thư mục gốc repo). Mỗi lần chạy dùng một
+# database SQLite tạm; biến môi trường phải đặt trước khi import app.
+
+import os
+import tempfile
+
+_DB_DIR = tempfile.mkdtemp(prefix="dropshop-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_DB_DIR}/test.db")
+os.environ.setdefault("ALLOWED_HOSTS", "*")
+os.environ.setdefault("REQUEST_LOG_LEVEL", "WARNING")
+os.environ.setdefault("PASSWORD_BCRYPT_ROUNDS", "4")
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.db.base import Base
+from app.db.session import SessionLocal, engine
+
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    Base.metadata.create_all(engine)
+
+
+@pytest.fixture(scope="session")
+def client():
+    from app.main import app
+
+    with TestClient(app, base_url="http://localhost") as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
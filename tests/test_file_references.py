@@ -0,0 +1,77 @@
+# tests/test_file_references.py
+
+import asyncio
+import os
+import uuid
+
+import pytest
+
+from app.core.file_handler import FileHandler
+from app.core.storage import LocalStorage
+from app.crud import crud_file
+
+FOLDER = "products"
+
+
+class PausingStorage(LocalStorage):
+    """LocalStorage dừng sau lần gọi exists() đầu tiên cho tới khi test cho chạy tiếp."""
+
+    def __init__(self, base_path: str):
+        super().__init__(base_path)
+        self.paused = asyncio.Event()
+        self.resume = asyncio.Event()
+
+    async def exists(self, key: str) -> bool:
+        result = await super().exists(key)
+        if not self.paused.is_set():
+            self.paused.set()
+            await self.resume.wait()
+        return result
+
+
+@pytest.fixture
+def stored_file(db, tmp_path):
+    """File đã upload (1 tham chiếu) rồi bị nhả tham chiếu cuối: bản ghi đã xóa, file vật lý còn."""
+    content_hash = uuid.uuid4().hex
+    filename = f"{content_hash}.png"
+    (tmp_path / FOLDER).mkdir(exist_ok=True)
+    (tmp_path / FOLDER / filename).write_bytes(b"image")
+    crud_file.add_reference(db, FOLDER, filename, content_hash, 5)
+    assert crud_file.release_file(db, FOLDER, filename) == 0
+    return content_hash, filename
+
+
+def test_unlink_keeps_file_rereferenced_after_release(db, tmp_path, stored_file):
+    content_hash, filename = stored_file
+    handler = FileHandler(base_path=str(tmp_path), storage=LocalStorage(str(tmp_path)))
+
+    # Upload trùng ảnh tạo lại bản ghi trước khi file kịp bị xóa
+    crud_file.add_reference(db, FOLDER, filename, content_hash, 5)
+
+    asyncio.run(handler.unlink_files([(FOLDER, filename)], db))
+    assert (tmp_path / FOLDER / filename).exists()
+
+
+def test_concurrent_upload_and_unlink_keep_referenced_file(db, tmp_path, stored_file):
+    content_hash, filename = stored_file
+    storage = PausingStorage(str(tmp_path))
+    handler = FileHandler(base_path=str(tmp_path), storage=storage)
+    temp_path = os.path.join(str(tmp_path), "temp", f"{uuid.uuid4().hex}.png")
+    with open(temp_path, "wb") as out:
+        out.write(b"image")
+
+    async def scenario():
+        # Upload thấy file vẫn còn (trước khi bị xóa) rồi ghi nhận tham chiếu
+        upload = asyncio.create_task(
+            handler._save_spooled(temp_path, "png", content_hash, 5, FOLDER, db, False, None)
+        )
+        await storage.paused.wait()
+        unlink = asyncio.create_task(handler.unlink_files([(FOLDER, filename)], db))
+        await asyncio.sleep(0.05)
+        storage.resume.set()
+        await asyncio.gather(upload, unlink)
+
+    asyncio.run(scenario())
+
+    assert crud_file.has_stored_file(db, FOLDER, filename)
+    assert (tmp_path / FOLDER / filename).exists()
@@ -0,0 +1,76 @@
+# tests/test_password_service.py
+
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from app.core.password_service import PasswordService
+
+
+async def _wait_for(predicate, timeout: float = 5.0) -> None:
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while not predicate():
+        assert loop.time() < deadline, "timed out"
+        await asyncio.sleep(0.01)
+
+
+def _blocking_job(started: threading.Event, release: threading.Event):
+    def job(value):
+        started.set()
+        release.wait(5)
+        return value
+    return job
+
+
+def test_cancelled_request_keeps_slot_until_job_finishes():
+    service = PasswordService(max_workers=1, max_pending=1)
+    started, release = threading.Event(), threading.Event()
+
+    async def scenario():
+        task = asyncio.create_task(service._run(_blocking_job(started, release), "x"))
+        await _wait_for(started.is_set)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # Job vẫn chạy trong pool: slot chưa được trả, request mới bị 503 ngay
+        assert service.stats()["in_flight"] == 1
+        with pytest.raises(HTTPException) as exc:
+            await service._run(str, "y")
+        assert exc.value.status_code == 503
+
+        release.set()
+        await _wait_for(lambda: service.stats()["in_flight"] == 0)
+        assert await service._run(str, "z") == "z"
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        service.shutdown()
+
+
+def test_cancelled_batch_keeps_slot_until_jobs_finish():
+    service = PasswordService(max_workers=2, max_pending=1)
+    started, release = threading.Event(), threading.Event()
+
+    async def scenario():
+        task = asyncio.create_task(service._run_many(_blocking_job(started, release), ["a", "b", "c"]))
+        await _wait_for(started.is_set)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        assert service.stats()["in_flight"] == 1
+        release.set()
+        await _wait_for(lambda: service.stats()["in_flight"] == 0)
+        assert await service._run_many(str, [1, 2]) == ["1", "2"]
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        release.set()
+        service.shutdown()
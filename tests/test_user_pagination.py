@@ -0,0 +1,67 @@
+# tests/test_user_pagination.py
+
+import uuid
+
+import pytest
+
+from app.crud import crud_user
+from app.crud.pagination import InvalidCursorError, encode_cursor
+from app.models.user import User
+
+
+@pytest.fixture
+def search_users(db):
+    token = f"pg{uuid.uuid4().hex[:8]}"
+    users = [
+        User(full_name=f"{token} {index}", email=f"{uuid.uuid4().hex[:10]}@example.com", hashed_password="x")
+        for index in range(7)
+    ]
+    db.add_all(users)
+    db.commit()
+    return token, {user.id for user in users}
+
+
+@pytest.fixture
+def ranked_search(monkeypatch):
+    """Tìm kiếm xếp theo độ liên quan (ở đây: theo email), khác thứ tự (created_at, id)."""
+    apply_user_search = crud_user.apply_user_search
+
+    def apply(db, query, search):
+        query, _ = apply_user_search(db, query, search)
+        return query, [User.email.asc()]
+
+    monkeypatch.setattr(crud_user, "apply_user_search", apply)
+
+
+def _walk(db, **params):
+    seen = []
+    users, info = crud_user.get_users_paginated(db, limit=3, **params)
+    seen.extend(user.id for user in users)
+    while info["next_cursor"]:
+        users, info = crud_user.get_users_paginated(db, limit=3, cursor=info["next_cursor"], **params)
+        seen.extend(user.id for user in users)
+    return seen
+
+
+def test_search_cursor_pages_follow_ranking(db, search_users, ranked_search):
+    token, ids = search_users
+    seen = _walk(db, search=token)
+
+    assert len(seen) == len(set(seen))
+    assert set(seen) == ids
+    ranked = [user.id for user in sorted(db.query(User).filter(User.id.in_(ids)), key=lambda user: user.email)]
+    assert seen == ranked
+
+
+def test_search_rejects_keyset_cursor(db, search_users, ranked_search):
+    token, _ = search_users
+    with pytest.raises(InvalidCursorError):
+        crud_user.get_users_paginated(db, limit=3, search=token, cursor=encode_cursor(None, 1))
+
+
+def test_keyset_cursor_pages_without_search(db, search_users):
+    _, ids = search_users
+    seen = _walk(db)
+
+    assert len(seen) == len(set(seen))
+    assert ids <= set(seen)
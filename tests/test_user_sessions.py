@@ -0,0 +1,92 @@
+# tests/test_user_sessions.py
+
+import uuid
+
+from app.models.user import User, UserRole
+
+PASSWORD = "secret123"
+
+
+def _auth(token: str) -> dict:
+    return {"Authorization": f"Bearer {token}"}
+
+
+def _register(client, db, role: UserRole = UserRole.customer) -> str:
+    email = f"{uuid.uuid4().hex[:12]}@example.com"
+    response = client.post(
+        "/api/v1/auth/register",
+        json={"full_name": "Test User", "email": email, "password": PASSWORD},
+    )
+    assert response.status_code in (200, 201), response.text
+    if role != UserRole.customer:
+        db.query(User).filter(User.email == email).update({"role": role})
+        db.commit()
+    return email
+
+
+def _login(client, email: str, password: str = PASSWORD) -> dict:
+    response = client.post("/api/v1/auth/login", json={"username": email, "password": password})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_password_change_through_put_revokes_sessions(client, db):
+    admin = _login(client, _register(client, db, UserRole.sysadmin))
+    email = _register(client, db)
+    tokens = _login(client, email)
+    uid = client.get("/api/v1/auth/me", headers=_auth(tokens["access_token"])).json()["uid"]
+
+    response = client.put(
+        f"/api/v1/users/{uid}", json={"password": "newsecret123"}, headers=_auth(admin["access_token"])
+    )
+    assert response.status_code == 200, response.text
+
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+    assert client.get("/api/v1/auth/me", headers=_auth(tokens["access_token"])).status_code == 401
+    _login(client, email, "newsecret123")
+
+
+def test_deactivation_through_put_revokes_sessions(client, db):
+    admin = _login(client, _register(client, db, UserRole.sysadmin))
+    tokens = _login(client, _register(client, db))
+    uid = client.get("/api/v1/auth/me", headers=_auth(tokens["access_token"])).json()["uid"]
+
+    response = client.put(
+        f"/api/v1/users/{uid}", json={"is_active": False}, headers=_auth(admin["access_token"])
+    )
+    assert response.status_code == 200, response.text
+
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 401
+
+
+def test_profile_update_keeps_sessions(client, db):
+    tokens = _login(client, _register(client, db))
+    uid = client.get("/api/v1/auth/me", headers=_auth(tokens["access_token"])).json()["uid"]
+
+    response = client.put(
+        f"/api/v1/users/{uid}", json={"full_name": "Renamed"}, headers=_auth(tokens["access_token"])
+    )
+    assert response.status_code == 200, response.text
+
+    assert client.post("/api/v1/auth/refresh", json={"refresh_token": tokens["refresh_token"]}).status_code == 200
+
+
+def test_revoked_sessions_lookup_is_cached():
+    from app.core.principal import revoked_sessions
+
+    revoked_sessions.clear()
+    loads = []
+
+    def load(user_id):
+        loads.append(user_id)
+        return [7]
+
+    claims = {"sub": "uid-cached", "id": 42, "sid": 8}
+    assert not revoked_sessions.is_revoked(claims, load)
+    assert not revoked_sessions.is_revoked(claims, load)
+    assert revoked_sessions.is_revoked({**claims, "sid": 7}, load)
+    assert loads == [42]
+
+    revoked_sessions.revoke("uid-cached", [7, 8])
+    assert revoked_sessions.is_revoked(claims, load)
+    assert loads == [42]